@@ -2,6 +2,7 @@
 # -*- coding: utf-8 -*-
 """Class to authenticate and JWT token generation."""
 import datetime
+import uuid
 from datetime import timedelta, timezone
 from typing import Dict, Any
 
@@ -12,6 +13,9 @@ from fastapi import HTTPException, status, Request
 from fastapi.responses import JSONResponse
 
 from settings import settings
+from .revocation import revocation_list
+from .token_cache import token_cache
+from .user_status import user_status_cache
 
 
 SECRET_KEY = settings.jwt_secret_key
@@ -31,6 +35,9 @@ class AuthHandler:
         """
         Verifies that the plain password matches the hashed password.
 
+        Blocks for the whole hashing, use `PasswordHasher` in
+        coroutines.
+
         :param plain_password: str: The plain text password to verify.
         :param hashed_password: str: The hashed password
          to compare against.
@@ -46,10 +53,13 @@ class AuthHandler:
         """
         Generates a hashed password from the plain text password.
 
+        Blocks for the whole hashing, use `PasswordHasher` in
+        coroutines.
+
         :param password: str: The plain text password to hash.
         :return: str: The hashed password.
         """
-        salt = AuthHandler.crypter.gensalt()
+        salt = AuthHandler.crypter.gensalt(rounds=settings.bcrypt_rounds)
         pwd_bytes = password.encode()
         hashed_password = AuthHandler.crypter.hashpw(password=pwd_bytes, salt=salt).decode()
         return hashed_password
@@ -60,6 +70,9 @@ class AuthHandler:
         """
         Creates a JWT access token.
 
+        Every token gets a unique `jti` claim, which identifies it
+        on revocation.
+
         :param data: Dict[str, str | datetime.datetime]: The data
          to encode in the token.
         :param expires_delta: timedelta | None: The time duration after
@@ -76,6 +89,7 @@ class AuthHandler:
             expire = (datetime.datetime.now(timezone.utc)
                       + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
         to_encode.update({'exp': int(expire.timestamp())})
+        to_encode.setdefault('jti', uuid.uuid4().hex)
         encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
         return encoded_jwt
 
@@ -90,7 +104,7 @@ class AuthHandler:
         """
         try:
             payload: dict[str, Any] = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            if 'sub' not in payload:
+            if 'sub' not in payload or 'jti' not in payload:
                 raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
                                     detail='Invalid token')
             return payload
@@ -102,41 +116,61 @@ class AuthHandler:
                                 detail='Could not validate credentials') from exc
 
     @staticmethod
-    def check_auth(request: Request) -> JSONResponse:
+    async def check_auth(request: Request) -> JSONResponse:
         """
         Checks if the user is authenticated based on the JWT token
         in cookies.
 
+        Tokens verified once are taken from `token_cache` until they
+        expire or the user logs out. Revoked tokens are rejected even
+        if they are cached, as well as tokens of deleted or inactive
+        users, which are checked in `user_status_cache`.
+
         :param request: Request: The HTTP request containing
          the JWT token in cookies.
         :return: JSONResponse: A JSON response indicating whether
          the user is authenticated.
-        :raises HTTPException: If the token is missing or revoked.
+        :raises HTTPException: If the token is missing or revoked, or
+         its user is not active.
         """
-        # pylint: disable=W0511
-        # TODO: Create checking for existing user in db. Now if user is
-        #  not exists, but token is not revoked - check passes
-        #  success, but it is incorrect behavior
         token = request.cookies.get('auth_token')
         if token is None or token == 'revoked':
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
                                 detail='Not authenticated')
-        AuthHandler.verify_token(token)
+        payload = token_cache.get(token)
+        if payload is None:
+            payload = AuthHandler.verify_token(token)
+            token_cache.set(token, payload)
+        if await revocation_list.is_revoked(payload['jti']):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
+                                detail='Token has been revoked')
+        if not await user_status_cache.is_active(payload['sub']):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
+                                detail='User is not active')
         return JSONResponse(content={'detail': 'User is authenticated'},
                             status_code=status.HTTP_200_OK)
 
     @staticmethod
-    # pylint: disable=W0613
-    def logout_user(request: Request) -> JSONResponse:
+    async def logout_user(request: Request) -> JSONResponse:
         """
         Logs out the user by revoking the JWT token and clearing it from
         cookies.
 
+        A valid token is added to the revocation list, so its copies
+        are rejected too.
+
         :param request: Request: The HTTP request to process the logout.
         :return: JSONResponse: A JSON response confirming logout success.
         """
         cookie = request.cookies.get('auth_token')
         if cookie and cookie != 'revoked':
+            token_cache.invalidate(cookie)
+            try:
+                payload = AuthHandler.verify_token(cookie)
+            except HTTPException:
+                payload = None
+            if payload is not None:
+                await revocation_list.revoke(payload['jti'], payload['exp'])
             response = JSONResponse(content={'detail': 'Logout success.'},
                                     status_code=status.HTTP_200_OK)
             response.set_cookie(key='auth_token',
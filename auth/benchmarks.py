@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Load benchmark of the event loop lag caused by password hashing.
+
+Run as `python -m auth.benchmarks [concurrent logins]`.
+"""
+import sys
+import time
+
+import asyncio
+
+from .auth_handler import AuthHandler
+from .hashing import PasswordHasher
+
+TICK = 0.005
+
+
+async def watch_lag(stop: asyncio.Event) -> list[float]:
+    """
+    Measures how late the event loop wakes up a sleeping coroutine.
+
+    :param stop: asyncio.Event: The event finishing the measuring.
+    :return: list[float]: The lags of every tick in seconds.
+    """
+    lags: list[float] = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - started - TICK)
+    return lags
+
+
+async def inline_login(hashed: str) -> bool:
+    """
+    Verifies a password right in the coroutine, as before offloading.
+
+    :param hashed: str: The stored password hash.
+    :return: bool: The verification result.
+    """
+    return AuthHandler.verify_password('password', hashed)
+
+
+async def measure(logins: int, hasher: PasswordHasher | None, hashed: str) -> tuple[float, float]:
+    """
+    Runs concurrent logins while watching the event loop lag.
+
+    :param logins: int: The amount of concurrent logins.
+    :param hasher: PasswordHasher | None: The hasher to verify with,
+     verifies inline if None.
+    :param hashed: str: The stored password hash.
+    :return: tuple[float, float]: The maximal lag and the whole run
+     time in seconds.
+    """
+    stop = asyncio.Event()
+    watcher = asyncio.create_task(watch_lag(stop))
+    await asyncio.sleep(TICK)
+    started = time.perf_counter()
+    if hasher is None:
+        await asyncio.gather(*(inline_login(hashed) for _ in range(logins)))
+    else:
+        await asyncio.gather(*(hasher.verify('password', hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    lags = await watcher
+    return max(lags), elapsed
+
+
+async def main(logins: int = 16) -> None:
+    """
+    Compares the event loop lag of inline and offloaded hashing.
+
+    :param logins: int: The amount of concurrent logins.
+    """
+    hashed = AuthHandler.get_password_hash('password')
+    hasher = PasswordHasher(queue_size=logins)
+    inline_lag, inline_time = await measure(logins, None, hashed)
+    pool_lag, pool_time = await measure(logins, hasher, hashed)
+    hasher.shutdown()
+    print(f'{logins} concurrent logins')
+    print(f'  inline:    max loop lag {inline_lag * 1000:8.1f} ms, total {inline_time:6.2f} s')
+    print(f'  offloaded: max loop lag {pool_lag * 1000:8.1f} ms, total {pool_time:6.2f} s')
+
+
+if __name__ == '__main__':
+    asyncio.run(main(*(int(arg) for arg in sys.argv[1:2])))
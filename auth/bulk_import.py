@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Contains the bulk import of users from JSONL or CSV streams.
+
+Run as `python -m auth.bulk_import <file> [--format csv] [--chunk-size N]`.
+"""
+import argparse
+import csv
+import json
+import time
+from typing import AsyncIterable, AsyncIterator, Any
+
+import asyncio
+import aiofiles
+from pydantic import ValidationError
+from sqlalchemy import or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db_utils import session_manager
+from settings import settings
+from .hashing import PasswordHasher, password_hasher
+from .models import User
+from .schemas import BulkImportReport, UserCreate
+from .user_status import user_status_cache
+
+FILE_FORMATS = ('jsonl', 'csv')
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """
+    Splits a stream of bytes into lines.
+
+    :param chunks: AsyncIterable[bytes]: The stream, e.g. a request body.
+    :return: AsyncIterator[str]: The decoded non-empty lines.
+    """
+    buffer = b''
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b'\n')
+        for line in lines:
+            if line.strip():
+                yield line.decode()
+    if buffer.strip():
+        yield buffer.decode()
+
+
+async def parse_users(lines: AsyncIterable[str],
+                      file_format: str = 'jsonl') -> AsyncIterator[UserCreate | None]:
+    """
+    Parses users from JSONL lines or CSV lines with a header.
+
+    CSV records must fit in one line.
+
+    :param lines: AsyncIterable[str]: The lines of the stream.
+    :param file_format: str: `jsonl` or `csv`.
+    :return: AsyncIterator[UserCreate | None]: The users, None for
+     every malformed record.
+    :raises ValueError: If the format is not supported.
+    """
+    if file_format not in FILE_FORMATS:
+        raise ValueError(f'Unsupported format {file_format!r}.'
+                         f' Allowed formats are {FILE_FORMATS}')
+    header: list[str] | None = None
+    async for line in lines:
+        record: Any
+        try:
+            if file_format == 'jsonl':
+                record = json.loads(line)
+            elif header is None:
+                [header] = csv.reader([line])
+                continue
+            else:
+                [values] = csv.reader([line])
+                record = dict(zip(header, values))
+            yield UserCreate.model_validate(record)
+        except (ValueError, ValidationError):
+            yield None
+
+
+# pylint: disable=R0903
+class BulkImporter:
+    """
+    Creates users in chunks.
+
+    Every chunk is checked against taken emails and names with one
+    query, its passwords are hashed in parallel on `PasswordHasher`
+    threads and its users are inserted by one executemany statement,
+    which skips rows conflicting with users created meanwhile.
+    """
+
+    def __init__(self, session: AsyncSession,
+                 chunk_size: int = settings.bulk_import_chunk_size,
+                 hasher: PasswordHasher = password_hasher) -> None:
+        """
+        Initializes the BulkImporter with a database session.
+
+        :param session: AsyncSession: The session to insert users with.
+        :param chunk_size: int: The amount of users per chunk.
+        :param hasher: PasswordHasher: The hasher of passwords.
+        """
+        self.session = session
+        self.chunk_size: int = chunk_size
+        self.hasher = hasher
+
+    async def run(self, users: AsyncIterable[UserCreate | None]) -> BulkImportReport:
+        """
+        Imports users, committing every chunk.
+
+        :param users: AsyncIterable[UserCreate | None]: The users, None
+         for malformed records.
+        :return: BulkImportReport: The counters and the throughput.
+        """
+        report = BulkImportReport()
+        started = time.perf_counter()
+        chunk: list[UserCreate] = []
+        async for user in users:
+            report.received += 1
+            if user is None:
+                report.invalid += 1
+                continue
+            chunk.append(user)
+            if len(chunk) >= self.chunk_size:
+                await self._import_chunk(chunk, report)
+                chunk = []
+        if chunk:
+            await self._import_chunk(chunk, report)
+        report.seconds = round(time.perf_counter() - started, 3)
+        if report.seconds:
+            report.users_per_second = round(report.created / report.seconds, 1)
+        return report
+
+    async def _import_chunk(self, chunk: list[UserCreate], report: BulkImportReport) -> None:
+        """
+        Inserts the users of a chunk whose email and name are free.
+
+        :param chunk: list[UserCreate]: The users.
+        :param report: BulkImportReport: The report to count in.
+        :return: None
+        """
+        taken = await self.session.execute(
+            select(User.email, User.name).where(or_(User.email.in_({u.email for u in chunk}),
+                                                    User.name.in_({u.name for u in chunk})))
+        )
+        emails, names = set(), set()
+        for email, name in taken:
+            emails.add(email)
+            names.add(name)
+        new_users = []
+        for user in chunk:
+            if user.email in emails or user.name in names:
+                continue
+            emails.add(user.email)
+            names.add(user.name)
+            new_users.append(user)
+
+        created: list[str] = []
+        if new_users:
+            hashes = await self.hasher.hash_many(user.password for user in new_users)
+            rows = [{'name': user.name, 'email': user.email, 'password': hashed,
+                     'is_active': True, 'is_stuff': False}
+                    for user, hashed in zip(new_users, hashes)]
+            result = await self.session.execute(self._insert_statement(), rows)
+            created = list(result.scalars())
+            await self.session.commit()
+            for name in created:
+                user_status_cache.invalidate(name)
+        report.created += len(created)
+        report.duplicates += len(chunk) - len(created)
+
+    def _insert_statement(self) -> Any:
+        """
+        Creates the insert of users skipping conflicting rows.
+
+        :return: Any: The dialect specific insert returning the names
+         of inserted users.
+        """
+        if self.session.get_bind().dialect.name == 'postgresql':
+            return postgresql.insert(User).on_conflict_do_nothing().returning(User.name)
+        return sqlite.insert(User).on_conflict_do_nothing().returning(User.name)
+
+
+async def main(path: str, file_format: str = 'jsonl',
+               chunk_size: int = settings.bulk_import_chunk_size) -> BulkImportReport:
+    """
+    Imports users from a file.
+
+    :param path: str: The path of the JSONL or CSV file.
+    :param file_format: str: `jsonl` or `csv`.
+    :param chunk_size: int: The amount of users per chunk.
+    :return: BulkImportReport: The counters and the throughput.
+    """
+    async with aiofiles.open(path, mode='rb') as file:
+        async with session_manager.async_session_local() as session:
+            importer = BulkImporter(session, chunk_size)
+            report = await importer.run(parse_users(iter_lines(file), file_format))
+    await session_manager.async_engine.dispose()
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Import users from a JSONL or CSV file.')
+    parser.add_argument('path')
+    parser.add_argument('--format', choices=FILE_FORMATS, default='jsonl')
+    parser.add_argument('--chunk-size', type=int, default=settings.bulk_import_chunk_size)
+    args = parser.parse_args()
+    print(asyncio.run(main(args.path, args.format, args.chunk_size)).model_dump_json(indent=2))
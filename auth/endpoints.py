@@ -6,7 +6,8 @@ from typing import Annotated
 from fastapi import APIRouter, Request, Depends
 from fastapi.responses import JSONResponse
 
-from .schemas import UserCreate, UserLogin
+from .auth_handler import AuthHandler
+from .schemas import BulkImportReport, UserCreate, UserLogin
 from .services import UserAuthenticate
 
 router = APIRouter()
@@ -70,3 +71,20 @@ async def logout_user(request: Request, auth_process: AuthService) -> JSONRespon
     :return: JSONResponse: A JSON response confirming logout success.
     """
     return await auth_process.logout_user(request)
+
+
+@router.post('/api/v1/users/import')
+# pylint: disable=W0613
+async def import_users(request: Request, auth_process: AuthService,
+                       check: str = Depends(AuthHandler.check_auth)) -> BulkImportReport:
+    """
+    Registers users streamed as JSON lines or CSV. Staff only.
+
+    :param request: Request: The HTTP request with the users in
+     the body.
+    :param auth_process: UserAuthenticate: Class - authenticate
+     and authorization manager providing matching functional.
+    :return: BulkImportReport: The counters and the throughput of
+     the import.
+    """
+    return await auth_process.import_users(request)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Contains the password hashing service working off the event loop."""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, TypeVar
+
+import asyncio
+from fastapi import HTTPException, status
+
+from settings import settings
+from .auth_handler import AuthHandler
+
+T = TypeVar('T')
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and verification on a bounded thread pool.
+
+    bcrypt releases the GIL while hashing, so the threads hash in
+    parallel and the event loop keeps serving other requests. When
+    `workers` hashes are running and `queue_size` more are waiting,
+    new calls are rejected with 503 instead of queueing up, so a login
+    burst can't hold the app for long.
+    """
+
+    def __init__(self, workers: int = settings.password_hash_workers,
+                 queue_size: int = settings.password_hash_queue) -> None:
+        """
+        Initializes the PasswordHasher with its limits.
+
+        :param workers: int: The amount of hashing threads.
+        :param queue_size: int: The amount of calls allowed to wait
+         for a free thread.
+        """
+        self.workers: int = workers
+        self.max_pending: int = workers + queue_size
+        self._pending: int = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers,
+                                            thread_name_prefix='password-hasher')
+
+    @property
+    def pending(self) -> int:
+        """
+        The amount of running and waiting calls.
+
+        :return: int: The amount of admitted calls.
+        """
+        return self._pending
+
+    async def hash(self, password: str) -> str:
+        """
+        Generates a hashed password from the plain text password.
+
+        :param password: str: The plain text password to hash.
+        :return: str: The hashed password.
+        :raises HTTPException: If too many calls are pending.
+        """
+        return await self._run(AuthHandler.get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """
+        Verifies that the plain password matches the hashed password.
+
+        :param plain_password: str: The plain text password to verify.
+        :param hashed_password: str: The hashed password
+         to compare against.
+        :return: bool: True if the password matches, False otherwise.
+        :raises HTTPException: If too many calls are pending.
+        """
+        return await self._run(AuthHandler.verify_password, plain_password, hashed_password)
+
+    async def hash_many(self, passwords: Iterable[str]) -> list[str]:
+        """
+        Hashes a batch of passwords on all threads.
+
+        Bypasses the admission control, but keeps at most `workers`
+        batch hashes queued, so logins are served between them.
+
+        :param passwords: Iterable[str]: The plain text passwords.
+        :return: list[str]: The hashed passwords in the same order.
+        """
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(self.workers)
+
+        async def hash_one(password: str) -> str:
+            async with slots:
+                return await loop.run_in_executor(self._executor,
+                                                  AuthHandler.get_password_hash, password)
+
+        return list(await asyncio.gather(*(hash_one(password) for password in passwords)))
+
+    def shutdown(self) -> None:
+        """
+        Stops the hashing threads after the running calls.
+
+        :return: None
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run(self, func: Callable[..., T], *args: str) -> T:
+        if self._pending >= self.max_pending:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                detail='Too many authentication requests, retry later',
+                                headers={'Retry-After': '1'})
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self._pending -= 1
+
+
+password_hasher = PasswordHasher()
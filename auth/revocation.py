@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Contains the list of revoked JWT tokens."""
+import hashlib
+import logging
+import time
+
+import asyncio
+from redis.exceptions import RedisError
+
+from redis_client import redis
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """
+    A set of strings answering "surely not in" or "maybe in".
+
+    Keeps `size` bits and sets `hashes` of them per added string, so
+    the memory doesn't grow with the amount of strings, while false
+    positives get more frequent.
+    """
+
+    def __init__(self, size: int = settings.revocation_bloom_size,
+                 hashes: int = settings.revocation_bloom_hashes) -> None:
+        """
+        Initializes the empty BloomFilter.
+
+        :param size: int: The amount of bits.
+        :param hashes: int: The amount of bits set per string.
+        """
+        self.size: int = size
+        self.hashes: int = hashes
+        self._bits = bytearray((size + 7) // 8)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[i >> 3] & (1 << (i & 7)) for i in self._indexes(item))
+
+    def add(self, item: str) -> None:
+        """
+        Adds a string to the filter.
+
+        :param item: str: The string to add.
+        :return: None
+        """
+        for i in self._indexes(item):
+            self._bits[i >> 3] |= 1 << (i & 7)
+
+    def _indexes(self, item: str) -> list[int]:
+        """
+        Calculates the bits of a string by double hashing.
+
+        :param item: str: The string.
+        :return: list[int]: The indexes of the bits.
+        """
+        digest = hashlib.sha256(item.encode()).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:16], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+
+class RevocationList:
+    """
+    Tracks the `jti` claims of revoked tokens.
+
+    A revoked id is stored in Redis until its token expires and is
+    published to the other workers. Every worker keeps the revoked ids
+    in a `BloomFilter`, filled from Redis on start and by the published
+    ids, so a token which is not revoked is checked without a network
+    round trip. Only ids the filter may contain are looked up in Redis.
+
+    The filter is rebuilt every `rebuild_interval` seconds to drop the
+    ids of expired tokens. If Redis is unavailable, the revocation is
+    kept locally until it can be written, and ids the filter may
+    contain are considered revoked.
+    """
+
+    key_prefix = 'revoked_jti:'
+    channel = 'revoked_jti'
+
+    def __init__(self, rebuild_interval: float = settings.revocation_rebuild_interval,
+                 retry_interval: float = 5.0) -> None:
+        """
+        Initializes the RevocationList with the Redis client.
+
+        :param rebuild_interval: float: Seconds between rebuilds of
+         the filter.
+        :param retry_interval: float: Seconds to wait before
+         reconnecting to Redis.
+        """
+        self.client = redis
+        self.rebuild_interval: float = rebuild_interval
+        self.retry_interval: float = retry_interval
+        self._bloom = BloomFilter()
+        self._unsynced: dict[str, int] = {}
+        self._listener: asyncio.Task[None] | None = None
+
+    async def start(self) -> None:
+        """
+        Starts syncing the filter with Redis in background.
+
+        :return: None
+        """
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        """
+        Stops syncing the filter.
+
+        :return: None
+        """
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    async def revoke(self, jti: str, exp: int) -> None:
+        """
+        Revokes a token until it expires.
+
+        :param jti: str: The id of the token.
+        :param exp: int: The expiration timestamp of the token.
+        :return: None
+        """
+        self._bloom.add(jti)
+        try:
+            await self._store(jti, exp)
+        except RedisError:
+            logger.warning('Revocation of %s is kept locally until Redis is available', jti)
+            self._unsynced[jti] = exp
+
+    async def is_revoked(self, jti: str) -> bool:
+        """
+        Checks if a token is revoked.
+
+        :param jti: str: The id of the token.
+        :return: bool: True if the token is revoked.
+        """
+        if jti not in self._bloom:
+            return False
+        if jti in self._unsynced:
+            return True
+        try:
+            return bool(await self.client.exists(self.key_prefix + jti))
+        except RedisError:
+            logger.warning('Redis is unavailable, token %s is considered revoked', jti)
+            return True
+
+    async def _store(self, jti: str, exp: int) -> None:
+        """
+        Writes a revoked id to Redis and publishes it.
+
+        :param jti: str: The id of the token.
+        :param exp: int: The expiration timestamp of the token.
+        :return: None
+        """
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.set(self.key_prefix + jti, 1, ex=max(1, exp - int(time.time())))
+            pipe.publish(self.channel, jti)
+            await pipe.execute()
+
+    async def _rebuild(self) -> None:
+        """
+        Refills the filter with the ids stored in Redis.
+
+        Ids revoked while Redis was unavailable are written first.
+
+        :return: None
+        """
+        for jti, exp in list(self._unsynced.items()):
+            await self._store(jti, exp)
+            del self._unsynced[jti]
+        bloom = BloomFilter(self._bloom.size, self._bloom.hashes)
+        async for key in self.client.scan_iter(match=f'{self.key_prefix}*', count=1000):
+            bloom.add(key.decode()[len(self.key_prefix):])
+        self._bloom = bloom
+
+    async def _listen(self) -> None:
+        """
+        Adds the published ids to the filter and rebuilds it
+        periodically, reconnecting to Redis on errors.
+
+        :return: None
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                async with self.client.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    await self._rebuild()
+                    rebuilt_at = loop.time()
+                    while True:
+                        message = await pubsub.get_message(ignore_subscribe_messages=True,
+                                                           timeout=self.rebuild_interval)
+                        if message is not None:
+                            self._bloom.add(message['data'].decode())
+                        if loop.time() - rebuilt_at >= self.rebuild_interval:
+                            await self._rebuild()
+                            rebuilt_at = loop.time()
+            except RedisError as exc:
+                logger.warning('Revocation list sync failed: %s', exc)
+                await asyncio.sleep(self.retry_interval)
+
+
+revocation_list = RevocationList()
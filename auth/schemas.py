@@ -28,3 +28,24 @@ class UserLogin(BaseModel):
     """
     name: str
     password: str
+
+
+class BulkImportReport(BaseModel):
+    """
+    Schema for the result of a bulk user import.
+
+    Attributes:
+        received: int: The amount of read records.
+        created: int: The amount of created users.
+        duplicates: int: The amount of records skipped because their
+         email or name is taken.
+        invalid: int: The amount of malformed records.
+        seconds: float: The import duration.
+        users_per_second: float: The import throughput.
+    """
+    received: int = 0
+    created: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    seconds: float = 0.0
+    users_per_second: float = 0.0
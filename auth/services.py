@@ -3,14 +3,18 @@
 """Contains user registration / authentication logic."""
 from datetime import timedelta
 
-from fastapi import Request, HTTPException, status
+from fastapi import Request, HTTPException, Depends, status
 from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from settings import settings
 from db_utils import session_manager
-from .schemas import UserCreate, UserLogin
+from .schemas import BulkImportReport, UserCreate, UserLogin
 from .models import User
 from .auth_handler import AuthHandler, ACCESS_TOKEN_EXPIRE_MINUTES
+from .bulk_import import BulkImporter, iter_lines, parse_users
+from .hashing import password_hasher
 
 
 
@@ -22,9 +26,16 @@ class UserAuthenticate:
     check user authorization, and handle user logout.
     """
 
-    def __init__(self) -> None:
-        self.session = session_manager.session_local
-        self.engine = session_manager.engine
+    def __init__(self,
+                 session: AsyncSession = Depends(session_manager.get_async_session)) -> None:
+        """
+        Initializes the UserAuthenticate with the session of
+        the request.
+
+        :param session: AsyncSession: The database session closed after
+         the request.
+        """
+        self.session = session
 
     async def create_user(self, user:  UserCreate) -> JSONResponse:
         """
@@ -41,23 +52,22 @@ class UserAuthenticate:
         :raises HTTPException: If the user already exists with
          the given email.
         """
-        with self.session as s:
-            user_instance = (s.query(User)
-                             .filter(User.email == user.email)
-                             .first())
-            if user_instance is None:
-                hashed_password = AuthHandler.get_password_hash(user.password)
-                new_user = User(name=user.name,  # type: ignore
-                                password=hashed_password,
-                                email=user.email,
-                                is_active=True,
-                                is_stuff=False)
-                s.add(new_user)
-                s.commit()
-                return JSONResponse(status_code=status.HTTP_201_CREATED,
-                                    content={'message': 'User created successfully'})
-            raise HTTPException(status_code=status.HTTP_409_CONFLICT,
-                                detail='User already exists!')
+        user_instance = await self.session.scalar(
+            select(User).where(User.email == user.email).limit(1)
+        )
+        if user_instance is None:
+            hashed_password = await password_hasher.hash(user.password)
+            new_user = User(name=user.name,  # type: ignore
+                            password=hashed_password,
+                            email=user.email,
+                            is_active=True,
+                            is_stuff=False)
+            self.session.add(new_user)
+            await self.session.commit()
+            return JSONResponse(status_code=status.HTTP_201_CREATED,
+                                content={'message': 'User created successfully'})
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                            detail='User already exists!')
 
     async def authenticate_user(self, user: UserLogin) -> JSONResponse:
         """
@@ -72,28 +82,52 @@ class UserAuthenticate:
          if authentication is successful.
         :raises HTTPException: If the credentials are invalid.
         """
-        with self.session as s:
-            user_instance = (s.query(User)
-                             .filter(User.name == user.name)
-                             .first())
-            if user_instance is None or not AuthHandler.verify_password(
-                    user.password,
-                    user_instance.password):
-                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
-                                    detail='Invalid credentials')
-            access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-            access_token = AuthHandler.create_access_token(
-                data={'sub': user.name}, expires_delta=access_token_expires
-            )
-            response = JSONResponse(status_code=status.HTTP_200_OK,
-                                    content={'message': 'cookie sended'})
-            response.set_cookie(key='auth_token',
-                                value=access_token,
-                                expires=259200,
-                                httponly=True,
-                                domain=settings.host,
-                                )
-            return response
+        user_instance = await self.session.scalar(
+            select(User).where(User.name == user.name).limit(1)
+        )
+        if user_instance is None or not await password_hasher.verify(
+                user.password,
+                user_instance.password):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
+                                detail='Invalid credentials')
+        access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        access_token = AuthHandler.create_access_token(
+            data={'sub': user.name}, expires_delta=access_token_expires
+        )
+        response = JSONResponse(status_code=status.HTTP_200_OK,
+                                content={'message': 'cookie sended'})
+        response.set_cookie(key='auth_token',
+                            value=access_token,
+                            expires=259200,
+                            httponly=True,
+                            domain=settings.host,
+                            )
+        return response
+
+    async def import_users(self, request: Request) -> BulkImportReport:
+        """
+        Registers users streamed in the request body.
+
+        Only staff users may import users. The body is read as CSV with
+        a header line if its content type is `text/csv`, and as JSON
+        lines otherwise.
+
+        :param request: Request: The HTTP request with the users.
+        :return: BulkImportReport: The counters and the throughput
+         of the import.
+        :raises HTTPException: If the requesting user is not staff.
+        """
+        payload = AuthHandler.verify_token(request.cookies.get('auth_token', ''))
+        is_stuff = await self.session.scalar(
+            select(User.is_stuff).where(User.name == payload['sub']).limit(1)
+        )
+        if not is_stuff:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                                detail='Only staff users can import users')
+        content_type = request.headers.get('content-type', '')
+        file_format = 'csv' if content_type.startswith('text/csv') else 'jsonl'
+        users = parse_users(iter_lines(request.stream()), file_format)
+        return await BulkImporter(self.session).run(users)
 
     @staticmethod
     async def check_user_authorizing(request: Request) -> JSONResponse:
@@ -106,7 +140,7 @@ class UserAuthenticate:
         :return: JSONResponse: A JSON response indicating whether
          the user is authenticated.
         """
-        return AuthHandler.check_auth(request)
+        return await AuthHandler.check_auth(request)
 
     @staticmethod
     async def logout_user(request: Request) -> JSONResponse:
@@ -117,4 +151,4 @@ class UserAuthenticate:
         :param request: Request: The HTTP request to process the logout.
         :return: JSONResponse: A JSON response confirming logout success.
         """
-        return AuthHandler.logout_user(request)
+        return await AuthHandler.logout_user(request)
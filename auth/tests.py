@@ -1,10 +1,22 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """Contains tests for `parse` module checking."""
+import time
+from typing import Any, AsyncIterator
+
 import pytest
+from sqlalchemy import select
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
 
 from conftest import TestAuthSetup
+from db_utils import session_manager
+from .bulk_import import BulkImporter, iter_lines, parse_users
+from .hashing import PasswordHasher
+from .models import User
+from .revocation import BloomFilter, RevocationList
+from .token_cache import TokenCache
+from .user_status import UserStatusCache, user_status_cache
 
 
 @pytest.mark.usefixtures('client', 'get_db')
@@ -97,6 +109,23 @@ class TestAuth(TestAuthSetup):
         response = client.post('/api/v1/check_user')
         assert response.status_code == 200
 
+    def test_import_users_not_staff(self, client: TestClient) -> None:
+        """
+        Test case for rejecting the bulk import by a non-staff user.
+
+        Sends a POST request to the /api/v1/users/import endpoint with
+        the token of a registered, non-staff user. Asserts that the
+        response status code is 403 and no user is created.
+        """
+        client.cookies.set('auth_token', self.cookie)
+        response = client.post(
+            '/api/v1/users/import',
+            content=b'{"name": "intruder", "email": "intruder@test.com", "password": "p"}'
+        )
+        assert response.status_code == 403
+        response = client.post('/api/v1/login', json={'name': 'intruder', 'password': 'p'})
+        assert response.status_code == 401
+
     def test_check_user_error_creds(self, client: TestClient) -> None:
         """
         Test case for handling an invalid authentication token.
@@ -125,6 +154,18 @@ class TestAuth(TestAuthSetup):
         response = client.post('/api/v1/logout')
         assert response.status_code == 200
 
+    def test_check_user_revoked(self, client: TestClient) -> None:
+        """
+        Test case for rejecting a token after logout.
+
+        Sends a POST request to the /api/v1/check_user endpoint with
+        the token of the logged out user. Asserts that the response
+        status code is 401, as the token is revoked.
+        """
+        client.cookies.set('auth_token', self.cookie)
+        response = client.post('/api/v1/check_user')
+        assert response.status_code == 401
+
     def test_logout_user_incorrect(self, client: TestClient) -> None:
         """
         Test case for handling an invalid logout request.
@@ -137,3 +178,229 @@ class TestAuth(TestAuthSetup):
         client.cookies.set('auth_token', 'revoked')
         response = client.post('/api/v1/logout')
         assert response.status_code == 204
+
+
+@pytest.mark.asyncio
+class TestPasswordHasher:
+    """Test cases for password hashing off the event loop."""
+
+    async def test_hash_and_verify(self) -> None:
+        """
+        Test case for verifying a password against its hash.
+
+        Hashes a password on the pool and asserts that only the same
+        password is verified.
+        """
+        hasher = PasswordHasher(workers=2, queue_size=2)
+        hashed = await hasher.hash('test_password')
+        assert await hasher.verify('test_password', hashed)
+        assert not await hasher.verify('test_pass', hashed)
+        assert hasher.pending == 0
+        hasher.shutdown()
+
+    async def test_rejects_when_saturated(self) -> None:
+        """
+        Test case for the admission control of the pool.
+
+        Asserts that a call over the limit of pending calls is
+        rejected with the 503 status code.
+        """
+        hasher = PasswordHasher(workers=1, queue_size=0)
+        hasher._pending = hasher.max_pending  # pylint: disable=W0212
+        with pytest.raises(HTTPException) as exc_info:
+            await hasher.hash('test_password')
+        assert exc_info.value.status_code == 503
+        hasher.shutdown()
+
+
+class TestTokenCache:
+    """Test cases for the cache of verified tokens."""
+
+    payload: dict[str, Any] = {'sub': 'test_user', 'exp': int(time.time()) + 3600}
+
+    def test_hit_and_miss(self) -> None:
+        """
+        Test case for counting lookups of cached and unknown tokens.
+
+        Asserts that a token is returned only after it is cached and
+        that both lookups are counted.
+        """
+        cache = TokenCache(max_size=2, ttl=60)
+        assert cache.get('token') is None
+        cache.set('token', self.payload)
+        assert cache.get('token') == self.payload
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert cache.hit_rate == 0.5
+
+    def test_expires_with_token(self) -> None:
+        """
+        Test case for capping the entry lifetime at the token `exp`.
+
+        Asserts that an expired token is not returned even though the
+        cache TTL has not passed.
+        """
+        cache = TokenCache(max_size=2, ttl=60)
+        cache.set('token', {'sub': 'test_user', 'exp': int(time.time()) - 1})
+        assert cache.get('token') is None
+        assert len(cache) == 0
+
+    def test_evicts_least_recently_used(self) -> None:
+        """
+        Test case for the bounded size of the cache.
+
+        Asserts that the least recently used token is evicted first.
+        """
+        cache = TokenCache(max_size=2, ttl=60)
+        cache.set('first', self.payload)
+        cache.set('second', self.payload)
+        cache.get('first')
+        cache.set('third', self.payload)
+        assert cache.get('second') is None
+        assert cache.get('first') is not None
+        assert cache.get('third') is not None
+
+    def test_invalidate(self) -> None:
+        """
+        Test case for removing a token on logout.
+
+        Asserts that an invalidated token is not returned.
+        """
+        cache = TokenCache(max_size=2, ttl=60)
+        cache.set('token', self.payload)
+        cache.invalidate('token')
+        assert cache.get('token') is None
+
+
+# pylint: disable=R0903
+class TestBloomFilter:
+    """Test cases for the filter of revoked token ids."""
+
+    def test_contains_added(self) -> None:
+        """
+        Test case for looking up added and unknown strings.
+
+        Asserts that added strings are always found and that unknown
+        strings are not found in a sparse filter.
+        """
+        bloom = BloomFilter(size=1 << 16, hashes=5)
+        added = [f'jti-{i}' for i in range(100)]
+        for item in added:
+            bloom.add(item)
+        assert all(item in bloom for item in added)
+        assert not any(f'other-{i}' in bloom for i in range(100))
+
+
+# pylint: disable=R0903
+@pytest.mark.asyncio
+class TestRevocationList:
+    """Test cases for the revocation list without a Redis server."""
+
+    async def test_revoke_without_redis(self) -> None:
+        """
+        Test case for revoking a token while Redis is unavailable.
+
+        Asserts that the revoked id is kept locally and rejected, while
+        other ids are accepted without asking Redis.
+        """
+        revocation = RevocationList()
+        await revocation.revoke('revoked', int(time.time()) + 60)
+        assert await revocation.is_revoked('revoked')
+        assert not await revocation.is_revoked('not_revoked')
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures('get_db')
+class TestUserStatusCache(TestAuthSetup):
+    """Test cases for the cache of user statuses."""
+
+    async def test_caches_and_invalidates(self) -> None:
+        """
+        Test case for caching a status until the user is changed.
+
+        Asserts that the second lookup is answered from the cache and
+        that deactivating the user evicts the cached status.
+        """
+        cache = user_status_cache
+        misses = cache.misses
+        with session_manager.session_local() as session:
+            session.add(User(name='status_user', password='hash',  # type: ignore
+                             email='status@test.com', is_active=True, is_stuff=False))
+            session.commit()
+            assert await cache.is_active('status_user')
+            assert await cache.is_active('status_user')
+            assert cache.misses == misses + 1
+            assert cache.hit_rate > 0
+
+            user = session.scalars(select(User).where(User.name == 'status_user')).one()
+            user.is_active = False
+            session.commit()
+        assert not await cache.is_active('status_user')
+        assert cache.misses == misses + 2
+
+    async def test_missing_user(self) -> None:
+        """
+        Test case for a token of a deleted user.
+
+        Asserts that a user missing in the database is not active.
+        """
+        cache = UserStatusCache(max_size=8, ttl=60, use_redis=False)
+        assert not await cache.is_active('missing_user')
+
+
+async def stream(*chunks: bytes) -> AsyncIterator[bytes]:
+    """
+    Yields chunks of a request body.
+
+    :param chunks: bytes: The chunks.
+    :return: AsyncIterator[bytes]: The chunks.
+    """
+    for chunk in chunks:
+        yield chunk
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures('get_db')
+class TestBulkImport(TestAuthSetup):
+    """Test cases for the bulk import of users."""
+
+    async def test_import_jsonl(self) -> None:
+        """
+        Test case for importing users from JSON lines split across
+        chunks of the body.
+
+        Asserts that new users are created, while duplicates within
+        the stream and against existing users are skipped and malformed
+        lines are counted.
+        """
+        body = (b'{"name": "bulk_1", "email": "bulk_1@test.com", "password": "p1"}\n'
+                b'{"name": "bulk_2", "email": "bulk_1@test.com", "password": "p2"}\n'
+                b'not json\n'
+                b'{"name": "bulk_3", "email": "bulk_3@test.com", "password": "p3"}')
+        async with session_manager.async_session_local() as session:
+            importer = BulkImporter(session, chunk_size=2, hasher=PasswordHasher(workers=2))
+            users = parse_users(iter_lines(stream(body[:50], body[50:])))
+            report = await importer.run(users)
+            assert (report.received, report.created) == (4, 2)
+            assert (report.duplicates, report.invalid) == (1, 1)
+
+            users = parse_users(iter_lines(stream(body)))
+            report = await importer.run(users)
+            assert (report.created, report.duplicates) == (0, 3)
+            importer.hasher.shutdown()
+
+    async def test_import_csv(self) -> None:
+        """
+        Test case for importing users from CSV with a header.
+
+        Asserts that the stored password of an imported user is
+        verified.
+        """
+        body = b'email,name,password\ncsv_1@test.com,csv_1,secret\ncsv_2@test.com,csv_2\n'
+        async with session_manager.async_session_local() as session:
+            importer = BulkImporter(session, hasher=PasswordHasher(workers=1))
+            report = await importer.run(parse_users(iter_lines(stream(body)), 'csv'))
+            assert (report.received, report.created, report.invalid) == (2, 1, 1)
+            hashed = await session.scalar(select(User.password).where(User.name == 'csv_1'))
+            assert hashed is not None
+            assert await importer.hasher.verify('secret', hashed)
+            importer.hasher.shutdown()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Contains the cache of verified JWT tokens."""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+from settings import settings
+
+
+class TokenCache:
+    """
+    Keeps payloads of verified tokens to skip decoding them again.
+
+    A bounded LRU mapping of the SHA-256 digest of a token to its
+    payload, so raw tokens are not kept in memory. An entry lives
+    `ttl` seconds but never past the `exp` claim of its token, so an
+    expired token is always verified again and rejected.
+    """
+
+    def __init__(self, max_size: int = settings.token_cache_size,
+                 ttl: int = settings.token_cache_ttl) -> None:
+        """
+        Initializes the TokenCache with its limits.
+
+        :param max_size: int: The maximal amount of cached tokens.
+        :param ttl: int: The maximal lifetime of an entry in seconds.
+        """
+        self.max_size: int = max_size
+        self.ttl: int = ttl
+        self.hits: int = 0
+        self.misses: int = 0
+        self._entries: OrderedDict[bytes, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(token: str) -> bytes:
+        """
+        Creates the cache key of a token.
+
+        :param token: str: The JWT token.
+        :return: bytes: The SHA-256 digest of the token.
+        """
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> dict[str, Any] | None:
+        """
+        Returns the payload of a verified token if it is cached.
+
+        :param token: str: The JWT token.
+        :return: dict[str, Any] | None: The payload, None if the token
+         is not cached or its entry expired.
+        """
+        key = self.key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, token: str, payload: dict[str, Any]) -> None:
+        """
+        Caches the payload of a verified token.
+
+        :param token: str: The JWT token.
+        :param payload: dict[str, Any]: The verified payload.
+        :return: None
+        """
+        expires_at = time.time() + self.ttl
+        if 'exp' in payload:
+            expires_at = min(expires_at, float(payload['exp']))
+        key = self.key(token)
+        with self._lock:
+            self._entries[key] = (expires_at, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, token: str) -> None:
+        """
+        Removes a token from the cache.
+
+        :param token: str: The JWT token.
+        :return: None
+        """
+        with self._lock:
+            self._entries.pop(self.key(token), None)
+
+    def clear(self) -> None:
+        """
+        Removes all tokens and resets the counters.
+
+        :return: None
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        The share of lookups answered from the cache.
+
+        :return: float: The hit rate from 0 to 1.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+token_cache = TokenCache()
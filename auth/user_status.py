@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Contains the cache of user statuses checked on authorization."""
+import logging
+import time
+from collections import OrderedDict
+from typing import Any
+
+import asyncio
+from redis.exceptions import RedisError
+from sqlalchemy import event, select
+from sqlalchemy.orm import Mapper, Session, object_session
+from sqlalchemy.orm.attributes import get_history
+
+import db_utils
+from redis_client import redis
+from settings import settings
+from .models import User
+
+logger = logging.getLogger(__name__)
+
+
+# pylint: disable=R0902
+class UserStatusCache:
+    """
+    Answers whether the user of a token exists and is active.
+
+    Statuses are looked up in an in-process LRU, then, if `use_redis`
+    is set, in Redis shared by the workers, and only then in the
+    database. Missing users are cached as inactive too.
+
+    Committed inserts, updates and deletes of users made through the
+    ORM evict their statuses from the LRU of the committing worker and
+    from Redis. Other workers see the change when their LRU entry
+    expires after `ttl` seconds.
+    """
+
+    key_prefix = 'user_status:'
+
+    def __init__(self, max_size: int = settings.user_status_cache_size,
+                 ttl: int = settings.user_status_ttl,
+                 use_redis: bool = settings.user_status_redis) -> None:
+        """
+        Initializes the UserStatusCache with its limits.
+
+        :param max_size: int: The maximal amount of cached statuses.
+        :param ttl: int: The lifetime of an in-process entry in seconds.
+        :param use_redis: bool: Whether to share statuses in Redis.
+        """
+        self.client = redis
+        self.max_size: int = max_size
+        self.ttl: int = ttl
+        self.redis_ttl: int = settings.user_status_redis_ttl
+        self.use_redis: bool = use_redis
+        self.hits: int = 0
+        self.redis_hits: int = 0
+        self.misses: int = 0
+        self._entries: OrderedDict[str, tuple[float, bool]] = OrderedDict()
+
+    async def is_active(self, name: str) -> bool:
+        """
+        Checks if a user exists and is active.
+
+        :param name: str: The name of the user, the `sub` claim.
+        :return: bool: True if the user exists and is active.
+        """
+        entry = self._entries.get(name)
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end(name)
+            self.hits += 1
+            return entry[1]
+        active = await self._get_shared(name)
+        if active is None:
+            self.misses += 1
+            active = await self._load(name)
+            await self._set_shared(name, active)
+        else:
+            self.redis_hits += 1
+        self._remember(name, active)
+        return active
+
+    def invalidate(self, name: str) -> None:
+        """
+        Evicts the status of a user from the LRU and schedules its
+        eviction from Redis.
+
+        Redis is only cleaned when an event loop is running, otherwise
+        the shared entry expires after `redis_ttl` seconds.
+
+        :param name: str: The name of the user.
+        :return: None
+        """
+        self._entries.pop(name, None)
+        if not self.use_redis:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        loop.create_task(self._delete_shared(name))
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        The share of lookups answered without the database.
+
+        :return: float: The hit rate from 0 to 1.
+        """
+        lookups = self.hits + self.redis_hits + self.misses
+        return (self.hits + self.redis_hits) / lookups if lookups else 0.0
+
+    def _remember(self, name: str, active: bool) -> None:
+        """
+        Puts a status into the LRU, evicting the least recently used.
+
+        :param name: str: The name of the user.
+        :param active: bool: The status of the user.
+        :return: None
+        """
+        self._entries[name] = (time.monotonic() + self.ttl, active)
+        self._entries.move_to_end(name)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    @staticmethod
+    async def _load(name: str) -> bool:
+        """
+        Reads the status of a user from the database.
+
+        :param name: str: The name of the user.
+        :return: bool: True if the user exists and is active.
+        """
+        async with db_utils.session_manager.async_session_local() as session:
+            active = await session.scalar(select(User.is_active).where(User.name == name))
+        return bool(active)
+
+    async def _get_shared(self, name: str) -> bool | None:
+        """
+        Reads the status of a user from Redis.
+
+        :param name: str: The name of the user.
+        :return: bool | None: The status, None if it is not shared or
+         Redis is unavailable.
+        """
+        if not self.use_redis:
+            return None
+        try:
+            value = await self.client.get(self.key_prefix + name)
+        except RedisError as exc:
+            logger.warning('User status of %s is not read from Redis: %s', name, exc)
+            return None
+        return None if value is None else value == b'1'
+
+    async def _set_shared(self, name: str, active: bool) -> None:
+        """
+        Shares the status of a user in Redis.
+
+        :param name: str: The name of the user.
+        :param active: bool: The status of the user.
+        :return: None
+        """
+        if not self.use_redis:
+            return
+        try:
+            await self.client.set(self.key_prefix + name, int(active), ex=self.redis_ttl)
+        except RedisError as exc:
+            logger.warning('User status of %s is not shared in Redis: %s', name, exc)
+
+    async def _delete_shared(self, name: str) -> None:
+        """
+        Removes the status of a user from Redis.
+
+        :param name: str: The name of the user.
+        :return: None
+        """
+        try:
+            await self.client.delete(self.key_prefix + name)
+        except RedisError as exc:
+            logger.warning('User status of %s is not removed from Redis: %s', name, exc)
+
+
+user_status_cache = UserStatusCache()
+
+
+@event.listens_for(User, 'after_insert')
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _collect_changed_user(_mapper: Mapper[Any], _connection: Any, target: User) -> None:
+    """
+    Remembers the names of flushed users in their session.
+
+    A renamed user is remembered with both names.
+
+    :param target: User: The flushed user.
+    :return: None
+    """
+    session = object_session(target)
+    if session is None:
+        return
+    names: set[str] = session.info.setdefault('changed_users', set())
+    names.add(target.name)
+    names.update(get_history(target, 'name').deleted or ())
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_changed_users(session: Session) -> None:
+    """
+    Evicts the statuses of users changed in a committed transaction.
+
+    :param session: Session: The committed session.
+    :return: None
+    """
+    for name in session.info.pop('changed_users', ()):
+        user_status_cache.invalidate(name)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_changed_users(session: Session) -> None:
+    """
+    Drops the names of users changed in a rolled back transaction.
+
+    :param session: Session: The rolled back session.
+    :return: None
+    """
+    session.info.pop('changed_users', None)
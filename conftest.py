@@ -5,14 +5,16 @@ import os
 from typing import AsyncGenerator, Generator
 
 import pytest
-from pytest import FixtureRequest
+from fakeredis import FakeAsyncRedis
+from pytest import FixtureRequest, MonkeyPatch
 from playwright.async_api import async_playwright, Browser, BrowserContext
-from sqlalchemy import Connection
+from sqlalchemy import Engine
 from fastapi.testclient import TestClient
 
 from main import app
 from db_utils import session_manager
 from auth.models import Base
+from web_parser import caching, events, jobs
 
 
 class TestAuthSetup:
@@ -32,13 +34,10 @@ class TestAuthSetup:
         """
         if not os.getenv('TESTING', ''):
             raise ValueError('"TESTING" env variable was not found.')
-        engine: Connection = session_manager.engine
+        engine: Engine = session_manager.engine
         Base.metadata.create_all(bind=engine)
-        engine.commit()
         yield
         Base.metadata.drop_all(bind=engine)
-        engine.commit()
-        engine.close()
 
     @pytest.fixture
     def client(self) -> Generator[TestClient, None, None]:
@@ -53,6 +52,34 @@ class TestAuthSetup:
             yield client
 
 
+# pylint: disable=R0903
+class TestRedisSetup:
+    """
+    Fixtures replacing the Redis client of scraping jobs and the cache
+    with an in-memory one.
+    """
+
+    @pytest.fixture
+    def fake_redis(self, monkeypatch: MonkeyPatch) -> FakeAsyncRedis:
+        """
+        Provide an empty in-memory Redis used by jobs and the cache.
+
+        The client is patched into the modules which create their
+        clients on use, and into the shared job manager.
+
+        :param monkeypatch: MonkeyPatch: The patcher undoing the changes
+         after the test.
+        :return: FakeAsyncRedis: The in-memory Redis client.
+        """
+        client = FakeAsyncRedis()
+        for module in (caching, events, jobs):
+            monkeypatch.setattr(module, 'redis', client)
+        monkeypatch.setattr(jobs.job_manager, 'client', client)
+        for attribute in ('_index', '_refresh_task', '_create_task'):
+            monkeypatch.setattr(caching.CacheManager, attribute, None)
+        return client
+
+
 class TestPlaywrightSetup:
     """
     Class grouping test setups related to Playwright functionality.
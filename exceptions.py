@@ -27,3 +27,31 @@ class TagNotFindError(Exception):
         :return: str: A formatted string including the class name and message.
         """
         return f'Was caught {self.__class__.__name__}! {self.message}'
+
+
+class JobFailedError(Exception):
+    """
+    Exception raised when an awaited scraping job fails or expires.
+
+    This custom exception is used to signal that the offers of a job
+    will never be available, so the waiting request can't be served.
+    """
+
+    def __init__(self, job_id: str, reason: str) -> None:
+        """
+        Initializes the JobFailedError with the job and the reason.
+
+        :param job_id: str: The id of the failed job.
+        :param reason: str: The description of the failure.
+        """
+        super().__init__(reason)
+        self.job_id: str = job_id
+        self.reason: str = reason
+
+    def __str__(self) -> str:
+        """
+        Returns a string representation of the JobFailedError.
+
+        :return: str: A formatted string including the job and reason.
+        """
+        return f'Scraping job {self.job_id} failed: {self.reason}'
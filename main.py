@@ -1,14 +1,33 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """The `main` module of app, the entrypoint."""
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from auth.endpoints import router as auth_router
+from auth.revocation import revocation_list
+from db_utils import session_manager
 from web_parser.endpoints import router as parser_router
 
 
-app: FastAPI = FastAPI()
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    """
+    Start shared resources on app startup and release them on shutdown.
+
+    Browsers are not started here: scraping runs in the workers
+    started by `worker.py`.
+    """
+    await revocation_list.start()
+    yield
+    await revocation_list.stop()
+    await session_manager.async_engine.dispose()
+
+
+app: FastAPI = FastAPI(lifespan=lifespan)
 app.include_router(auth_router)
 app.include_router(parser_router)
 
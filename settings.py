@@ -13,6 +13,51 @@ class Settings(BaseSettings):
     jwt_secret_key: str = 'default'
     redis_cache: str = 'default'
     host: str = 'default'
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_pre_ping: bool = True
+    db_pool_recycle: int = 1800
+    browser_pool_size: int = 2
+    browser_max_navigations: int = 200
+    parser_concurrency: int = 8
+    parser_host_rate: float = 4.0
+    parser_run_timeout: float = 600.0
+    html_parser: str = 'lxml'
+    cache_soft_ttl: int = 3600
+    cache_hard_ttl: int = 86400
+    cache_poll_interval: float = 0.5
+    cache_compression: str = 'zlib'
+    cache_compression_level: int = 6
+    bcrypt_rounds: int = 12
+    password_hash_workers: int = 4
+    password_hash_queue: int = 32
+    token_cache_size: int = 4096
+    token_cache_ttl: int = 300
+    revocation_bloom_size: int = 1 << 20
+    revocation_bloom_hashes: int = 7
+    revocation_rebuild_interval: float = 3600.0
+    user_status_cache_size: int = 10000
+    user_status_ttl: int = 30
+    user_status_redis: bool = False
+    user_status_redis_ttl: int = 300
+    bulk_import_chunk_size: int = 500
+    offers_upsert_batch_size: int = 500
+    description_ttl: int = 604800
+    crawl_concurrency: int = 4
+    crawl_max_pages: int = 20
+    job_ttl: int = 86400
+    job_progress_interval: float = 1.0
+    job_heartbeat_timeout: float = 10.0
+    job_queue_timeout: int = 5
+    job_wait_timeout: float = 60.0
+    job_stream_timeout: float = 900.0
+    job_events_maxlen: int = 10000
+    job_events_block: float = 5.0
+    scrape_workers: int = 2
+    extraction_processes: int = 2
+    offers_page_size: int = 20
+    offers_page_max: int = 100
+    offers_currency: str = 'RUR'
 
     class ConfigDict:
         """Represent rows of variables from .env file."""
@@ -1,7 +1,11 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """Initialization adding a pre-root path to system's paths."""
+from .offers import Offer
 from .soups import BaseSoup, HHSoup
 from .parsers import BaseParser, HHParser, HH_URL
+from .browser_pool import BrowserPool, browser_pool
+from .extraction import Extractor, extractor
 
-__all__ = ['BaseSoup', 'HHSoup', 'BaseParser', 'HHParser', 'HH_URL']
+__all__ = ['BaseSoup', 'HHSoup', 'BaseParser', 'HHParser', 'HH_URL',
+           'BrowserPool', 'browser_pool', 'Extractor', 'extractor', 'Offer']
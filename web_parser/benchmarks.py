@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Microbenchmarks of `HHSoup` extraction on the saved search results page.
+
+Run as `python -m web_parser.benchmarks [cards amount]`.
+"""
+import os
+import re
+import sys
+import timeit
+
+from bs4 import Tag
+
+from settings import settings
+from .offers import Offer
+from .soups import HHSoup, resolve_parser_type
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+RESULTS_ATTRS = {'data-qa': 'vacancy-serp__results'}
+
+
+class LegacyHHSoup(HHSoup):
+    """`HHSoup` with the cards lookup before the precompiled plan."""
+
+    def _find_card_tags(self, offer: Tag) -> tuple[Tag | None, Tag | None, Tag | None]:
+        """
+        Finds the card tags with separate `find` calls compiling
+        the patterns on every card.
+        """
+        header = offer.find('h2')
+        data = offer.find('div', class_=re.compile('compensation-labels--'))
+        company = offer.find('span', class_=re.compile('company-info-text--'))
+        if company is None:
+            company = offer.find('a', attrs={'data-qa': re.compile('vacancy-serp_')})
+        return header, data, company  # type: ignore
+
+
+def build_serp(cards_amount: int) -> str:
+    """
+    Builds a search results page with the given amount of cards by
+    repeating the cards of the saved page.
+
+    :param cards_amount: int: The amount of offer cards on the page.
+    :return: str: The HTML content of the page.
+    """
+    with open(os.path.join(FIXTURES_DIR, 'hh_serp.html'), 'r', encoding='utf-8') as file:
+        lines = file.read().split('\n')
+    cards = [line for line in lines if 'vacancy-card--' in line]
+    start = lines.index(cards[0])
+    repeated = [cards[i % len(cards)] for i in range(cards_amount)]
+    return '\n'.join(lines[:start] + repeated + lines[start + len(cards):])
+
+
+def time_extraction(soup_class: type[HHSoup], content: str, parser_type: str,
+                    number: int) -> tuple[float, list[Offer]]:
+    """
+    Measures the best time of `split_parse_content` over prepared cards.
+
+    :param soup_class: type[HHSoup]: The measured soup class.
+    :param content: str: The search results page.
+    :param parser_type: str: The tree builder to parse the page with.
+    :param number: int: The amount of runs per measure.
+    :return: tuple[float, list[Offer]]: Seconds per run and
+     the offers parsed by the class.
+    """
+    soup_instance = soup_class(content, parser_type)
+    tag = soup_instance.get_tag('div', attrs=RESULTS_ATTRS)
+    assert isinstance(tag, Tag)
+    soup_instance.offers_list = tag.find_all('div', attrs={'class': HHSoup.card_class})
+
+    def run() -> None:
+        soup_instance.parsed_offers = []
+        soup_instance.offers_links = []
+        soup_instance.split_parse_content()
+
+    best = min(timeit.repeat(run, number=number, repeat=5)) / number
+    assert soup_instance.parsed_offers is not None
+    return best, soup_instance.parsed_offers
+
+
+def main(cards_amount: int = 80, number: int = 20) -> None:
+    """
+    Compares the legacy and the current cards extraction.
+
+    :param cards_amount: int: The amount of offer cards on the page.
+    :param number: int: The amount of runs per measure.
+    :raises AssertionError: If the implementations disagree.
+    """
+    parser_type = resolve_parser_type(settings.html_parser)
+    content = build_serp(cards_amount)
+    legacy, legacy_offers = time_extraction(LegacyHHSoup, content, parser_type, number)
+    current, offers = time_extraction(HHSoup, content, parser_type, number)
+    assert offers == legacy_offers, 'Extraction results differ'
+    print(f'split_parse_content, {cards_amount} cards, {parser_type}')
+    print(f'  legacy:  {legacy * 1000:8.3f} ms')
+    print(f'  current: {current * 1000:8.3f} ms ({legacy / current:.2f}x)')
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:2]))
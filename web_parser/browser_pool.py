@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Contains the process-wide pool of long-lived Chromium browsers."""
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable
+
+import asyncio
+from playwright.async_api import (
+    async_playwright,
+    Browser,
+    BrowserContext,
+    Frame,
+    Page,
+    Playwright,
+    Error as PWError
+)
+
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PooledBrowser:
+    """
+    A Chromium browser owned by `BrowserPool` with its usage counter.
+
+    Counts main frame navigations of every page opened in contexts
+    of the browser, so the pool knows when to recycle it.
+    """
+
+    def __init__(self, browser: Browser) -> None:
+        """
+        Initializes the PooledBrowser with a launched browser.
+
+        :param browser: Browser: The launched Playwright browser.
+        """
+        self.browser: Browser = browser
+        self.navigations: int = 0
+
+    @property
+    def is_healthy(self) -> bool:
+        """
+        Checks whether the browser process is still connected.
+
+        :return: bool: True if the browser can be used, False otherwise.
+        """
+        return self.browser.is_connected()
+
+    def watch_page(self, page: Page) -> None:
+        """
+        Subscribes to navigations of a page opened in the browser.
+
+        :param page: Page: The page created in a borrowed context.
+        """
+        page.on('framenavigated', self._count_navigation)
+
+    def _count_navigation(self, frame: Frame) -> None:
+        if frame.parent_frame is None:
+            self.navigations += 1
+
+
+class BrowserPool:
+    """
+    Pool of long-lived Chromium browsers shared by all parsers.
+
+    The Playwright driver is started once (usually in the application
+    lifespan), browsers are launched lazily up to `size` and reused
+    between parsing runs. Parsers borrow a fresh context on one of the
+    browsers and return it when done. A browser is replaced when its
+    process dies or after `max_navigations` page navigations.
+    """
+
+    def __init__(self, size: int = settings.browser_pool_size,
+                 max_navigations: int = settings.browser_max_navigations) -> None:
+        """
+        Initializes the BrowserPool with its limits.
+
+        :param size: int: The maximum amount of simultaneously
+         borrowed browsers.
+        :param max_navigations: int: The amount of navigations after
+         which a browser is closed and launched anew.
+        """
+        self.size: int = size
+        self.max_navigations: int = max_navigations
+        self._playwright: Playwright | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._idle: list[PooledBrowser] = []
+
+    @property
+    def is_started(self) -> bool:
+        """
+        Checks whether the Playwright driver of the pool is running.
+
+        :return: bool: True if the pool is started, False otherwise.
+        """
+        return self._playwright is not None
+
+    async def start(self) -> None:
+        """
+        Starts the Playwright driver. Does nothing if already started.
+
+        :return: None
+        """
+        if self._playwright is not None:
+            return
+        self._playwright = await async_playwright().start()
+        self._slots = asyncio.Semaphore(self.size)
+
+    async def stop(self) -> None:
+        """
+        Closes the idle browsers and stops the Playwright driver.
+
+        Browsers borrowed at the moment are closed on their return.
+
+        :return: None
+        """
+        if self._playwright is None:
+            return
+        while self._idle:
+            await self._close(self._idle.pop())
+        await self._playwright.stop()
+        self._playwright = None
+        self._slots = None
+
+    @asynccontextmanager
+    async def context(self, factory: Callable[[Browser], Awaitable[BrowserContext]]
+                      ) -> AsyncIterator[BrowserContext]:
+        """
+        Borrows a browser from the pool and yields a new context on it.
+
+        Starts the pool if it is not started yet and waits while all
+        `size` browsers are borrowed. The context is closed and
+        the browser is returned to the pool on exit.
+
+        :param factory: Callable: Coroutine function creating a context
+         on the borrowed browser.
+        :return: AsyncIterator[BrowserContext]: The created context.
+        """
+        await self.start()
+        slots = self._slots
+        assert slots is not None
+        async with slots:
+            pooled = await self._checkout()
+            try:
+                context = await factory(pooled.browser)
+                context.on('page', pooled.watch_page)
+                try:
+                    yield context
+                finally:
+                    try:
+                        await context.close()
+                    except PWError as e:
+                        logger.warning('Failed to close browser context: %s', e)
+            finally:
+                await self._checkin(pooled)
+
+    async def _checkout(self) -> PooledBrowser:
+        while self._idle:
+            pooled = self._idle.pop()
+            if pooled.is_healthy:
+                return pooled
+            logger.warning('Pooled browser was disconnected, launching a new one')
+            await self._close(pooled)
+        assert self._playwright is not None
+        browser = await self._playwright.chromium.launch()
+        return PooledBrowser(browser)
+
+    async def _checkin(self, pooled: PooledBrowser) -> None:
+        if self._playwright is None:
+            await self._close(pooled)
+        elif not pooled.is_healthy or pooled.navigations >= self.max_navigations:
+            logger.info('Recycling pooled browser after %s navigations', pooled.navigations)
+            await self._close(pooled)
+        else:
+            self._idle.append(pooled)
+
+    @staticmethod
+    async def _close(pooled: PooledBrowser) -> None:
+        try:
+            await pooled.browser.close()
+        except PWError as e:
+            logger.warning('Failed to close pooled browser: %s', e)
+
+
+browser_pool = BrowserPool()
@@ -1,53 +1,382 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """Contains cache manager class."""
-import json
+import logging
+import uuid
+from typing import AsyncIterator
 
+import asyncio
+import orjson
 from fastapi import status
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response
+from redis.asyncio.lock import Lock
+from redis.exceptions import LockError
 
 from redis_client import redis
-from .main import hh_parser
+from settings import settings
+from .async_iterables import AsyncList
+from .events import format_event
+from .indexing import OfferIndex
+from .jobs import job_manager
+from .payloads import PayloadCodec
+from .schemas import JobRequest
+
+logger = logging.getLogger(__name__)
 
 
-# pylint: disable=R0903
 class CacheManager:
     """
     Manages caching of parsed offers using Redis.
 
     Provides methods to retrieve cached data from Redis or create new
     cache entries if they do not already exist.
+
+    Cached offers expire in two steps. After `soft_ttl` seconds they
+    become stale: they are still returned at once, while one background
+    task scrapes the fresh offers. After `hard_ttl` seconds they are
+    removed and the next request waits for the scraping.
+
+    Only one scraping runs at a time: requests missing the cache in
+    one process share one task, and across processes a Redis lock
+    lets one worker scrape while the others poll for its result.
+
+    Offers are stored as a `PayloadCodec` payload of their JSON and are
+    sent back without decoding and encoding them again.
+
+    The scraping itself is a `search` job run by a scraper worker,
+    the API process only queues it and waits for its result.
+
+    Offers may also be streamed one by one: cached offers at once, or
+    the offers and descriptions of a `parse` job as the worker parses
+    them. One `parse` job is streamed at a time: it is queued under the
+    same lock as the scraping, its id is kept in `stream_job_key` and
+    other streaming requests read the events of that job. A scraping
+    started while it runs waits for its result instead of queueing
+    another job. The result of the streamed job is cached as soon as
+    a request finds the job done, even if its stream was dropped.
+
+    Every write of the cache gets a new version, and each process keeps
+    an `OfferIndex` of the current version for queries of offers. The
+    writing process builds it at once, the others when a query finds
+    their index outdated.
     """
 
-    def __init__(self) -> None:
+    key = 'parsed_offers'
+    fresh_key = f'{key}:fresh'
+    version_key = f'{key}:version'
+    refresh_lock_key = f'{key}:refresh'
+    stream_job_key = f'{key}:stream_job'
+    _refresh_task: asyncio.Task[None] | None = None
+    _create_task: asyncio.Task[bytes] | None = None
+    _index: OfferIndex | None = None
+
+    def __init__(self, soft_ttl: int = settings.cache_soft_ttl,
+                 hard_ttl: int = settings.cache_hard_ttl,
+                 codec: PayloadCodec | None = None) -> None:
         """
         Initializes the CacheManager with a Redis client.
 
         Imports the Redis client from the `main` module.
+
+        :param soft_ttl: int: Seconds after which cached offers are
+         refreshed in background.
+        :param hard_ttl: int: Seconds after which cached offers
+         are removed.
+        :param codec: PayloadCodec | None: The codec of stored payloads.
         """
         self.client = redis
+        self.soft_ttl: int = soft_ttl
+        self.hard_ttl: int = hard_ttl
+        self.poll_interval: float = settings.cache_poll_interval
+        self.codec: PayloadCodec = codec or PayloadCodec()
 
-    async def get_or_create(self) -> JSONResponse:
+    async def get_or_create(self, accept_encoding: str = '') -> Response:
         """
         Retrieves cached parsed offers from Redis or creates a new cache
         entry.
 
         Checks if the cached parsed offers exist in Redis. If so, it
-        decodes the cached bytes, converts them to JSON, and returns
-        them in a JSONResponse. If the cache does not exist, it parses
-        new data, encodes it, stores it in Redis, and returns it in a
-        JSONResponse.
+        returns their JSON as is, starting a background refresh if they
+        are stale. If the cache does not exist, it parses new data,
+        encodes it, stores it in Redis, and returns it.
 
-        :return: JSONResponse: A JSON response containing the parsed
+        :param accept_encoding: str: The `Accept-Encoding` header of
+         the request. The compressed JSON is sent if the client accepts
+         the compression of the payload.
+        :return: Response: A JSON response containing the parsed
          offers, either from the cache or newly created.
         :raises Exception: If there is an error in parsing or
          encoding/decoding the data.
         """
-        if b_cache := await self.client.get('parsed_offers'):
-            cache = json.loads(b_cache.decode())
-            return JSONResponse(content=cache, status_code=status.HTTP_200_OK)
-        soup_instance = await hh_parser()
-        cache = soup_instance.parsed_offers
-        b_cache = json.dumps(cache).encode()
-        await self.client.set('parsed_offers', b_cache)
-        return JSONResponse(content=cache, status_code=status.HTTP_201_CREATED)
+        payload, fresh = await self.client.mget(self.key, self.fresh_key)
+        if payload:
+            if fresh is None:
+                self._schedule_refresh()
+            return self.codec.response(payload, status.HTTP_200_OK, accept_encoding)
+        payload = await self._create()
+        return self.codec.response(payload, status.HTTP_201_CREATED, accept_encoding)
+
+    async def refresh(self) -> bytes:
+        """
+        Scrapes the offers by a queued job and stores them in Redis
+        with both TTLs.
+
+        The streamed `parse` job is awaited instead if it is running.
+
+        :return: bytes: The stored payload.
+        :raises JobFailedError: If the scraping job fails.
+        :raises TimeoutError: If no worker finishes the job in time.
+        """
+        job_id = await self._running_stream_job()
+        if job_id is None:
+            job_id = await job_manager.submit(JobRequest(kind='search'))
+        payload = await job_manager.wait(job_id, self.poll_interval)
+        await self.store(payload)
+        return payload
+
+    async def store(self, payload: bytes) -> None:
+        """
+        Stores the payload of offers in Redis with both TTLs and a new
+        version, and indexes them.
+
+        :param payload: bytes: The payload of offers.
+        :return: None
+        """
+        version = uuid.uuid4().hex
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.set(self.key, payload, ex=self.hard_ttl)
+            pipe.set(self.fresh_key, 1, ex=self.soft_ttl)
+            pipe.set(self.version_key, version, ex=self.hard_ttl)
+            await pipe.execute()
+        CacheManager._index = OfferIndex.from_json(self.codec.decode(payload), version)
+
+    async def index(self) -> OfferIndex:
+        """
+        Returns the index of the cached offers, creating them if they
+        do not exist.
+
+        The cached offers are read and indexed only if the index of this
+        process is outdated. A refresh is started if they are stale.
+
+        :return: OfferIndex: The index of the current offers.
+        """
+        fresh, version = await self.client.mget(self.fresh_key, self.version_key)
+        index = CacheManager._index
+        if index is not None and version is not None and index.version == version.decode():
+            if fresh is None:
+                self._schedule_refresh()
+            return index
+        payload, version = await self.client.mget(self.key, self.version_key)
+        if payload is None:
+            payload = await self._create()
+            version = await self.client.get(self.version_key)
+            index = CacheManager._index
+            if index is not None and version is not None and index.version == version.decode():
+                return index
+        elif fresh is None:
+            self._schedule_refresh()
+        index = OfferIndex.from_json(self.codec.decode(payload),
+                                     version.decode() if version is not None else '')
+        CacheManager._index = index
+        return index
+
+    async def stream(self, stream_format: str) -> AsyncIterator[str]:
+        """
+        Streams the offers as NDJSON lines or Server-Sent Events.
+
+        Cached offers are streamed at once, starting a background
+        refresh if they are stale. Otherwise the events of the streamed
+        `parse` job are relayed as the worker publishes them: every
+        offer of the search page, then the description of every offer,
+        then `done` or `failed`.
+
+        :param stream_format: str: `ndjson` or `sse`.
+        :return: AsyncIterator[str]: The formatted events.
+        """
+        payload, fresh = await self.client.mget(self.key, self.fresh_key)
+        if payload and fresh is None:
+            self._schedule_refresh()
+        while not payload:
+            job_id = await self._stream_job()
+            if job_id is not None:
+                async for chunk in self._stream_events(job_id, stream_format):
+                    yield chunk
+                return
+            payload = await self.client.get(self.key)
+        rows = orjson.loads(self.codec.decode(payload))
+        chunks = [format_event(stream_format, 'offer', orjson.dumps(row)) for row in rows]
+        chunks.append(format_event(stream_format, 'done', b'{}'))
+        async for chunk in AsyncList(chunks):
+            yield chunk
+
+    async def _stream_job(self) -> str | None:
+        """
+        Returns the `parse` job streamed now, queueing it if there is
+        none.
+
+        The job is queued by the holder of the scraping lock. If the
+        lock is taken by a scraping without streaming, the cache is
+        polled until it stores the offers.
+
+        :return: str | None: The id of the job, None if the offers were
+         cached meanwhile.
+        """
+        while True:
+            if (job_id := await self._running_stream_job()) is not None:
+                return job_id
+            if await self.client.exists(self.key):
+                return None
+            lock = self._lock()
+            if await lock.acquire(blocking=False):
+                try:
+                    if (job_id := await self._running_stream_job()) is not None:
+                        return job_id
+                    if await self.client.exists(self.key):
+                        return None
+                    job_id = await job_manager.submit(JobRequest(kind='parse'))
+                    await self.client.set(self.stream_job_key, job_id, ex=job_manager.ttl)
+                    return job_id
+                finally:
+                    await self._release(lock)
+            await asyncio.sleep(self.poll_interval)
+
+    async def _running_stream_job(self) -> str | None:
+        """
+        Reads the streamed `parse` job if it is not finished.
+
+        The result of a done job is cached if it is not yet.
+
+        :return: str | None: The id of the job, None if there is no
+         job running.
+        """
+        job_id = await self.client.get(self.stream_job_key)
+        if job_id is None:
+            return None
+        job_status = await job_manager.status(job_id.decode())
+        if job_status is None or job_status.status == 'failed':
+            return None
+        if job_status.status == 'done':
+            await self._store_result(job_status.job_id)
+            return None
+        return job_status.job_id
+
+    async def _store_result(self, job_id: str) -> None:
+        """
+        Caches the result of a finished job unless the offers are
+        cached already.
+
+        :param job_id: str: The id of the job.
+        :return: None
+        """
+        if await self.client.exists(self.key):
+            return
+        if (payload := await job_manager.result(job_id)) is not None:
+            await self.store(payload)
+
+    async def _stream_events(self, job_id: str, stream_format: str) -> AsyncIterator[str]:
+        """
+        Relays the events of a job and caches its result.
+
+        :param job_id: str: The id of the job.
+        :param stream_format: str: `ndjson` or `sse`.
+        :return: AsyncIterator[str]: The formatted events.
+        """
+        try:
+            async with asyncio.timeout(settings.job_stream_timeout):
+                async for event, data in job_manager.read_events(job_id):
+                    yield format_event(stream_format, event, data)
+        except TimeoutError:
+            yield format_event(stream_format, 'failed', b'{"error": "timeout"}')
+            return
+        await self._store_result(job_id)
+
+    async def _create(self) -> bytes:
+        """
+        Waits for the offers missing in the cache, joining the creating
+        task of this process if there is one.
+
+        The task is shielded, so a cancelled request doesn't cancel
+        the scraping awaited by the others.
+
+        :return: bytes: The payload of the created offers.
+        """
+        task = CacheManager._create_task
+        if task is None or task.done():
+            task = asyncio.create_task(self._create_once())
+            CacheManager._create_task = task
+        return await asyncio.shield(task)
+
+    async def _create_once(self) -> bytes:
+        """
+        Scrapes the offers if no other worker does it, otherwise polls
+        the cache until the other worker stores them.
+
+        If the other worker releases the lock without storing offers,
+        the scraping is taken over.
+
+        :return: bytes: The payload of the created offers.
+        """
+        while True:
+            lock = self._lock()
+            if await lock.acquire(blocking=False):
+                try:
+                    return await self.refresh()
+                finally:
+                    await self._release(lock)
+            await asyncio.sleep(self.poll_interval)
+            if payload := await self.client.get(self.key):
+                return bytes(payload)
+
+    def _lock(self) -> Lock:
+        """
+        Creates the lock guarding scraping of the offers.
+
+        The lock lives as long as a scraping job may be awaited, so
+        a crashed worker doesn't block scraping forever.
+
+        :return: Lock: The not acquired Redis lock.
+        """
+        lock_ttl = settings.job_wait_timeout + 60
+        return self.client.lock(self.refresh_lock_key, timeout=lock_ttl)
+
+    @staticmethod
+    async def _release(lock: Lock) -> None:
+        """
+        Releases the lock if it is still owned.
+
+        :param lock: Lock: The acquired lock.
+        :return: None
+        """
+        try:
+            await lock.release()
+        except LockError:
+            logger.warning('Lock %s expired before scraping finished', lock.name)
+
+    def _schedule_refresh(self) -> None:
+        """
+        Starts the background refresh unless this process already
+        runs one.
+
+        :return: None
+        """
+        task = CacheManager._refresh_task
+        if task is not None and not task.done():
+            return
+        CacheManager._refresh_task = asyncio.create_task(self._refresh_in_background())
+
+    async def _refresh_in_background(self) -> None:
+        """
+        Refreshes the stale offers if no other worker is doing it.
+
+        :return: None
+        """
+        lock = self._lock()
+        if not await lock.acquire(blocking=False):
+            return
+        try:
+            await self.refresh()
+        # pylint: disable=W0718
+        except Exception:
+            logger.exception('Background refresh of cached offers failed')
+        finally:
+            await self._release(lock)
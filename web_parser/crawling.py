@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Contains the crawler of several paginated HH searches."""
+import logging
+import random
+from typing import Iterable, Sequence
+
+import asyncio
+from bs4 import SoupStrainer
+from playwright.async_api import Browser, BrowserContext, Error as PlaywrightError
+from sqlalchemy.exc import SQLAlchemyError
+
+from exceptions import TagNotFindError
+from settings import settings
+from .browser_pool import BrowserPool, browser_pool
+from .offers import Offer
+from .parsers import HHParser, USER_AGENTS
+from .progress import ScrapeProgress
+from .schemas import CrawlSpec
+from .soups import HHSoup
+from .storage import OfferStore, offer_store
+
+logger = logging.getLogger(__name__)
+
+
+class HHSearchParser(HHParser):
+    """ Parser of one page of search results, keeping its pager. """
+
+    pager_block_attrs = {'data-qa': 'pager-block'}
+
+    def __init__(self, url: str) -> None:
+        """
+        Initializes the HHSearchParser with the URL of the page.
+
+        The tree of the page keeps the results and the pager block.
+
+        :param url: The URL of the search results page.
+        """
+        super().__init__(url, store=None)
+        assert self.tag_attrs is not None
+        self.strainer = SoupStrainer(self.tag_name, attrs={
+            'data-qa': [self.tag_attrs['data-qa'], self.pager_block_attrs['data-qa']]
+        })
+
+
+class HHCrawler:
+    """
+    Crawls all result pages of several searches.
+
+    The first pages of all searches are loaded at once, then all their
+    other pages, up to `max_pages` of a search. All pages are opened in
+    one context borrowed from the browser pool, at most `concurrency`
+    of them at a time, so the crawl takes one pooled browser whatever
+    its concurrency. The host rate limit of the parsers is shared.
+    A page failing to load is skipped. Vacancies found by several
+    searches are returned once, in the order they were first found.
+
+    The parsers of all pages count in the `progress` of the crawler.
+    """
+
+    # pylint: disable=R0913
+    def __init__(self, specs: Sequence[CrawlSpec],
+                 concurrency: int = settings.crawl_concurrency,
+                 parser_class: type[HHSearchParser] = HHSearchParser,
+                 store: OfferStore | None = offer_store,
+                 pool: BrowserPool = browser_pool) -> None:
+        """
+        Initializes the HHCrawler with the searches.
+
+        :param specs: Sequence[CrawlSpec]: The searches to crawl.
+        :param concurrency: int: The amount of pages parsed at a time.
+        :param parser_class: type[HHSearchParser]: The parser of pages.
+        :param store: OfferStore | None: The store to upsert found
+         offers into. Offers are not stored if None.
+        :param pool: BrowserPool: The pool to borrow the context from.
+        """
+        self.specs: Sequence[CrawlSpec] = specs
+        self.concurrency: int = concurrency
+        self.parser_class: type[HHSearchParser] = parser_class
+        self.store: OfferStore | None = store
+        self.browser_pool: BrowserPool = pool
+        self.progress: ScrapeProgress = ScrapeProgress()
+
+    async def crawl(self) -> list[Offer]:
+        """
+        Crawls the searches and stores the found offers.
+
+        Pages which fail to load or have no results are skipped.
+
+        :return: list[Offer]: The unique offers of all searches.
+        """
+        slots = asyncio.Semaphore(self.concurrency)
+        async with self.browser_pool.context(self._create_context) as context:
+            first_pages = await asyncio.gather(*(self._parse_page(spec.url(), slots, context)
+                                                 for spec in self.specs))
+            next_pages = [(index, page)
+                          for index, (spec, soup) in enumerate(zip(self.specs, first_pages))
+                          if soup is not None
+                          for page in range(1, min(soup.page_count(), spec.max_pages))]
+            soups = await asyncio.gather(*(
+                self._parse_page(self.specs[index].url(page), slots, context)
+                for index, page in next_pages
+            ))
+        pages: list[list[HHSoup | None]] = [[soup] for soup in first_pages]
+        for (index, _), soup in zip(next_pages, soups):
+            pages[index].append(soup)
+        offers = self.merge(soup for spec_pages in pages for soup in spec_pages
+                            if soup is not None)
+        self.progress.offers_found = len(offers)
+        if self.store is not None:
+            try:
+                await self.store.upsert(offers)
+            except SQLAlchemyError:
+                logger.exception('Storing crawled offers failed')
+        return offers
+
+    @staticmethod
+    def merge(soups: Iterable[HHSoup]) -> list[Offer]:
+        """
+        Joins the offers of pages, dropping repeated vacancies.
+
+        :param soups: Iterable[HHSoup]: The parsed pages.
+        :return: list[Offer]: The unique offers.
+        """
+        offers: dict[int | str, Offer] = {}
+        for soup in soups:
+            for offer in soup.parsed_offers or []:
+                offers.setdefault(offer.vacancy_id or offer.link, offer)
+        return list(offers.values())
+
+    @staticmethod
+    async def _create_context(browser: Browser) -> BrowserContext:
+        """
+        Creates the context of the crawl with a random user agent.
+
+        :param browser: Browser: The borrowed browser.
+        :return: BrowserContext: The created context.
+        """
+        return await browser.new_context(user_agent=random.choice(USER_AGENTS))
+
+    async def _parse_page(self, url: str, slots: asyncio.Semaphore,
+                          context: BrowserContext) -> HHSoup | None:
+        """
+        Parses one page of search results.
+
+        :param url: str: The URL of the page.
+        :param slots: asyncio.Semaphore: The limit of pages parsed
+         at a time.
+        :param context: BrowserContext: The context to open the page in.
+        :return: HHSoup | None: The parsed page, None if it failed.
+        """
+        parser = self.parser_class(url)
+        parser.progress = self.progress
+        async with slots:
+            try:
+                return await parser.parse(context)
+            except (PlaywrightError, TagNotFindError) as exc:
+                logger.warning('Search page %s is skipped: %s', url, exc)
+                self.progress.errors += 1
+                return None
@@ -1,18 +1,157 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """Contains endpoints to users register and login."""
-from fastapi import APIRouter, Depends
-from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 
 from auth import AuthHandler
+from exceptions import JobFailedError
 from .caching import CacheManager
+from .events import STREAM_MEDIA_TYPES, negotiate_stream
+from .jobs import job_manager
+from .schemas import CrawlRequest, JobRequest, JobStatus, OfferQuery, OffersPage
 
 router = APIRouter()
 
 
+@asynccontextmanager
+async def job_errors() -> AsyncIterator[None]:
+    """
+    Turns errors of an awaited scraping job into HTTP errors.
+
+    :return: AsyncIterator[None]
+    :raises HTTPException: 502 if the job failed, 504 if it is not
+     finished in time.
+    """
+    try:
+        yield
+    except JobFailedError as exc:
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(exc)) from exc
+    except TimeoutError as exc:
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                            detail='Scraping is not finished in time') from exc
+
+
+def current_user(request: Request) -> str:
+    """
+    Returns the name of the authenticated user of a request.
+
+    :param request: Request: The request with the JWT token in cookies.
+    :return: str: The name of the user.
+    :raises HTTPException: If the token is invalid.
+    """
+    return str(AuthHandler.verify_token(request.cookies.get('auth_token', ''))['sub'])
+
+
+async def owned_job(job_id: str, request: Request) -> JobStatus:
+    """
+    Reads the state of a job submitted by the user of a request.
+
+    Jobs of other users and of the cache are reported as not found,
+    so their ids can't be probed.
+
+    :param job_id: str: The id of the job.
+    :param request: Request: The request of the user.
+    :return: JobStatus: The state of the job.
+    :raises HTTPException: 404 if the job is unknown, expired or
+     submitted by someone else.
+    """
+    job_status = await job_manager.status(job_id)
+    if job_status is None or job_status.owner != current_user(request):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Job not found')
+    return job_status
+
+
 @router.post('/api/v1/run_parser')
 # pylint: disable=W0613
-async def run_parser(check: str = Depends(AuthHandler.check_auth)) -> JSONResponse:
-    """Start web-parser and return parsed data as a response."""
-    response = await CacheManager().get_or_create()
-    return response
+async def run_parser(request: Request, stream: Literal['ndjson', 'sse'] | None = None,
+                     check: str = Depends(AuthHandler.check_auth)) -> Response:
+    """
+    Start web-parser and return parsed data as a response.
+
+    The offers are streamed as NDJSON or Server-Sent Events if asked
+    by the `stream` query parameter or the `Accept` header.
+    """
+    stream_format = negotiate_stream(request.headers.get('accept', ''), stream)
+    if stream_format is not None:
+        return StreamingResponse(CacheManager().stream(stream_format),
+                                 media_type=STREAM_MEDIA_TYPES[stream_format],
+                                 headers={'Cache-Control': 'no-cache'})
+    accept_encoding = request.headers.get('accept-encoding', '')
+    async with job_errors():
+        return await CacheManager().get_or_create(accept_encoding)
+
+
+@router.get('/api/v1/offers')
+# pylint: disable=W0613
+async def get_offers(query: OfferQuery = Depends(),
+                     check: str = Depends(AuthHandler.check_auth)) -> OffersPage:
+    """Return a filtered, sorted page of the cached offers."""
+    async with job_errors():
+        index = await CacheManager().index()
+    try:
+        return index.search(query)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+
+
+@router.post('/api/v1/crawl')
+# pylint: disable=W0613
+async def crawl(crawl_request: CrawlRequest, request: Request,
+                check: str = Depends(AuthHandler.check_auth)) -> Response:
+    """
+    Crawl all result pages of the searches and return unique offers.
+
+    If the crawl takes longer than `job_wait_timeout`, it goes on as
+    a job and its id is returned with the 202 status.
+    """
+    job_id = await job_manager.submit(JobRequest(kind='crawl', specs=crawl_request.specs),
+                                      current_user(request))
+    try:
+        payload = await job_manager.wait(job_id)
+    except JobFailedError as exc:
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(exc)) from exc
+    except TimeoutError:
+        job_status = await job_manager.status(job_id)
+        return JSONResponse(status_code=status.HTTP_202_ACCEPTED,
+                            content={'job_id': job_id,
+                                     'status': job_status.status if job_status else 'queued'},
+                            headers={'Location': f'/api/v1/jobs/{job_id}'})
+    accept_encoding = request.headers.get('accept-encoding', '')
+    return job_manager.codec.response(payload, status.HTTP_200_OK, accept_encoding)
+
+
+@router.post('/api/v1/jobs', status_code=status.HTTP_202_ACCEPTED)
+# pylint: disable=W0613
+async def start_job(job_request: JobRequest, request: Request,
+                    check: str = Depends(AuthHandler.check_auth)) -> JSONResponse:
+    """Start a scraping job in background and return its id."""
+    job_id = await job_manager.submit(job_request, current_user(request))
+    return JSONResponse(status_code=status.HTTP_202_ACCEPTED,
+                        content={'job_id': job_id, 'status': 'queued'},
+                        headers={'Location': f'/api/v1/jobs/{job_id}'})
+
+
+@router.get('/api/v1/jobs/{job_id}')
+# pylint: disable=W0613
+async def get_job(job_id: str, request: Request,
+                  check: str = Depends(AuthHandler.check_auth)) -> JobStatus:
+    """Return the status and progress of a scraping job of the user."""
+    return await owned_job(job_id, request)
+
+
+@router.get('/api/v1/jobs/{job_id}/result')
+# pylint: disable=W0613
+async def get_job_result(job_id: str, request: Request,
+                         check: str = Depends(AuthHandler.check_auth)) -> Response:
+    """Return the offers scraped by a finished job of the user."""
+    job_status = await owned_job(job_id, request)
+    payload = await job_manager.result(job_id)
+    if payload is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                            detail=f'Job is {job_status.status}')
+    accept_encoding = request.headers.get('accept-encoding', '')
+    return job_manager.codec.response(payload, status.HTTP_200_OK, accept_encoding)
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Contains the stream of events of a scraping job."""
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable
+
+import orjson
+from redis.exceptions import RedisError
+
+from redis_client import redis
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+STREAM_MEDIA_TYPES: dict[str, str] = {'ndjson': 'application/x-ndjson',
+                                      'sse': 'text/event-stream'}
+FINAL_EVENTS: tuple[str, ...] = ('done', 'failed')
+
+
+def negotiate_stream(accept: str, stream: str | None = None) -> str | None:
+    """
+    Chooses the streaming format of a response.
+
+    :param accept: str: The `Accept` header of the request.
+    :param stream: str | None: The format asked by the query parameter,
+     it takes precedence over the header.
+    :return: str | None: `ndjson` or `sse`, None if the client doesn't
+     ask for streaming.
+    """
+    if stream in STREAM_MEDIA_TYPES:
+        return stream
+    accepted = {value.split(';')[0].strip() for value in accept.lower().split(',')}
+    for stream_format, media_type in STREAM_MEDIA_TYPES.items():
+        if media_type in accepted:
+            return stream_format
+    return None
+
+
+def format_event(stream_format: str, event: str, data: bytes) -> str:
+    """
+    Formats an event as a chunk of the streamed response.
+
+    :param stream_format: str: `ndjson` or `sse`.
+    :param event: str: The name of the event.
+    :param data: bytes: The JSON data of the event.
+    :return: str: An NDJSON line or a Server-Sent Event.
+    """
+    if stream_format == 'sse':
+        return f'event: {event}\ndata: {data.decode()}\n\n'
+    return f'{{"event": "{event}", "data": {data.decode()}}}\n'
+
+
+class JobEvents:
+    """
+    Events of a scraping job kept in a Redis stream.
+
+    Workers append the offers of the search page as soon as it is
+    parsed, then a description as every offer page is parsed, and
+    finally `done` or `failed`. Readers get all the events from the
+    start of the stream, so a late reader misses nothing. The stream
+    keeps at most about `maxlen` events and lives `ttl` seconds.
+
+    Events are an addition to the job result, so failing to append
+    one is logged and doesn't fail the job.
+    """
+
+    def __init__(self, key: str, ttl: int = settings.job_ttl,
+                 maxlen: int = settings.job_events_maxlen) -> None:
+        """
+        Initializes the JobEvents with the key of the stream.
+
+        :param key: str: The Redis key of the stream.
+        :param ttl: int: Seconds the stream is kept.
+        :param maxlen: int: The approximate limit of kept events.
+        """
+        self.client = redis
+        self.key: str = key
+        self.ttl: int = ttl
+        self.maxlen: int = maxlen
+
+    async def publish(self, event: str, data: Any) -> None:
+        """
+        Appends an event to the stream.
+
+        :param event: str: The name of the event.
+        :param data: Any: The JSON serializable data of the event.
+        :return: None
+        """
+        await self.publish_many(event, [data])
+
+    async def publish_many(self, event: str, items: Iterable[Any]) -> None:
+        """
+        Appends events of the same name to the stream at once.
+
+        :param event: str: The name of the events.
+        :param items: Iterable[Any]: The JSON serializable data of
+         every event.
+        :return: None
+        """
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for data in items:
+                    pipe.xadd(self.key, {'event': event, 'data': orjson.dumps(data)},
+                              maxlen=self.maxlen, approximate=True)
+                pipe.expire(self.key, self.ttl)
+                await pipe.execute()
+        except RedisError:
+            logger.exception('Events %s of %s are not published', event, self.key)
+
+    async def read(self, block: float = settings.job_events_block,
+                   is_over: Callable[[], Awaitable[bool]] | None = None
+                   ) -> AsyncIterator[tuple[str, bytes]]:
+        """
+        Yields the events of the stream until the final one.
+
+        :param block: float: Seconds to wait for new events at a time.
+        :param is_over: Callable | None: Coroutine function called when
+         no event came for `block` seconds. If it returns True, the
+         events left in the stream are read and the reading stops even
+         without the final event.
+        :return: AsyncIterator[tuple[str, bytes]]: The names and
+         the JSON data of events.
+        """
+        last_id: bytes | str = '0'
+        over = False
+        while True:
+            streams = await self.client.xread({self.key: last_id},
+                                              block=None if over else int(block * 1000))
+            for _, entries in streams:
+                for last_id, fields in entries:
+                    event = fields[b'event'].decode()
+                    yield event, fields[b'data']
+                    if event in FINAL_EVENTS:
+                        return
+            if over:
+                return
+            if not streams and is_over is not None:
+                over = await is_over()
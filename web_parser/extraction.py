@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Contains the pool of processes extracting data from loaded pages."""
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import asyncio
+
+from settings import settings
+from .soups import HHSoup
+
+logger = logging.getLogger(__name__)
+
+
+def extract_description(soup_class: type[HHSoup], parser_type: str, content: str) -> str:
+    """
+    Extracts the description of an offer from its page.
+
+    Runs in the extractor processes, so it takes and returns only
+    plain picklable values.
+
+    :param soup_class: type[HHSoup]: The class of the extracting soup.
+    :param parser_type: str: The type of parser to be used by
+     BeautifulSoup.
+    :param content: str: The HTML of the offer page.
+    :return: str: The single line description text.
+    """
+    return soup_class('', parser_type).parse_descriptions(content)
+
+
+class Extractor:
+    """
+    Runs CPU bound extraction of loaded pages in a process pool.
+
+    Pages are parsed by `processes` worker processes, so the event loop
+    keeps loading other pages meanwhile and parsing uses several cores.
+    Pages are parsed inline if `processes` is 0 or the pool is not
+    started. A broken pool, e.g. after a worker was killed, is replaced
+    and the page is parsed inline.
+    """
+
+    def __init__(self, processes: int = settings.extraction_processes) -> None:
+        """
+        Initializes the Extractor with the size of its pool.
+
+        :param processes: int: The amount of extractor processes.
+        """
+        self.processes: int = processes
+        self._pool: ProcessPoolExecutor | None = None
+
+    @property
+    def is_started(self) -> bool:
+        """
+        Checks whether the process pool of the extractor is running.
+
+        :return: bool: True if pages are parsed in the pool.
+        """
+        return self._pool is not None
+
+    def start(self) -> None:
+        """
+        Starts the process pool. Does nothing if already started or
+        the extractor parses inline.
+
+        :return: None
+        """
+        if self._pool is not None or not self.processes:
+            return
+        self._pool = ProcessPoolExecutor(self.processes,
+                                         mp_context=multiprocessing.get_context('spawn'))
+
+    def stop(self) -> None:
+        """
+        Stops the process pool, dropping the pages not parsed yet.
+
+        :return: None
+        """
+        if self._pool is None:
+            return
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        self._pool = None
+
+    async def description(self, soup_class: type[HHSoup], parser_type: str,
+                          content: str) -> str:
+        """
+        Extracts the description of an offer from its page.
+
+        :param soup_class: type[HHSoup]: The class of the extracting
+         soup.
+        :param parser_type: str: The type of parser to be used by
+         BeautifulSoup.
+        :param content: str: The HTML of the offer page.
+        :return: str: The single line description text.
+        """
+        pool = self._pool
+        if pool is None:
+            return extract_description(soup_class, parser_type, content)
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(pool, extract_description,
+                                              soup_class, parser_type, content)
+        except BrokenProcessPool:
+            if self._pool is pool:
+                logger.error('Extractor pool is broken, it is started anew')
+                self._pool = None
+                pool.shutdown(wait=False)
+                self.start()
+            return extract_description(soup_class, parser_type, content)
+
+
+extractor = Extractor()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Contains the in-memory index of cached offers."""
+import base64
+import re
+from collections import defaultdict
+from typing import Callable
+
+from settings import settings
+from .offers import Offer
+from .schemas import OfferQuery, OffersPage
+
+WORD_PATTERN = re.compile(r'\w+')
+SortKey = Callable[[int], tuple[bool, bool, str, int] | tuple[bool, str]]
+
+
+def words(text: str | None) -> set[str]:
+    """
+    Splits a text into its lowercase words.
+
+    :param text: str | None: The text.
+    :return: set[str]: The unique words.
+    """
+    return set(WORD_PATTERN.findall(text.lower())) if text else set()
+
+
+# pylint: disable=R0902
+class OfferIndex:
+    """
+    Index of cached offers answering filtered, sorted and paginated
+    queries.
+
+    It is built once per version of the cached offers: offers are
+    grouped by company and experience, the words of their names and
+    descriptions point to the offers having them, and the order of
+    every sort is computed in advance. A query intersects the matched
+    groups and walks the order of its sort until its page is full, so
+    the whole payload is never decoded or sent. Offers searched by
+    words are sorted by relevance: those having more of the words in
+    their names go first.
+
+    Cursors keep the version of the index and the position in the
+    sort order, so a cursor expires once the cached offers change.
+    """
+
+    def __init__(self, offers: list[Offer], version: str) -> None:
+        """
+        Initializes the OfferIndex by indexing the offers.
+
+        :param offers: list[Offer]: The cached offers.
+        :param version: str: The version of the cached offers.
+        """
+        self.offers: list[Offer] = offers
+        self.version: str = version
+        self.salaries: list[tuple[int | None, int | None]] = [
+            offer.salary_bounds for offer in offers
+        ]
+        self.currencies: list[str | None] = [offer.salary_currency for offer in offers]
+        self.companies: dict[str, set[int]] = defaultdict(set)
+        self.experiences: dict[str, set[int]] = defaultdict(set)
+        self.words: dict[str, set[int]] = defaultdict(set)
+        self.name_words: dict[str, set[int]] = defaultdict(set)
+        for position, offer in enumerate(offers):
+            self.companies[offer.company.casefold()].add(position)
+            if offer.exp is not None:
+                self.experiences[offer.exp.casefold()].add(position)
+            name_words = words(offer.name)
+            for word in name_words:
+                self.name_words[word].add(position)
+            for word in name_words | words(offer.description):
+                self.words[word].add(position)
+        sort_keys: dict[str, SortKey] = {
+            'salary': lambda position: self._salary_key(position, 1),
+            '-salary': lambda position: self._salary_key(position, -1),
+            'name': lambda position: (False, offers[position].name.casefold()),
+            'company': lambda position: (False, offers[position].company.casefold()),
+        }
+        self.orders: dict[str, list[int]] = {'relevance': list(range(len(offers)))}
+        for sort, key in sort_keys.items():
+            self.orders[sort] = sorted(range(len(offers)), key=key)
+
+    @classmethod
+    def from_json(cls, body: bytes, version: str) -> 'OfferIndex':
+        """
+        Builds the index of offers serialized by `Offer.dump_many`.
+
+        :param body: bytes: The JSON of the offers.
+        :param version: str: The version of the cached offers.
+        :return: OfferIndex: The built index.
+        """
+        return cls(Offer.load_many(body), version)
+
+    def search(self, query: OfferQuery) -> OffersPage:
+        """
+        Finds a page of the offers matching a query.
+
+        :param query: OfferQuery: The filters, sort and page.
+        :return: OffersPage: The page of offers.
+        :raises ValueError: If the cursor is malformed or expired.
+        """
+        matched = self._match(query)
+        order = self._order(query, matched)
+        by_salary = query.salary_min is not None or query.salary_max is not None
+        start = 0
+        if query.cursor is not None:
+            start = self._decode_cursor(query.cursor) + 1
+        page: list[int] = []
+        next_cursor = None
+        for rank in range(start, len(order)):
+            position = order[rank]
+            if matched is not None and position not in matched:
+                continue
+            if by_salary and not self._salary_matches(position, query):
+                continue
+            if len(page) == query.limit:
+                next_cursor = self._encode_cursor(page[-1])
+                break
+            page.append(rank)
+        candidates = range(len(self.offers)) if matched is None else matched
+        total = len(candidates)
+        if by_salary:
+            total = sum(self._salary_matches(position, query) for position in candidates)
+        return OffersPage(offers=[self.offers[order[rank]].as_row() for rank in page],
+                          total=total, next_cursor=next_cursor)
+
+    def _order(self, query: OfferQuery, matched: set[int] | None) -> list[int]:
+        """
+        Returns the order of offers of a query.
+
+        Offers searched by words are sorted by relevance on the fly:
+        by the amount of the words in their names, then in the order
+        of the search results. Other orders are computed in advance.
+
+        :param query: OfferQuery: The query.
+        :param matched: set[int] | None: The positions of matched
+         offers.
+        :return: list[int]: The positions of offers in the sort order.
+        """
+        query_words = words(query.q)
+        if query.sort != 'relevance' or not query_words or matched is None:
+            return self.orders[query.sort]
+        name_groups = [self.name_words.get(word, set()) for word in query_words]
+        return sorted(matched, key=lambda position: (
+            -sum(position in group for group in name_groups), position
+        ))
+
+    def _match(self, query: OfferQuery) -> set[int] | None:
+        """
+        Intersects the offers of the company, experience and words of
+        a query.
+
+        :param query: OfferQuery: The query.
+        :return: set[int] | None: The positions of matched offers,
+         None if the query has none of these filters.
+        """
+        groups: list[set[int]] = []
+        if query.company is not None:
+            groups.append(self.companies.get(query.company.casefold(), set()))
+        if query.exp is not None:
+            groups.append(self.experiences.get(query.exp.casefold(), set()))
+        groups.extend(self.words.get(word, set()) for word in words(query.q))
+        if not groups:
+            return None
+        groups.sort(key=len)
+        return groups[0].intersection(*groups[1:])
+
+    def _salary_matches(self, position: int, query: OfferQuery) -> bool:
+        """
+        Checks whether the salary of an offer overlaps the salary range
+        of a query.
+
+        Offers without a salary or paid in another currency never
+        match.
+
+        :param position: int: The position of the offer.
+        :param query: OfferQuery: The query with the range.
+        :return: bool: True if the salary overlaps the range.
+        """
+        if self.currencies[position] != query.currency.upper():
+            return False
+        salary_min, salary_max = query.salary_min, query.salary_max
+        lower, upper = self.salaries[position]
+        lowest = lower if lower is not None else upper
+        highest = upper if upper is not None else lower
+        if lowest is None or highest is None:
+            return False
+        if salary_min is not None and highest < salary_min:
+            return False
+        return salary_max is None or lowest <= salary_max
+
+    def _salary_key(self, position: int, direction: int) -> tuple[bool, bool, str, int]:
+        """
+        Returns the key sorting offers by salary within a currency.
+
+        Offers paid in `offers_currency` go first, then the other
+        currencies by code and unknown ones, offers without a salary
+        last.
+
+        :param position: int: The position of the offer.
+        :param direction: int: 1 to sort ascending, -1 descending.
+        :return: tuple[bool, bool, str, int]: The sort key.
+        """
+        lower, upper = self.salaries[position]
+        salary = lower if lower is not None else upper
+        currency = self.currencies[position]
+        return (salary is None, currency != settings.offers_currency,
+                currency or '~', direction * (salary or 0))
+
+    def _encode_cursor(self, rank: int) -> str:
+        """
+        Encodes the position of the last offer of a page.
+
+        :param rank: int: The position in the sort order.
+        :return: str: The opaque cursor.
+        """
+        return base64.urlsafe_b64encode(f'{self.version}:{rank}'.encode()).decode()
+
+    def _decode_cursor(self, cursor: str) -> int:
+        """
+        Decodes the position kept in a cursor.
+
+        :param cursor: str: The opaque cursor.
+        :return: int: The position in the sort order.
+        :raises ValueError: If the cursor is malformed or made by
+         an index of other offers.
+        """
+        try:
+            version, rank = base64.urlsafe_b64decode(cursor.encode()).decode().split(':')
+            position = int(rank)
+        except (ValueError, UnicodeDecodeError) as exc:
+            raise ValueError('Malformed cursor') from exc
+        if version != self.version:
+            raise ValueError('Cursor has expired, the offers were updated')
+        return position
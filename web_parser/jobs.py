@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Contains the manager of scraping jobs."""
+import logging
+import time
+import uuid
+from contextlib import asynccontextmanager, suppress
+from typing import Any, AsyncIterator
+
+import asyncio
+import orjson
+from sqlalchemy.exc import SQLAlchemyError
+
+from exceptions import JobFailedError
+from redis_client import redis
+from settings import settings
+from .crawling import HHCrawler
+from .events import FINAL_EVENTS, JobEvents
+from .offers import Offer
+from .parsers import HHParser, HH_URL
+from .payloads import PayloadCodec
+from .progress import ScrapeProgress
+from .schemas import JobRequest, JobStatus
+from .storage import offer_store
+
+logger = logging.getLogger(__name__)
+
+
+class JobManager:
+    """
+    Queues scraping jobs and keeps their state in Redis.
+
+    The API only creates jobs and pushes their ids to the `queue_key`
+    list. Scraper workers (see `worker.py`) pop the ids and run the
+    jobs, so scraping capacity scales apart from the API. The state of
+    a job is a Redis hash with its status, timestamps and
+    progress counters, updated every `progress_interval` seconds while
+    the job runs. The offers of a finished job are stored next to it as
+    a `PayloadCodec` payload, and the offers of parsing jobs are also
+    streamed as `JobEvents` while they are scraped. All of them live
+    `ttl` seconds, so any worker can report a job started by another
+    one.
+
+    The progress updates are the heartbeat of a running job. A job not
+    updated for `heartbeat_timeout` seconds has lost its worker, so the
+    first reader of its state marks it failed.
+    """
+
+    key_prefix = 'scrape_job:'
+    queue_key = 'scrape_jobs'
+
+    def __init__(self, ttl: int = settings.job_ttl,
+                 progress_interval: float = settings.job_progress_interval,
+                 heartbeat_timeout: float = settings.job_heartbeat_timeout,
+                 codec: PayloadCodec | None = None) -> None:
+        """
+        Initializes the JobManager with a Redis client.
+
+        :param ttl: int: Seconds the state and result of a job are kept.
+        :param progress_interval: float: Seconds between progress
+         updates of a running job.
+        :param heartbeat_timeout: float: Seconds without updates after
+         which a running job is failed.
+        :param codec: PayloadCodec | None: The codec of job results.
+        """
+        self.client = redis
+        self.ttl: int = ttl
+        self.progress_interval: float = progress_interval
+        self.heartbeat_timeout: float = heartbeat_timeout
+        self.codec: PayloadCodec = codec or PayloadCodec()
+
+    def key(self, job_id: str) -> str:
+        """
+        Returns the key of the job state.
+
+        :param job_id: str: The id of the job.
+        :return: str: The Redis key.
+        """
+        return f'{self.key_prefix}{job_id}'
+
+    def result_key(self, job_id: str) -> str:
+        """
+        Returns the key of the job result.
+
+        :param job_id: str: The id of the job.
+        :return: str: The Redis key.
+        """
+        return f'{self.key_prefix}{job_id}:result'
+
+    def events(self, job_id: str) -> JobEvents:
+        """
+        Returns the stream of the job events.
+
+        :param job_id: str: The id of the job.
+        :return: JobEvents: The events of the job.
+        """
+        return JobEvents(f'{self.key_prefix}{job_id}:events', ttl=self.ttl)
+
+    async def create(self, job_request: JobRequest, owner: str | None = None) -> str:
+        """
+        Stores a new queued job.
+
+        :param job_request: JobRequest: The job to create.
+        :param owner: str | None: The name of the user submitting
+         the job, None for jobs of the cache.
+        :return: str: The id of the job.
+        """
+        job_id = uuid.uuid4().hex
+        fields: dict[str, Any] = {'kind': job_request.kind, 'status': 'queued',
+                                  'request': job_request.model_dump_json(),
+                                  'created_at': time.time(), **ScrapeProgress().as_dict()}
+        if owner is not None:
+            fields['owner'] = owner
+        await self._update(job_id, **fields)
+        return job_id
+
+    async def submit(self, job_request: JobRequest, owner: str | None = None) -> str:
+        """
+        Creates a job and queues it for the scraper workers.
+
+        :param job_request: JobRequest: The job to run.
+        :param owner: str | None: The name of the user submitting
+         the job, None for jobs of the cache.
+        :return: str: The id of the job.
+        """
+        job_id = await self.create(job_request, owner)
+        await self.client.lpush(self.queue_key, job_id)  # type: ignore[misc]
+        return job_id
+
+    async def next_job(self, timeout: int = settings.job_queue_timeout
+                       ) -> tuple[str, JobRequest] | None:
+        """
+        Pops the oldest queued job, waiting for one at most `timeout`
+        seconds.
+
+        Jobs which expired while queued are skipped.
+
+        :param timeout: int: Seconds to wait for a job.
+        :return: tuple[str, JobRequest] | None: The id and the request
+         of the job, None if there is no job to run.
+        """
+        popped = await self.client.brpop([self.queue_key], timeout=timeout)  # type: ignore[misc]
+        if popped is None:
+            return None
+        job_id = popped[1].decode()
+        request = await self.client.hget(self.key(job_id), 'request')  # type: ignore[misc]
+        if request is None:
+            logger.warning('Queued job %s expired before it was run', job_id)
+            return None
+        return job_id, JobRequest.model_validate_json(request)
+
+    async def wait(self, job_id: str, poll_interval: float = settings.cache_poll_interval,
+                   timeout: float = settings.job_wait_timeout) -> bytes:
+        """
+        Waits for a job to finish and returns its result.
+
+        :param job_id: str: The id of the job.
+        :param poll_interval: float: Seconds between checks of the job.
+        :param timeout: float: Seconds to wait, including the time the
+         job stays in the queue.
+        :return: bytes: The payload of the offers.
+        :raises JobFailedError: If the job fails or expires.
+        :raises TimeoutError: If the job isn't finished in time.
+        """
+        async with asyncio.timeout(timeout):
+            while True:
+                if (payload := await self.result(job_id)) is not None:
+                    return payload
+                job_status = await self.status(job_id)
+                if job_status is None:
+                    raise JobFailedError(job_id, 'the job expired')
+                if job_status.status == 'failed':
+                    raise JobFailedError(job_id, job_status.error or 'unknown error')
+                await asyncio.sleep(poll_interval)
+
+    async def read_events(self, job_id: str, block: float = settings.job_events_block
+                          ) -> AsyncIterator[tuple[str, bytes]]:
+        """
+        Yields the events of a job until it is done or failed.
+
+        The state of the job is checked whenever no event comes for
+        `block` seconds, so a job which lost its worker is failed and
+        an expired job ends the events with `failed`.
+
+        :param job_id: str: The id of the job.
+        :param block: float: Seconds to wait for new events at a time.
+        :return: AsyncIterator[tuple[str, bytes]]: The names and
+         the JSON data of events.
+        """
+        async def is_over() -> bool:
+            job_status = await self.status(job_id)
+            return job_status is None or job_status.status in FINAL_EVENTS
+
+        event = ''
+        async for event, data in self.events(job_id).read(block, is_over):
+            yield event, data
+        if event not in FINAL_EVENTS:
+            job_status = await self.status(job_id)
+            error = job_status.error if job_status is not None else None
+            yield 'failed', orjson.dumps({'error': error or 'the job expired'})
+
+    async def run(self, job_id: str, job_request: JobRequest) -> None:
+        """
+        Runs a job, reporting its progress, and stores its result.
+
+        :param job_id: str: The id of the job.
+        :param job_request: JobRequest: The job to run.
+        :return: None
+        """
+        progress = ScrapeProgress()
+        events = self.events(job_id)
+        await self._update(job_id, status='running')
+        try:
+            async with self._reporting(job_id, progress):
+                offers = await self.scrape(job_request, progress, events)
+        # pylint: disable=W0718
+        except Exception as exc:
+            logger.exception('Scraping job %s failed', job_id)
+            await self._update(job_id, status='failed', error=repr(exc), **progress.as_dict())
+            await events.publish('failed', {'error': repr(exc)})
+            return
+        payload = self.codec.encode(Offer.dump_many(offers))
+        await self.client.set(self.result_key(job_id), payload, ex=self.ttl)
+        await self._update(job_id, status='done', **progress.as_dict())
+        await events.publish('done', progress.as_dict())
+
+    @staticmethod
+    async def scrape(job_request: JobRequest, progress: ScrapeProgress,
+                     events: JobEvents | None = None) -> list[Offer]:
+        """
+        Scrapes the offers of a job.
+
+        Offers of all kinds of jobs are upserted into the `offers`
+        table, a failed database write is logged. Offers and
+        descriptions of `search` and `parse` jobs are published
+        as they are parsed.
+
+        :param job_request: JobRequest: The job.
+        :param progress: ScrapeProgress: The counters to update.
+        :param events: JobEvents | None: The stream of job events.
+        :return: list[Offer]: The scraped offers.
+        """
+        if job_request.kind == 'crawl':
+            crawler = HHCrawler(job_request.specs)
+            crawler.progress = progress
+            return await crawler.crawl()
+        parser = HHParser(HH_URL)
+        parser.progress = progress
+        parser.events = events
+        if job_request.kind == 'parse':
+            soup_instance = await parser.run_parsing()
+            return soup_instance.parsed_offers or []
+        soup_instance = await parser.parse()
+        offers = soup_instance.parsed_offers or []
+        try:
+            await offer_store.upsert(offers)
+        except SQLAlchemyError:
+            logger.exception('Storing scraped offers in the database failed')
+        return offers
+
+    async def status(self, job_id: str) -> JobStatus | None:
+        """
+        Reads the state of a job.
+
+        A running job without a heartbeat is marked failed.
+
+        :param job_id: str: The id of the job.
+        :return: JobStatus | None: The state, None if the job is
+         unknown or expired.
+        """
+        state = await self.client.hgetall(self.key(job_id))  # type: ignore[misc]
+        if not state:
+            return None
+        fields = {key.decode(): value.decode() for key, value in state.items()}
+        job_status = JobStatus.model_validate({**fields, 'job_id': job_id})
+        if (job_status.status == 'running'
+                and time.time() - job_status.updated_at > self.heartbeat_timeout):
+            error = f'No heartbeat for {self.heartbeat_timeout} seconds, the worker is lost'
+            logger.warning('Scraping job %s is failed: %s', job_id, error)
+            await self._update(job_id, status='failed', error=error)
+            await self.events(job_id).publish('failed', {'error': error})
+            job_status.status, job_status.error = 'failed', error
+        return job_status
+
+    async def result(self, job_id: str) -> bytes | None:
+        """
+        Reads the result of a finished job.
+
+        :param job_id: str: The id of the job.
+        :return: bytes | None: The payload of the offers, None if the
+         job is not finished.
+        """
+        payload = await self.client.get(self.result_key(job_id))
+        return None if payload is None else bytes(payload)
+
+    async def _update(self, job_id: str, **fields: Any) -> None:
+        """
+        Updates fields of the job state and prolongs it.
+
+        :param job_id: str: The id of the job.
+        :param fields: Any: The updated fields.
+        :return: None
+        """
+        fields['updated_at'] = time.time()
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hset(self.key(job_id), mapping=fields)
+            pipe.expire(self.key(job_id), self.ttl)
+            await pipe.execute()
+
+    @asynccontextmanager
+    async def _reporting(self, job_id: str, progress: ScrapeProgress
+                         ) -> AsyncIterator[None]:
+        """
+        Reports the progress of a job while the context runs.
+
+        The reporter is stopped and awaited on exit, so it can't write
+        the job state after the final update.
+
+        :param job_id: str: The id of the job.
+        :param progress: ScrapeProgress: The counters of the job.
+        :return: AsyncIterator[None]
+        """
+        reporter = asyncio.create_task(self._report(job_id, progress))
+        try:
+            yield
+        finally:
+            reporter.cancel()
+            with suppress(asyncio.CancelledError):
+                await reporter
+
+    async def _report(self, job_id: str, progress: ScrapeProgress) -> None:
+        """
+        Writes the progress of a running job periodically.
+
+        :param job_id: str: The id of the job.
+        :param progress: ScrapeProgress: The counters of the job.
+        :return: None
+        """
+        while True:
+            await asyncio.sleep(self.progress_interval)
+            await self._update(job_id, **progress.as_dict())
+
+
+job_manager = JobManager()
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Description the models of scraped data."""
+import os
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from auth.models import Base
+
+
+# pylint: disable=R0903
+class StoredOffer(Base):
+    """Represents a vacancy seen in the search results."""
+
+    __tablename__ = 'offers'
+    __table_args__ = {'schema': 'mm'} if not os.getenv('TESTING', '') else {}
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=False)
+    name: Mapped[str] = mapped_column(String)
+    salary: Mapped[str | None] = mapped_column(String, nullable=True)
+    salary_from: Mapped[int | None] = mapped_column(nullable=True, index=True)
+    salary_to: Mapped[int | None] = mapped_column(nullable=True)
+    salary_currency: Mapped[str | None] = mapped_column(String(3), nullable=True)
+    exp: Mapped[str | None] = mapped_column(String, nullable=True)
+    remote: Mapped[str | None] = mapped_column(String, nullable=True)
+    company: Mapped[str] = mapped_column(String, index=True)
+    link: Mapped[str] = mapped_column(String)
+    description: Mapped[str | None] = mapped_column(Text, nullable=True)
+    described_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True),
+                                                          nullable=True)
+    content_hash: Mapped[str] = mapped_column(String(64))
+    first_seen: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
+    last_seen: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Contains the record of a parsed job offer."""
+import hashlib
+import re
+from typing import Any, Iterable
+
+import orjson
+
+OfferRow = list[str | None]
+VACANCY_ID_PATTERN = re.compile(r'/vacancy/(\d+)')
+SALARY_NUMBER_PATTERN = re.compile(r'\d+(?: \d{3})*')
+SALARY_CURRENCIES: dict[str, str] = {
+    '₽': 'RUR', 'руб': 'RUR', '$': 'USD', '€': 'EUR', '₸': 'KZT', '₴': 'UAH',
+    '₼': 'AZN', '₾': 'GEL', 'br': 'BYR', 'сум': 'UZS', 'сом': 'KGS',
+}
+
+
+# pylint: disable=R0902,R0913
+class Offer:
+    """
+    A job offer parsed from HH search results.
+
+    Uses `__slots__`, so thousands of offers held in a worker don't
+    carry a dict each. Serialized as a JSON array of its fields in
+    `fields` order, the same shape the API has always returned.
+    """
+
+    __slots__ = ('name', 'salary', 'exp', 'remote', 'company', 'link', 'description')
+    fields: tuple[str, ...] = __slots__
+
+    def __init__(self, name: str, salary: str | None, exp: str | None,
+                 remote: str | None, company: str, link: str,
+                 description: str | None = None) -> None:
+        """
+        Initializes the Offer with parsed fields.
+
+        :param name: str: The vacancy title.
+        :param salary: str | None: The salary text, None if not set.
+        :param exp: str | None: The required experience.
+        :param remote: str | None: The remote work label.
+        :param company: str: The employer name.
+        :param link: str: The URL of the vacancy page.
+        :param description: str | None: The vacancy description,
+         None until the vacancy page is parsed.
+        """
+        self.name: str = name
+        self.salary: str | None = salary
+        self.exp: str | None = exp
+        self.remote: str | None = remote
+        self.company: str = company
+        self.link: str = link
+        self.description: str | None = description
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Offer):
+            return NotImplemented
+        return self.as_row() == other.as_row()
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}({self.name!r}, {self.link!r})'
+
+    def as_row(self) -> OfferRow:
+        """
+        Returns the offer fields as a list in `fields` order.
+
+        :return: OfferRow: The list of the offer fields.
+        """
+        return [self.name, self.salary, self.exp, self.remote,
+                self.company, self.link, self.description]
+
+    @property
+    def vacancy_id(self) -> int | None:
+        """
+        The HH id of the vacancy taken from its link.
+
+        :return: int | None: The id, None if the link has none.
+        """
+        match = VACANCY_ID_PATTERN.search(self.link or '')
+        return int(match.group(1)) if match else None
+
+    @property
+    def salary_bounds(self) -> tuple[int | None, int | None]:
+        """
+        The lower and upper salary taken from the salary text, e.g.
+        `от 150 000 до 250 000 ₽` or `до 3 000 $`.
+
+        :return: tuple[int | None, int | None]: The bounds, None where
+         a bound is not set.
+        """
+        if not self.salary:
+            return None, None
+        numbers = [int(number.replace(' ', ''))
+                   for number in SALARY_NUMBER_PATTERN.findall(self.salary)]
+        if not numbers:
+            return None, None
+        text = self.salary.lstrip().lower()
+        if text.startswith('до'):
+            return None, numbers[0]
+        if len(numbers) > 1:
+            return numbers[0], numbers[1]
+        return numbers[0], None if text.startswith('от') else numbers[0]
+
+    @property
+    def salary_currency(self) -> str | None:
+        """
+        The HH code of the salary currency taken from its sign in the
+        salary text, e.g. `RUR` for `₽` or `USD` for `$`.
+
+        :return: str | None: The code, None if the offer has no salary
+         or its currency is unknown.
+        """
+        if not self.salary:
+            return None
+        text = self.salary.lower()
+        for sign, currency in SALARY_CURRENCIES.items():
+            if sign in text:
+                return currency
+        return None
+
+    @property
+    def content_hash(self) -> str:
+        """
+        The hash of the fields shown on the search results card, which
+        tells whether the vacancy changed since it was seen.
+
+        :return: str: The SHA-256 hex digest.
+        """
+        card = [self.name, self.salary, self.exp, self.remote, self.company]
+        return hashlib.sha256(orjson.dumps(card)).hexdigest()
+
+    @classmethod
+    def from_row(cls, row: OfferRow) -> 'Offer':
+        """
+        Creates an offer from a list of fields in `fields` order.
+
+        :param row: OfferRow: The list of the offer fields.
+        :return: Offer: The created offer.
+        """
+        return cls(*row)  # type: ignore
+
+    @staticmethod
+    def dump_many(offers: Iterable['Offer']) -> bytes:
+        """
+        Serializes offers to a JSON array of rows.
+
+        :param offers: Iterable[Offer]: The offers to serialize.
+        :return: bytes: UTF-8 encoded JSON.
+        """
+        return orjson.dumps([offer.as_row() for offer in offers])
+
+    @classmethod
+    def load_many(cls, data: bytes) -> list['Offer']:
+        """
+        Deserializes offers from a JSON array of rows.
+
+        :param data: bytes: UTF-8 encoded JSON made by `dump_many`.
+        :return: list[Offer]: The loaded offers.
+        """
+        return [cls.from_row(row) for row in orjson.loads(data)]
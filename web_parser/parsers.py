@@ -7,18 +7,28 @@ and BeautifulSoup.
 import os
 import random
 from abc import ABC, abstractmethod
+from typing import Iterable, Iterator
 import logging
 
 import asyncio
+from bs4 import SoupStrainer
 from playwright.async_api import (
-    async_playwright,
     Browser,
     BrowserContext,
+    Error as PlaywrightError,
     Page,
     TimeoutError as PWTimeoutError
 )
+from sqlalchemy.exc import SQLAlchemyError
 
-from .soups import HHSoup, BaseSoup
+from settings import settings
+from .soups import HHSoup, BaseSoup, resolve_parser_type
+from .browser_pool import BrowserPool, browser_pool
+from .events import JobEvents
+from .extraction import Extractor, extractor
+from .progress import ScrapeProgress
+from .storage import OfferStore, offer_store
+from .throttling import HostRateLimiter, host_rate_limiter
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 log_file_path = os.path.join(current_dir, 'parser.log')
@@ -56,10 +66,10 @@ class AbstractParser(ABC):
         super().__init__()
         self.url: str = url
         self.user_agents: tuple[str, ...] = user_agents
-        self.parser_type = 'html.parser'
+        self.parser_type: str = resolve_parser_type(settings.html_parser)
 
     @abstractmethod
-    async def start_browser(self) -> BaseSoup:
+    async def start_browser(self, context: BrowserContext | None = None) -> BaseSoup:
         """
         Starts the browser and returns the parsed content as
         a BaseSoup instance.
@@ -74,7 +84,7 @@ class AbstractParser(ABC):
         """ Creates a new page in the browser context. """
 
 
-# pylint: disable=R0903
+# pylint: disable=R0902,R0903
 class BaseParser(AbstractParser):
     """ Base parser class for handling common parsing logic. """
 
@@ -84,6 +94,7 @@ class BaseParser(AbstractParser):
                  tag_name: str = 'default',
                  tag_attrs: dict[str, str] | None = None,
                  user_agents: tuple[str, ...] = USER_AGENTS,
+                 pool: BrowserPool = browser_pool
                  ) -> None:
         """
         Initializes the BaseParser with URL, soup class, tag name,
@@ -94,6 +105,7 @@ class BaseParser(AbstractParser):
         :param tag_name: The tag name to search for in the HTML.
         :param tag_attrs: The attributes of the tag to search for.
         :param user_agents: A tuple of user agent strings.
+        :param pool: The browser pool to borrow browser contexts from.
         """
         super().__init__(url, user_agents)
         self.url: str = url
@@ -101,6 +113,9 @@ class BaseParser(AbstractParser):
         self.soup_class: type[BaseSoup] = soup_class
         self.tag_name: str = tag_name
         self.tag_attrs: dict[str, str] | None = tag_attrs
+        self.browser_pool: BrowserPool = pool
+        self.rate_limiter: HostRateLimiter = host_rate_limiter
+        self.strainer: SoupStrainer | None = None
 
     async def _create_context(self, browser: Browser) -> BrowserContext:
         user_agent: str = random.choice(self.user_agents)
@@ -112,45 +127,62 @@ class BaseParser(AbstractParser):
         page: Page = await context.new_page()
         return page
 
-    async def start_browser(self) -> BaseSoup:
+    async def start_browser(self, context: BrowserContext | None = None) -> BaseSoup:
         """
         Starts the browser, navigates to the URL, and returns
          the parsed content.
 
+        :param context: The browser context to open the page in.
+         A context is borrowed from the pool if None.
+        :return: An instance of BaseSoup containing the parsed content.
+        :raises TimeoutError: If the page fails to load
+         maximum retries.
+        """
+        if context is None:
+            async with self.browser_pool.context(self._create_context) as borrowed:
+                return await self._load(borrowed)
+        return await self._load(context)
+
+    async def _load(self, context: BrowserContext) -> BaseSoup:
+        """
+        Opens a page in the context, navigates to the URL, and returns
+         the parsed content.
+
+        :param context: The browser context to open the page in.
         :return: An instance of BaseSoup containing the parsed content.
         :raises TimeoutError: If the page fails to load
          maximum retries.
         """
         max_retries = 10
         retries = 0
-        async with async_playwright() as pw:
-            browser = await pw.chromium.launch()
-            context = await self._create_context(browser)
-            async with browser:
-                page: Page = await self._create_page(context)
-                async with page as p:
-                    while retries < max_retries:
-                        try:
-                            await p.goto(self.url)
-                            await p.wait_for_load_state('load')
-                            content = await p.content()
-                            soup_instance = self.soup_class(content, self.parser_type)
-                            return soup_instance
-                        except PWTimeoutError as e:
-                            retries += 1
-                            print(f"Attempt {retries} failed: {e}. Retrying...")
-                            await asyncio.sleep(2 * retries)
-                    raise PWTimeoutError("Max retries exceeded while trying to load the page")
+        page: Page = await self._create_page(context)
+        async with page as p:
+            while retries < max_retries:
+                try:
+                    await self.rate_limiter.wait(self.url)
+                    await p.goto(self.url)
+                    await p.wait_for_load_state('load')
+                    content = await p.content()
+                    soup_instance = self.soup_class(content, self.parser_type,
+                                                    self.strainer)
+                    return soup_instance
+                except PWTimeoutError as e:
+                    retries += 1
+                    print(f"Attempt {retries} failed: {e}. Retrying...")
+                    await asyncio.sleep(2 * retries)
+            raise PWTimeoutError("Max retries exceeded while trying to load the page")
 
 
 class HHParser(BaseParser):
     """ Parser class for handling job listings from HH.ru. """
 
+    # pylint: disable=R0913
     def __init__(self,
                  url: str,
                  soup_class: type[HHSoup] = HHSoup,
                  tag_name: str = 'div',
-                 tag_attrs: dict[str, str] | None = None
+                 tag_attrs: dict[str, str] | None = None,
+                 store: OfferStore | None = offer_store
                  ) -> None:
         """
         Initializes the HHParser with URL, soup class, tag name,
@@ -160,6 +192,9 @@ class HHParser(BaseParser):
         :param soup_class: The class to use for creating soup objects.
         :param tag_name: The tag name to search for in the HTML.
         :param tag_attrs: The attributes of the tag to search for.
+        :param store: The store of known offers. Pages of offers with
+         valid stored descriptions are not loaded. All pages are
+         loaded if None.
         """
         super().__init__(url, soup_class, tag_name, tag_attrs)
         self.url: str = url
@@ -169,53 +204,150 @@ class HHParser(BaseParser):
             self.tag_attrs: dict[str, str] | None = {
                 'data-qa': 'vacancy-serp__results'
             }
-
-    async def start_browser(self) -> HHSoup:
+        self.strainer = SoupStrainer(self.tag_name, attrs=self.tag_attrs)
+        self.concurrency: int = settings.parser_concurrency
+        self.run_timeout: float = settings.parser_run_timeout
+        self.store: OfferStore | None = store
+        self.progress: ScrapeProgress = ScrapeProgress()
+        self.extractor: Extractor = extractor
+        self.events: JobEvents | None = None
+        self.reused: set[int] = set()
+
+    async def start_browser(self, context: BrowserContext | None = None) -> HHSoup:
         """
         Starts the browser and ensures the returned soup
          is of type HHSoup.
 
+        :param context: The browser context to open the page in.
+         A context is borrowed from the pool if None.
         :return: An instance of HHSoup containing the parsed content.
         """
-        soup_instance = await super().start_browser()
+        soup_instance = await super().start_browser(context)
         assert isinstance(soup_instance, HHSoup)
         return soup_instance
 
-    async def parse(self) -> HHSoup:
+    async def parse(self, context: BrowserContext | None = None) -> HHSoup:
         """
         Parses the content of the webpage for job listings.
 
+        :param context: The browser context to open the page in.
+         A context is borrowed from the pool if None.
         :return: An instance of HHSoup with parsed job offers.
         """
-        soup_instance: HHSoup = await self.start_browser()
+        soup_instance: HHSoup = await self.start_browser(context)
         tag = soup_instance.get_tag(self.tag_name, attrs=self.tag_attrs)
         soup_instance.parse_content(tag)
+        self.progress.pages_parsed += 1
+        self.progress.offers_found += len(soup_instance.parsed_offers or [])
+        if self.events is not None:
+            await self.events.publish_many('offer', [
+                offer.as_row() for offer in soup_instance.parsed_offers or []
+            ])
         return soup_instance
 
-    async def parse_many(self, start: int, end: int, soup_instance: HHSoup) -> HHSoup:
+    async def parse_many(self, soup_instance: HHSoup,
+                         indexes: Iterable[int] | None = None) -> HHSoup:
         """
         Parses content from multiple offer links concurrently.
 
-        :param start: The starting index of the offers to parse.
-        :param end: The ending index (exclusive) of the offers to parse.
-        :param soup_instance: The HHSoup instance containing the offer links to parse.
+        Keeps up to `concurrency` pages loading at once: every worker
+        takes the next offer as soon as its previous page is done, so
+        one slow page does not stall the others. An offer whose page
+        fails is counted in the progress errors and left without
+        a description, the other offers are parsed anyway. The context
+        is closed only after all workers are finished.
+
+        :param soup_instance: The HHSoup instance containing the offer
+         links to parse.
+        :param indexes: The indexes of the offers to parse. All offers
+         are parsed if None.
 
         :return: The updated HHSoup instance with parsed offer descriptions.
         """
         assert isinstance(soup_instance.offers_links, list)
-        async with async_playwright() as pw:
-            tasks = []
-            browser = await pw.chromium.launch()
-            context = await self._create_context(browser)
-            async with browser:
-                count = start
-                for link in soup_instance.offers_links[start:end]:
-                    page = await self._create_page(context)
-                    tasks.append(self._parse_page(page, link, count, soup_instance))
-                    count += 1
-                await asyncio.gather(*tasks)
+        if indexes is None:
+            indexes = range(len(soup_instance.offers_links))
+        pending: list[int] = list(indexes)
+        workers_amount = min(self.concurrency, len(pending))
+        if not workers_amount:
+            return soup_instance
+        queue: Iterator[int] = iter(pending)
+        async with self.browser_pool.context(self._create_context) as context:
+            async with asyncio.TaskGroup() as workers:
+                for _ in range(workers_amount):
+                    workers.create_task(self._parse_worker(context, queue, soup_instance))
         return soup_instance
 
+    async def select_stale(self, soup_instance: HHSoup) -> list[int]:
+        """
+        Fills in the stored descriptions of known, unchanged offers and
+        returns the rest, which pages have to be loaded.
+
+        The vacancy ids of offers with stored descriptions are kept in
+        `reused`, so storing the offers doesn't renew the descriptions.
+        If the store is unavailable, all offers are returned.
+
+        :param soup_instance: The HHSoup instance with parsed offers.
+
+        :return: The indexes of offers without a valid description.
+        """
+        assert isinstance(soup_instance.parsed_offers, list)
+        offers = soup_instance.parsed_offers
+        known: dict[int, str] = {}
+        if self.store is not None:
+            try:
+                known = await self.store.known_descriptions(offers)
+            except SQLAlchemyError:
+                logger.exception('Known offers are not loaded, all pages will be parsed')
+        stale = []
+        for index, offer in enumerate(offers):
+            description = known.get(offer.vacancy_id) if offer.vacancy_id else None
+            if description is None:
+                stale.append(index)
+            else:
+                offer.description = description
+                assert offer.vacancy_id is not None
+                self.reused.add(offer.vacancy_id)
+        self.progress.descriptions_reused += len(offers) - len(stale)
+        if self.events is not None:
+            await self.events.publish_many('description', [
+                {'link': offer.link, 'description': offer.description}
+                for offer in offers if offer.description is not None
+            ])
+        logger.info('%s of %s offers have to be parsed', len(stale), len(offers))
+        return stale
+
+    async def _parse_worker(self, context: BrowserContext, queue: Iterator[int],
+                            soup_instance: HHSoup) -> None:
+        """
+        Parses offers one by one while the shared queue is not empty.
+
+        Every page is closed after its offer, and a failed offer doesn't
+        stop the worker.
+
+        :param context: The browser context to open pages in.
+        :param queue: The iterator over offers indexes shared between
+         workers.
+        :param soup_instance: The HHSoup instance to update with
+         parsed descriptions.
+
+        :return: None
+        """
+        assert isinstance(soup_instance.offers_links, list)
+        for index in queue:
+            link = soup_instance.offers_links[index]
+            try:
+                page = await self._create_page(context)
+                try:
+                    await self._parse_page(page, link, index, soup_instance)
+                finally:
+                    await page.close()
+            except PWTimeoutError:
+                logger.warning('Offer page %s is not loaded, max retries exceeded', link)
+            except PlaywrightError as exc:
+                self.progress.errors += 1
+                logger.warning('Offer page %s is not parsed: %s', link, exc)
+
     async def _parse_page(self, page: Page, link: str, counter: int, current_soup: HHSoup) -> None:
         """
         Helper method to parse a single page and extract content.
@@ -224,7 +356,8 @@ class HHParser(BaseParser):
         :param link: URL to navigate to.
         :param counter: The index of the offer being parsed.
         :param current_soup: The HHSoup instance to update with
-         parsed descriptions.
+         parsed descriptions. The descriptions are extracted by the
+         `extractor`, off the event loop if its pool is started.
 
         :return: None
         :raises PWTimeoutError: If the page fails to load after maximum
@@ -234,17 +367,23 @@ class HHParser(BaseParser):
         retries = 0
         while retries < max_retries:
             try:
+                await self.rate_limiter.wait(link)
                 await page.goto(link)
                 await page.wait_for_load_state('load')
                 content = await page.content()
-                soup_instance = self.soup_class(content, self.parser_type)
-                description = soup_instance.parse_descriptions(content)
+                description = await self.extractor.description(
+                    type(current_soup), current_soup.parser_type, content
+                )
                 assert isinstance(current_soup.parsed_offers, list)
-                current_soup.parsed_offers[counter].append(description)
-                await page.close()
+                current_soup.parsed_offers[counter].description = description
+                self.progress.descriptions_fetched += 1
+                if self.events is not None:
+                    await self.events.publish('description', {'link': link,
+                                                              'description': description})
                 return
             except PWTimeoutError as e:
                 retries += 1
+                self.progress.errors += 1
                 print(f"Attempt {retries} failed: {e}. Retrying...")
                 await asyncio.sleep(2 * retries)
         raise PWTimeoutError("Max retries exceeded while trying to load the page")
@@ -255,16 +394,32 @@ class HHParser(BaseParser):
          of the main page
         and subsequent concurrent parsing of individual offer pages.
 
+        Only pages of offers without a valid stored description are
+        loaded, and the offers are stored after the run, so the next
+        run skips them.
+
+        The whole run is limited by `run_timeout` seconds. If the offer
+        pages are not parsed in time, the offers parsed so far are
+        returned and the rest are left without descriptions.
+
         :return: An instance of HHSoup with all parsed job offers
          and their descriptions.
+        :raises TimeoutError: If the main page is not parsed in time.
         """
-        soup_instance = await self.parse()
-        assert isinstance(soup_instance.offers_links, list)
-        offers_amount: int = len(soup_instance.offers_links)
-        batch_size: int = 8
-
-        for start in range(0, offers_amount, batch_size):
-            end = min(start + batch_size, offers_amount)
-            await self.parse_many(start=start, end=end, soup_instance=soup_instance)
-
+        deadline = asyncio.get_running_loop().time() + self.run_timeout
+        async with asyncio.timeout_at(deadline):
+            soup_instance = await self.parse()
+            indexes = await self.select_stale(soup_instance)
+        try:
+            async with asyncio.timeout_at(deadline):
+                await self.parse_many(soup_instance, indexes)
+        except TimeoutError:
+            logger.warning('Parsing run exceeded %s seconds, returning partial result',
+                           self.run_timeout)
+        if self.store is not None:
+            try:
+                await self.store.upsert(soup_instance.parsed_offers or [],
+                                        reused=self.reused)
+            except SQLAlchemyError:
+                logger.exception('Storing parsed offers failed')
         return soup_instance
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Contains the codec of payloads stored in the cache."""
+import zlib
+
+import zstandard
+from fastapi.responses import Response
+
+from settings import settings
+
+
+class PayloadCodec:
+    """
+    Packs JSON bodies into versioned, optionally compressed payloads.
+
+    A payload is `magic`, the format version byte, the compression id
+    byte and the compressed body. The body stays JSON, so a cached
+    payload can be sent as a response without decoding: as is, when
+    the client accepts its compression as a content encoding, or just
+    decompressed otherwise. Payloads without the header are treated as
+    plain JSON written before the header existed.
+    """
+
+    magic = b'FMS'
+    version = 1
+    compressions: dict[str, int] = {'none': 0, 'zlib': 1, 'zstd': 2}
+    content_encodings: dict[str, str] = {'zlib': 'deflate', 'zstd': 'zstd'}
+
+    def __init__(self, compression: str = settings.cache_compression,
+                 level: int = settings.cache_compression_level) -> None:
+        """
+        Initializes the PayloadCodec with compression of new payloads.
+
+        :param compression: str: The compression of encoded payloads,
+         one of the keys of `compressions`.
+        :param level: int: The compression level.
+        :raises ValueError: If the compression is not supported.
+        """
+        if compression not in self.compressions:
+            raise ValueError(f'Unsupported compression {compression!r}.'
+                             f' Allowed compressions are {tuple(self.compressions)}')
+        self.compression: str = compression
+        self.level: int = level
+        self._names: dict[int, str] = {i: name for name, i in self.compressions.items()}
+
+    @property
+    def header_size(self) -> int:
+        """
+        The size of the payload header in bytes.
+
+        :return: int: The header size.
+        """
+        return len(self.magic) + 2
+
+    def encode(self, body: bytes) -> bytes:
+        """
+        Packs a JSON body into a payload.
+
+        :param body: bytes: The JSON body.
+        :return: bytes: The payload with the header.
+        """
+        header = self.magic + bytes((self.version, self.compressions[self.compression]))
+        return header + self.compress(self.compression, body)
+
+    def unpack(self, payload: bytes) -> tuple[str, bytes]:
+        """
+        Splits a payload into its compression and compressed body.
+
+        :param payload: bytes: The stored payload.
+        :return: tuple[str, bytes]: The compression name and the body
+         compressed with it.
+        :raises ValueError: If the payload version or compression is
+         unknown.
+        """
+        if not payload.startswith(self.magic):
+            return 'none', payload
+        version, compression_id = payload[len(self.magic):self.header_size]
+        if version != self.version or compression_id not in self._names:
+            raise ValueError(f'Unknown payload format {version}/{compression_id}')
+        return self._names[compression_id], payload[self.header_size:]
+
+    def decode(self, payload: bytes) -> bytes:
+        """
+        Unpacks the JSON body of a payload.
+
+        :param payload: bytes: The stored payload.
+        :return: bytes: The JSON body.
+        """
+        compression, data = self.unpack(payload)
+        return self.decompress(compression, data)
+
+    def compress(self, compression: str, body: bytes) -> bytes:
+        """
+        Compresses a body with the given compression.
+
+        :param compression: str: The compression name.
+        :param body: bytes: The body to compress.
+        :return: bytes: The compressed body.
+        """
+        if compression == 'zlib':
+            return zlib.compress(body, self.level)
+        if compression == 'zstd':
+            return zstandard.ZstdCompressor(level=self.level).compress(body)
+        return body
+
+    def response(self, payload: bytes, status_code: int, accept_encoding: str) -> Response:
+        """
+        Creates a JSON response with the body of a payload.
+
+        :param payload: bytes: The stored payload.
+        :param status_code: int: The status code of the response.
+        :param accept_encoding: str: The `Accept-Encoding` header of
+         the request.
+        :return: Response: The response with the compressed body if
+         the client accepts the compression, with the plain body
+         otherwise.
+        """
+        compression, data = self.unpack(payload)
+        headers = {'Vary': 'Accept-Encoding'}
+        encoding = self.content_encodings.get(compression)
+        accepted = {value.split(';')[0].strip() for value in accept_encoding.lower().split(',')}
+        if encoding is not None and encoding in accepted:
+            headers['Content-Encoding'] = encoding
+        else:
+            data = self.decompress(compression, data)
+        return Response(content=data, status_code=status_code,
+                        media_type='application/json', headers=headers)
+
+    @staticmethod
+    def decompress(compression: str, data: bytes) -> bytes:
+        """
+        Decompresses a body compressed with the given compression.
+
+        :param compression: str: The compression name.
+        :param data: bytes: The compressed body.
+        :return: bytes: The decompressed body.
+        """
+        if compression == 'zlib':
+            return zlib.decompress(data)
+        if compression == 'zstd':
+            return zstandard.ZstdDecompressor().decompress(data)
+        return data
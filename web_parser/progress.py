@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Contains the progress record of a scraping run."""
+
+
+# pylint: disable=R0903
+class ScrapeProgress:
+    """
+    Counters of a scraping run, updated by parsers as they go.
+
+    Readers, e.g. a job reporting its status, may read the counters
+    at any time while the run is going.
+    """
+
+    __slots__ = ('pages_parsed', 'offers_found', 'descriptions_fetched',
+                 'descriptions_reused', 'errors')
+    fields: tuple[str, ...] = __slots__
+
+    def __init__(self) -> None:
+        """
+        Initializes the ScrapeProgress with zero counters.
+        """
+        self.pages_parsed: int = 0
+        self.offers_found: int = 0
+        self.descriptions_fetched: int = 0
+        self.descriptions_reused: int = 0
+        self.errors: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        """
+        Returns the counters by their names.
+
+        :return: dict[str, int]: The counters.
+        """
+        return {field: getattr(self, field) for field in self.fields}
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Description schemas of parser service."""
+from typing import Literal
+from urllib.parse import urlencode
+
+from pydantic import BaseModel, Field, model_validator
+
+from settings import settings
+
+HH_SEARCH_URL = 'https://hh.ru/search/vacancy'
+
+
+class CrawlSpec(BaseModel):
+    """
+    Schema for one HH search to crawl.
+
+    Attributes:
+        text: str: The searched text.
+        search_field: str | None: The field the text is searched in.
+        schedule: str | None: The work schedule, e.g. `remote`.
+        search_period: int | None: The age of vacancies in days.
+        excluded_text: str | None: The comma separated excluded words.
+        filters: dict[str, str]: Other query parameters of the search.
+        max_pages: int: The maximal amount of crawled result pages.
+    """
+    text: str
+    search_field: str | None = 'name'
+    schedule: str | None = 'remote'
+    search_period: int | None = 1
+    excluded_text: str | None = None
+    filters: dict[str, str] = Field(default_factory=dict)
+    max_pages: int = Field(default=settings.crawl_max_pages, ge=1)
+
+    def url(self, page: int = 0) -> str:
+        """
+        Builds the URL of a result page of the search.
+
+        :param page: int: The index of the page, starting from 0.
+        :return: str: The URL of the page.
+        """
+        params: dict[str, str | int] = {'text': self.text, 'ored_clusters': 'true'}
+        optional = {'search_field': self.search_field, 'schedule': self.schedule,
+                    'search_period': self.search_period, 'excluded_text': self.excluded_text}
+        params.update({name: value for name, value in optional.items() if value is not None})
+        params.update(self.filters)
+        if page:
+            params['page'] = page
+        return f'{HH_SEARCH_URL}?{urlencode(params)}'
+
+
+class CrawlRequest(BaseModel):
+    """
+    Schema for a crawl of several searches.
+
+    Attributes:
+        specs: list[CrawlSpec]: The searches to crawl.
+    """
+    specs: list[CrawlSpec] = Field(min_length=1)
+
+
+class JobRequest(BaseModel):
+    """
+    Schema for starting a scraping job.
+
+    Attributes:
+        kind: str: `search` to scrape the default search page,
+         `parse` to scrape it with offer descriptions, `crawl` to crawl
+         the given searches.
+        specs: list[CrawlSpec]: The searches of a `crawl` job.
+    """
+    kind: Literal['search', 'parse', 'crawl'] = 'parse'
+    specs: list[CrawlSpec] = Field(default_factory=list)
+
+    @model_validator(mode='after')
+    def check_specs(self) -> 'JobRequest':
+        """
+        Checks that a crawl job has searches to crawl.
+
+        :return: JobRequest: The checked request.
+        :raises ValueError: If a crawl job has no searches.
+        """
+        if self.kind == 'crawl' and not self.specs:
+            raise ValueError('A crawl job needs at least one spec')
+        return self
+
+
+class JobStatus(BaseModel):
+    """
+    Schema for the state of a scraping job.
+
+    Attributes:
+        job_id: str: The id of the job.
+        kind: str: The kind of the job.
+        status: str: `queued`, `running`, `done` or `failed`.
+        owner: str | None: The name of the user who submitted the job,
+         None for jobs of the cache.
+        error: str | None: The error of a failed job.
+        created_at: float: The timestamp of the job creation.
+        updated_at: float: The timestamp of the last update.
+        pages_parsed: int: The amount of parsed search pages.
+        offers_found: int: The amount of found offers.
+        descriptions_fetched: int: The amount of loaded offer pages.
+        descriptions_reused: int: The amount of stored descriptions
+         used instead of loading offer pages.
+        errors: int: The amount of failed page loads.
+    """
+    job_id: str
+    kind: str
+    status: str
+    owner: str | None = None
+    error: str | None = None
+    created_at: float
+    updated_at: float
+    pages_parsed: int = 0
+    offers_found: int = 0
+    descriptions_fetched: int = 0
+    descriptions_reused: int = 0
+    errors: int = 0
+
+
+class OfferQuery(BaseModel):
+    """
+    Schema for the query parameters of cached offers.
+
+    Attributes:
+        company: str | None: The employer name, case insensitive.
+        exp: str | None: The required experience, case insensitive.
+        salary_min: int | None: The lower end of the salary range.
+        salary_max: int | None: The upper end of the salary range.
+         Offers with a salary overlapping the range are matched.
+        currency: str: The HH code of the currency of the salary range,
+         offers paid in other currencies don't match it.
+        q: str | None: The words searched in names and descriptions.
+        sort: str: `relevance` puts offers having more of the `q`
+         words in their names first, then keeps the order of the
+         search results. `salary` and `-salary` sort by the salary
+         within a currency, `offers_currency` first. `name` or `company`
+         sort by the field.
+        cursor: str | None: The `next_cursor` of the previous page.
+        limit: int: The maximal amount of offers in the page.
+    """
+    company: str | None = None
+    exp: str | None = None
+    salary_min: int | None = Field(default=None, ge=0)
+    salary_max: int | None = Field(default=None, ge=0)
+    currency: str = settings.offers_currency
+    q: str | None = None
+    sort: Literal['relevance', 'salary', '-salary', 'name', 'company'] = 'relevance'
+    cursor: str | None = None
+    limit: int = Field(default=settings.offers_page_size, ge=1, le=settings.offers_page_max)
+
+
+class OffersPage(BaseModel):
+    """
+    Schema for a page of cached offers.
+
+    Attributes:
+        offers: list[list[str | None]]: The offers as rows of fields.
+        total: int: The amount of offers matching the query.
+        next_cursor: str | None: The cursor of the next page, None
+         if this page is the last one.
+    """
+    offers: list[list[str | None]]
+    total: int
+    next_cursor: str | None = None
@@ -3,11 +3,56 @@
 """Description of classes related to `BeautifulSoup` management."""
 from typing import Any
 import re
+import logging
 from abc import ABC, abstractmethod
+from importlib.util import find_spec
 
-from bs4 import BeautifulSoup, Tag, NavigableString
+from bs4 import BeautifulSoup, SoupStrainer, Tag, NavigableString
 
 from exceptions import TagNotFindError
+from .offers import Offer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PARSER_TYPE = 'html.parser'
+PARSER_LIBRARIES: dict[str, str | None] = {
+    'lxml': 'lxml',
+    'html5lib': 'html5lib',
+    DEFAULT_PARSER_TYPE: None
+}
+
+
+def is_parser_installed(parser_type: str) -> bool:
+    """
+    Checks whether the library of a tree builder is installed.
+
+    :param parser_type: str: The name of the builder.
+    :return: bool: True if the builder can be used, False otherwise.
+    """
+    library = PARSER_LIBRARIES.get(parser_type)
+    return library is None or find_spec(library) is not None
+
+
+def resolve_parser_type(parser_type: str) -> str:
+    """
+    Returns the BeautifulSoup tree builder to parse pages with.
+
+    Falls back to the pure-Python `html.parser` if the library of
+    the requested builder is not installed.
+
+    :param parser_type: str: The preferred builder, one of the keys
+     of `PARSER_LIBRARIES`.
+    :return: str: The name of an installed builder.
+    :raises ValueError: If the builder is not supported.
+    """
+    if parser_type not in PARSER_LIBRARIES:
+        raise ValueError(f'Unsupported parser type {parser_type!r}.'
+                         f' Allowed types are {tuple(PARSER_LIBRARIES)}')
+    if not is_parser_installed(parser_type):
+        logger.warning('Parser type %r is not installed, using %r',
+                       parser_type, DEFAULT_PARSER_TYPE)
+        return DEFAULT_PARSER_TYPE
+    return parser_type
 
 
 class AbstractSoup(ABC):
@@ -20,24 +65,35 @@ class AbstractSoup(ABC):
     We can pass any parser type for parsing processes.
     """
 
-    def __init__(self, content: str, parser_type: str) -> None:
+    def __init__(self, content: str, parser_type: str,
+                 parse_only: SoupStrainer | None = None) -> None:
         """
         Initializes the AbstractSoup with content and parser type.
 
         :param content: str: The HTML content to be parsed.
         :param parser_type: str: The parser type to use
          with BeautifulSoup.
+        :param parse_only: SoupStrainer | None: The strainer limiting
+         the tree of the content to the needed tags. The whole content
+         is parsed if None.
         """
         super().__init__()
         self.beautiful_soup: type[BeautifulSoup] = BeautifulSoup
         self.content: str = content
         self.parser_type: str = parser_type
+        self.parse_only: SoupStrainer | None = parse_only
+        self._tree: BeautifulSoup | None = None
+        self._tree_source: str | None = None
 
     @abstractmethod
-    def create_soup(self, content: str) -> BeautifulSoup:
+    def create_soup(self, content: str,
+                    parse_only: SoupStrainer | None = None) -> BeautifulSoup:
         """
         Create a BeautifulSoup object from the gotten content.
 
+        :param content: str: The HTML content to be parsed.
+        :param parse_only: SoupStrainer | None: The strainer limiting
+         the tree to the matched tags and their subtrees.
         :return: BeautifulSoup: The BeautifulSoup object initialized.
         """
 
@@ -52,6 +108,7 @@ class AbstractSoup(ABC):
 
         :param name: str: The name of the tag to find.
         :param content: str: The content of the defined page to parsing.
+         Only the searched tag of it is built into a tree.
         :param attrs: dict[str, str] | None: A dictionary of attributes
          to filter the tag.
         :param recursive: bool: Whether to search recursively.
@@ -80,18 +137,43 @@ class BaseSoup(AbstractSoup):
     :param content: str: The content to be parsed.
     :param parser_type: str: The type of parser to be used
      by BeautifulSoup.
+    :param parse_only: SoupStrainer | None: The strainer limiting
+     the tree of the content.
     """
 
-    def create_soup(self, content: str) -> BeautifulSoup:
-        soup: BeautifulSoup = self.beautiful_soup(content, self.parser_type)
+    @property
+    def soup(self) -> BeautifulSoup:
+        """
+        The parse tree of `content`, built on the first access.
+
+        The tree is kept while `content` refers to the same string
+        object, so repeated lookups don't parse the page again. Only
+        the tags matched by `parse_only` are built if it is set.
+
+        :return: BeautifulSoup: The parse tree of the instance content.
+        """
+        if self._tree is None or self._tree_source is not self.content:
+            self._tree = self.create_soup(self.content, self.parse_only)
+            self._tree_source = self.content
+        return self._tree
+
+    def create_soup(self, content: str,
+                    parse_only: SoupStrainer | None = None) -> BeautifulSoup:
+        if self.parser_type == 'html5lib':
+            # html5lib always builds the whole document tree.
+            parse_only = None
+        soup: BeautifulSoup = self.beautiful_soup(content, self.parser_type,
+                                                  parse_only=parse_only)
         return soup
 
     def get_tag(self, name: str, content: str | None = None,
                 attrs: dict[str, str] | None = None,
                 recursive: bool = True, **kwargs: dict[str, Any]
                 ) -> Tag | NavigableString | None:
-        content = content if content is not None else self.content
-        soup: BeautifulSoup = self.create_soup(content)
+        if content is None or content is self.content:
+            soup: BeautifulSoup = self.soup
+        else:
+            soup = self.create_soup(content, SoupStrainer(name, attrs=attrs or {}))
         tag: Tag | NavigableString | None = (
             soup.find(name, attrs=attrs)) if attrs else soup.find(name)
         return tag
@@ -106,21 +188,31 @@ class HHSoup(BaseSoup):
 
     :param content: str: The content to be parsed.
     :param parser_type: str: The type of parser to be used by BeautifulSoup.
+    :param parse_only: SoupStrainer | None: The strainer limiting
+     the tree of the content, e.g. to the search results block.
     """
 
-    def __init__(self, content: str, parser_type: str):
-        super().__init__(content, parser_type)
+    card_class = re.compile('vacancy-card--z')
+    compensation_class = re.compile('compensation-labels--')
+    company_class = re.compile('company-info-text--')
+    employer_data_qa = re.compile('vacancy-serp_')
+    pager_attrs = {'data-qa': 'pager-page'}
+    page_number = re.compile(r'[?&]page=(\d+)')
+
+    def __init__(self, content: str, parser_type: str,
+                 parse_only: SoupStrainer | None = None):
+        super().__init__(content, parser_type, parse_only)
         self.offers_amount: int = 0
         self.offers_links: list[str] | None = None
         self.offers_list: list[Tag] | None = None
-        self.parsed_offers: list[list[str]] | None = None
+        self.parsed_offers: list[Offer] | None = None
         self.descriptions: list[str] | None = None
 
     def parse_content(self, tag: Tag | NavigableString | None) -> None:
         if tag is None:
             raise TagNotFindError('The tag was not found. Can\'t process empty list.')
         self.offers_list = tag.find_all('div',  # type: ignore
-                                        attrs={'class': re.compile('vacancy-card--z')})
+                                        attrs={'class': self.card_class})
         self.parsed_offers = []
         self.offers_links = []
         self.split_parse_content()
@@ -139,10 +231,9 @@ class HHSoup(BaseSoup):
         """
         assert isinstance(self.offers_list, list)
         for offer in self.offers_list:
-            header = offer.find('h2')
+            header, data, company = self._find_card_tags(offer)
             name = header.text  # type: ignore
-            link = header.find('a').attrs.get('href')  # type: ignore
-            data = offer.find('div', class_=re.compile('compensation-labels--'))
+            link = header.a.attrs.get('href')  # type: ignore
             next_element = data.next  # type: ignore
 
             if next_element.name == 'div':  # type: ignore
@@ -153,25 +244,88 @@ class HHSoup(BaseSoup):
                           .replace('\xa0', ' '))
                 exp = next_element.next_sibling  # type: ignore
             remote = exp.next_sibling  # type: ignore
-            company = offer.find('span', class_=re.compile('company-info-text--'))
-            if company is None:
-                company = offer.find('a', attrs={'data-qa': re.compile('vacancy-serp_')})
             company = company.text.replace('\xa0', ' ')  # type: ignore
             exp = exp.text if exp else exp
             remote = remote.text if remote else remote
-            self.parsed_offers.append([name, salary, exp, remote,  # type: ignore
-                                       company, link])  # type: ignore
+            self.parsed_offers.append(Offer(name, salary, exp, remote,  # type: ignore
+                                            company, link))  # type: ignore
             self.offers_links.append(link)  # type: ignore
 
-    def parse_descriptions(self, extra_content: str) -> str:
+    def page_count(self) -> int:
+        """
+        Counts the pages of the search results by the pager links.
+
+        The pager is read from the tree of the page, so a strained
+        tree has to keep the pager block.
+
+        :return: int: The amount of pages, 1 if there is no pager.
+        """
+        pages = [0]
+        for link in self.soup.find_all('a', attrs=self.pager_attrs):
+            href = link.get('href')
+            match = self.page_number.search(href) if isinstance(href, str) else None
+            if match:
+                pages.append(int(match.group(1)))
+        return max(pages) + 1
+
+    def _find_card_tags(self, offer: Tag) -> tuple[Tag | None, Tag | None, Tag | None]:
+        """
+        Finds the header, compensation block and company of an offer
+        card in one walk over its tags.
+
+        The company is the first `company-info-text--` span or, if
+        the card has none, the first employer link.
+
+        :param offer: Tag: The offer card.
+        :return: tuple[Tag | None, Tag | None, Tag | None]: The first
+         `h2`, the compensation `div` and the company tag.
+        """
+        header: Tag | None = None
+        compensation: Tag | None = None
+        company: Tag | None = None
+        employer: Tag | None = None
+        for node in offer.descendants:
+            if not isinstance(node, Tag):
+                continue
+            if node.name == 'h2':
+                header = header or node
+            elif node.name == 'div':
+                if compensation is None and self._has_class(node, self.compensation_class):
+                    compensation = node
+            elif node.name == 'span':
+                if company is None and self._has_class(node, self.company_class):
+                    company = node
+            elif node.name == 'a':
+                data_qa = node.get('data-qa')
+                if (employer is None and isinstance(data_qa, str)
+                        and self.employer_data_qa.search(data_qa)):
+                    employer = node
+        return header, compensation, company or employer
+
+    @staticmethod
+    def _has_class(node: Tag, pattern: re.Pattern[str]) -> bool:
+        """
+        Checks whether any class of the tag matches the pattern.
+
+        :param node: Tag: The checked tag.
+        :param pattern: re.Pattern[str]: The compiled class pattern.
+        :return: bool: True if a class matches, False otherwise.
+        """
+        classes = node.get('class') or ()
+        return any(pattern.search(css_class) for css_class in classes)
+
+    def parse_descriptions(self, extra_content: str | None = None) -> str:
         """
         Parses job descriptions from additional content.
 
         This method extracts and processes job descriptions from the
-        given `extra_content`. The descriptions are appended to
-        `self.descriptions`.
+        given `extra_content`, so one instance can serve as extractor
+        for any amount of offer pages. The content is parsed once and
+        is not cached on the instance.
 
-        :param extra_content: str: The HTML content containing additional job details.
+        :param extra_content: str | None: The HTML content containing
+         additional job details. The instance content is used if None.
+        :return: str: The single line description text.
         """
         self.descriptions = []
         text_block = self.get_tag('div', content=extra_content,
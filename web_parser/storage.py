@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Contains the database store of scraped offers."""
+import logging
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Any, Collection, Iterable
+
+from sqlalchemy import case, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from db_utils import session_manager
+from settings import settings
+from .models import StoredOffer
+from .offers import Offer
+
+logger = logging.getLogger(__name__)
+
+
+class OfferStore:
+    """
+    Keeps the history of scraped offers in the `offers` table.
+
+    Offers are upserted by their vacancy id in batches: new vacancies
+    are inserted, known ones get their fields and `last_seen` updated,
+    while `first_seen` stays as it was. A description is kept when a
+    run doesn't fetch it, unless the card of the vacancy has changed,
+    and `described_at` keeps the time it was fetched. Descriptions
+    reused from the store are not written again, so they age and are
+    fetched anew after `description_ttl`.
+    """
+
+    def __init__(self, batch_size: int = settings.offers_upsert_batch_size) -> None:
+        """
+        Initializes the OfferStore with the size of upsert batches.
+
+        :param batch_size: int: The amount of offers per statement.
+        """
+        self.batch_size: int = batch_size
+
+    async def upsert(self, offers: Iterable[Offer], seen_at: datetime | None = None,
+                     reused: Collection[int] = ()) -> int:
+        """
+        Stores scraped offers.
+
+        Offers without a vacancy id in their link are skipped.
+
+        :param offers: Iterable[Offer]: The scraped offers.
+        :param seen_at: datetime | None: The time of the scraping,
+         now if None.
+        :param reused: Collection[int]: The vacancy ids of offers which
+         descriptions were taken from the store, not fetched.
+        :return: int: The amount of stored offers.
+        """
+        seen_at = seen_at or datetime.now(timezone.utc)
+        rows: dict[int, dict[str, Any]] = {}
+        for offer in offers:
+            vacancy_id = offer.vacancy_id
+            if vacancy_id is None:
+                logger.warning('Offer %r has no vacancy id, it is not stored', offer)
+                continue
+            rows[vacancy_id] = self.to_row(vacancy_id, offer, seen_at,
+                                           fetched=vacancy_id not in reused)
+        values = iter(rows.values())
+        async with session_manager.async_session_local() as session:
+            statement = self._upsert_statement(session.get_bind().dialect.name)
+            while batch := list(islice(values, self.batch_size)):
+                await session.execute(statement, batch)
+            await session.commit()
+        return len(rows)
+
+    async def known_descriptions(self, offers: Iterable[Offer],
+                                 ttl: int = settings.description_ttl) -> dict[int, str]:
+        """
+        Finds stored descriptions which are still valid for offers.
+
+        A description is valid if it was fetched less than `ttl`
+        seconds ago and the card of the vacancy hasn't changed since.
+
+        :param offers: Iterable[Offer]: The scraped offers.
+        :param ttl: int: The lifetime of a description in seconds.
+        :return: dict[int, str]: The descriptions by vacancy ids.
+        """
+        hashes = {offer.vacancy_id: offer.content_hash
+                  for offer in offers if offer.vacancy_id is not None}
+        if not hashes:
+            return {}
+        fresh_since = datetime.now(timezone.utc) - timedelta(seconds=ttl)
+        async with session_manager.async_session_local() as session:
+            rows = await session.execute(
+                select(StoredOffer.id, StoredOffer.content_hash, StoredOffer.description)
+                .where(StoredOffer.id.in_(hashes),
+                       StoredOffer.description.is_not(None),
+                       StoredOffer.described_at >= fresh_since)
+            )
+        return {vacancy_id: description for vacancy_id, content_hash, description in rows
+                if hashes[vacancy_id] == content_hash}
+
+    @staticmethod
+    def to_row(vacancy_id: int, offer: Offer, seen_at: datetime,
+               fetched: bool = True) -> dict[str, Any]:
+        """
+        Converts an offer to the values of its table row.
+
+        :param vacancy_id: int: The vacancy id of the offer.
+        :param offer: Offer: The offer.
+        :param seen_at: datetime: The time of the scraping.
+        :param fetched: bool: Whether the description was fetched by
+         the scraping. A reused description is left out, so the stored
+         one and its `described_at` are kept.
+        :return: dict[str, Any]: The column values.
+        """
+        description = offer.description if fetched else None
+        salary_from, salary_to = offer.salary_bounds
+        return {'id': vacancy_id, 'name': offer.name, 'salary': offer.salary,
+                'salary_from': salary_from, 'salary_to': salary_to,
+                'salary_currency': offer.salary_currency, 'exp': offer.exp,
+                'remote': offer.remote, 'company': offer.company, 'link': offer.link,
+                'description': description, 'content_hash': offer.content_hash,
+                'described_at': seen_at if description is not None else None,
+                'first_seen': seen_at, 'last_seen': seen_at}
+
+    @staticmethod
+    def _upsert_statement(dialect: str) -> Any:
+        """
+        Creates the dialect specific upsert of offers.
+
+        :param dialect: str: The name of the database dialect.
+        :return: Any: The insert updating conflicting rows.
+        """
+        insert: postgresql.Insert | sqlite.Insert = (
+            postgresql.insert(StoredOffer) if dialect == 'postgresql'
+            else sqlite.insert(StoredOffer)
+        )
+        updated: dict[str, Any] = {
+            column: insert.excluded[column]
+            for column in ('name', 'salary', 'salary_from', 'salary_to', 'salary_currency',
+                           'exp', 'remote', 'company', 'link', 'content_hash', 'last_seen')
+        }
+        for column in ('description', 'described_at'):
+            updated[column] = case(
+                (insert.excluded.description.is_not(None), insert.excluded[column]),
+                (insert.excluded.content_hash == StoredOffer.content_hash,
+                 getattr(StoredOffer, column)),
+                else_=None
+            )
+        return insert.on_conflict_do_update(index_elements=[StoredOffer.id], set_=updated)
+
+
+offer_store = OfferStore()
@@ -1,14 +1,83 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """Contains tests for `parse` module checking."""
-from typing import AsyncGenerator
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import AsyncGenerator, AsyncIterator, Callable
 
+import asyncio
 import pytest
-from playwright.async_api import BrowserContext, Page, Browser
+from bs4 import SoupStrainer
+from fakeredis import FakeAsyncRedis
+from fastapi import HTTPException, Request
+from playwright.async_api import BrowserContext, Page, Browser, Error as PlaywrightError
+from sqlalchemy import select
 
-from conftest import TestPlaywrightSetup
-from .parsers import BaseParser, USER_AGENTS
-from .soups import BaseSoup
+import worker
+from auth import AuthHandler
+from conftest import TestAuthSetup, TestPlaywrightSetup, TestRedisSetup
+from exceptions import JobFailedError
+from db_utils import session_manager
+from settings import settings
+from .parsers import BaseParser, HHParser, HH_URL, USER_AGENTS
+from .soups import (
+    BaseSoup,
+    HHSoup,
+    PARSER_LIBRARIES,
+    DEFAULT_PARSER_TYPE,
+    is_parser_installed,
+    resolve_parser_type
+)
+from .browser_pool import BrowserPool, browser_pool
+from .caching import CacheManager
+from .crawling import HHCrawler, HHSearchParser
+from .endpoints import job_errors, owned_job
+from .events import JobEvents, format_event, negotiate_stream
+from .extraction import Extractor, extractor
+from .indexing import OfferIndex
+from .jobs import JobManager, job_manager
+from .models import StoredOffer
+from .offers import Offer
+from .payloads import PayloadCodec
+from .progress import ScrapeProgress
+from .schemas import CrawlSpec, JobRequest, JobStatus, OfferQuery
+from .storage import OfferStore
+from .throttling import HostRateLimiter
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def read_fixture(name: str) -> str:
+    """
+    Reads a saved HH page from the fixtures directory.
+
+    :param name: str: The file name of the saved page.
+    :return: str: The HTML content of the page.
+    """
+    with open(os.path.join(FIXTURES_DIR, name), 'r', encoding='utf-8') as file:
+        return file.read()
+
+
+SERP_RESULTS_ATTRS = {'data-qa': 'vacancy-serp__results'}
+
+
+def parse_serp(parser_type: str, parse_only: SoupStrainer | None = None) -> HHSoup:
+    """
+    Parses the saved search results page the same way `HHParser` does.
+
+    :param parser_type: str: The tree builder to parse the page with.
+    :param parse_only: SoupStrainer | None: The strainer limiting
+     the tree of the page.
+    :return: HHSoup: The soup instance filled with parsed offers.
+    """
+    soup_instance = HHSoup(read_fixture('hh_serp.html'), parser_type, parse_only)
+    tag = soup_instance.get_tag('div', attrs=SERP_RESULTS_ATTRS)
+    soup_instance.parse_content(tag)
+    return soup_instance
 
 
 @pytest.mark.asyncio
@@ -122,3 +191,1526 @@ class TestSoups(TestPlaywrightSetup):
         """
         with pytest.raises(AttributeError):
             await BaseParser(self.url)._create_page(1)  # type: ignore
+
+
+@pytest.mark.asyncio
+class TestHostRateLimiter:
+    """Class grouping tests of requests spacing per host."""
+
+    async def test_same_host_is_spaced(self) -> None:
+        """
+        Tests that requests to the same host wait for their slot.
+
+        :return: None
+        :raises AssertionError: If the third request is released
+         earlier than two intervals after the first one.
+        """
+        limiter = HostRateLimiter(rate=20)
+        started = time.monotonic()
+        for _ in range(3):
+            await limiter.wait('https://hh.ru/vacancy/1')
+        assert time.monotonic() - started >= 2 * limiter.interval * 0.9
+
+    async def test_other_hosts_are_independent(self) -> None:
+        """
+        Tests that requests to different hosts do not wait each other.
+
+        :return: None
+        :raises AssertionError: If a request to another host waits.
+        """
+        limiter = HostRateLimiter(rate=1)
+        await limiter.wait('https://hh.ru/vacancy/1')
+        started = time.monotonic()
+        await limiter.wait('https://spb.hh.ru/vacancy/2')
+        assert time.monotonic() - started < limiter.interval / 2
+
+    async def test_zero_rate_disables_limiting(self) -> None:
+        """
+        Tests that non-positive rate disables limiting.
+
+        :return: None
+        :raises AssertionError: If the interval is not zero.
+        """
+        limiter = HostRateLimiter(rate=0)
+        await limiter.wait('https://hh.ru/vacancy/1')
+        assert limiter.interval == 0
+
+
+class FakePage:
+    """
+    Stand-in of a Playwright page counting the pages open at once.
+    """
+
+    opened: int = 0
+    most_opened: int = 0
+
+    def __init__(self, failing: str) -> None:
+        """
+        Initializes the FakePage and counts it as open.
+
+        :param failing: str: The link failing to load.
+        """
+        self.failing: str = failing
+        self.closed: bool = False
+        FakePage.opened += 1
+        FakePage.most_opened = max(FakePage.most_opened, FakePage.opened)
+
+    async def goto(self, link: str) -> None:
+        """
+        Loads a link, failing for `failing`.
+
+        :param link: str: The link to load.
+        :return: None
+        :raises PlaywrightError: If the link is `failing`.
+        """
+        await asyncio.sleep(0.01)
+        if link == self.failing:
+            raise PlaywrightError('net::ERR_CONNECTION_RESET')
+
+    async def wait_for_load_state(self, state: str) -> None:
+        """
+        Waits for nothing, the page is loaded by `goto`.
+
+        :param state: str: The awaited state.
+        :return: None
+        """
+
+    async def content(self) -> str:
+        """
+        Returns the saved offer page.
+
+        :return: str: The HTML of the page.
+        """
+        return read_fixture('hh_vacancy.html')
+
+    async def close(self) -> None:
+        """
+        Closes the page.
+
+        :return: None
+        """
+        assert not self.closed
+        self.closed = True
+        FakePage.opened -= 1
+
+
+@pytest.mark.asyncio
+class TestOfferPages:
+    """Class grouping tests of loading offer pages concurrently."""
+
+    async def test_bounded_concurrency(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """
+        Tests that at most `concurrency` pages are open at once, every
+        page is closed and a failed page only loses its offer.
+
+        :param monkeypatch: MonkeyPatch: The patcher of the pages and
+         the browser pool of the parser.
+        :return: None
+        :raises AssertionError: If too many pages are open, a page is
+         left open or the failure stops the others.
+        """
+        soup_instance = parse_serp(DEFAULT_PARSER_TYPE)
+        assert soup_instance.offers_links is not None
+        soup_instance.offers_links *= 3
+        soup_instance.parsed_offers = (soup_instance.parsed_offers or []) * 3
+        failing = soup_instance.offers_links[1]
+
+        @asynccontextmanager
+        async def context(_: object) -> AsyncIterator[None]:
+            yield None
+
+        async def create_page(_: object) -> FakePage:
+            return FakePage(failing)
+
+        parser = HHParser(HH_URL, store=None)
+        parser.concurrency = 3
+        parser.rate_limiter = HostRateLimiter(rate=0)
+        parser.extractor = Extractor(processes=0)
+        monkeypatch.setattr(parser.browser_pool, 'context', context)
+        monkeypatch.setattr(parser, '_create_page', create_page)
+        monkeypatch.setattr(FakePage, 'opened', 0)
+        monkeypatch.setattr(FakePage, 'most_opened', 0)
+        await parser.parse_many(soup_instance)
+        assert FakePage.most_opened == parser.concurrency
+        assert FakePage.opened == 0
+        assert parser.progress.errors == 3
+        assert parser.progress.descriptions_fetched == 9
+
+
+class FakeBrowser:
+    """
+    Stand-in of a launched Playwright browser and its contexts.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initializes the FakeBrowser as connected.
+        """
+        self.connected: bool = True
+        self.closed: bool = False
+        self.handlers: dict[str, Callable[..., None]] = {}
+        self.contexts: list[FakeBrowser] = []
+
+    def is_connected(self) -> bool:
+        """
+        Tells whether the browser is connected.
+
+        :return: bool: The state set by the test.
+        """
+        return self.connected
+
+    async def close(self) -> None:
+        """
+        Closes the browser or its context.
+
+        :return: None
+        """
+        self.closed = True
+
+    async def new_context(self, **_: str) -> 'FakeBrowser':
+        """
+        Creates a fake context on the browser.
+
+        :return: FakeBrowser: The context.
+        """
+        self.contexts.append(FakeBrowser())
+        return self.contexts[-1]
+
+    def on(self, event: str, handler: Callable[..., None]) -> None:
+        """
+        Subscribes to an event of the context or a page.
+
+        :param event: str: The name of the event.
+        :param handler: Callable: The handler of the event.
+        :return: None
+        """
+        self.handlers[event] = handler
+
+
+class FakeChromium:
+    """
+    Stand-in of the Playwright driver launching fake browsers.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initializes the FakeChromium without browsers.
+        """
+        self.chromium = self
+        self.browsers: list[FakeBrowser] = []
+
+    async def launch(self) -> FakeBrowser:
+        """
+        Launches a fake browser.
+
+        :return: FakeBrowser: The launched browser.
+        """
+        self.browsers.append(FakeBrowser())
+        return self.browsers[-1]
+
+    async def stop(self) -> None:
+        """
+        Stops the driver.
+
+        :return: None
+        """
+
+
+@pytest.mark.asyncio
+class TestBrowserPool:
+    """Class grouping tests of the pool of browsers."""
+
+    @staticmethod
+    def pool_of(size: int, max_navigations: int = 100) -> tuple[BrowserPool, FakeChromium]:
+        """
+        Creates a started pool launching fake browsers.
+
+        :param size: int: The size of the pool.
+        :param max_navigations: int: Navigations before recycling.
+        :return: tuple[BrowserPool, FakeChromium]: The pool and its
+         driver.
+        """
+        driver = FakeChromium()
+        pool = BrowserPool(size, max_navigations)
+        pool._playwright = driver  # type: ignore[assignment]
+        pool._slots = asyncio.Semaphore(size)
+        return pool, driver
+
+    @staticmethod
+    async def new_context(browser: FakeBrowser) -> FakeBrowser:
+        """
+        Creates a fake context on a fake browser.
+
+        :param browser: FakeBrowser: The borrowed browser.
+        :return: FakeBrowser: The context.
+        """
+        return await browser.new_context()
+
+    async def test_size_limit(self) -> None:
+        """
+        Tests that at most `size` browsers are borrowed at once and
+        returned browsers are reused.
+
+        :return: None
+        :raises AssertionError: If the pool lends too many browsers.
+        """
+        pool, driver = self.pool_of(2)
+        borrowed: list[int] = [0, 0]
+
+        async def borrow() -> None:
+            async with pool.context(self.new_context):  # type: ignore[arg-type]
+                borrowed[0] += 1
+                borrowed[1] = max(borrowed)
+                await asyncio.sleep(0.01)
+                borrowed[0] -= 1
+
+        await asyncio.gather(*(borrow() for _ in range(6)))
+        assert borrowed[1] == 2
+        assert len(driver.browsers) == 2
+        contexts = [context for browser in driver.browsers for context in browser.contexts]
+        assert len(contexts) == 6 and all(context.closed for context in contexts)
+        assert not any(browser.closed for browser in driver.browsers)
+
+    async def test_recycles_after_navigations(self) -> None:
+        """
+        Tests that a browser is closed after `max_navigations` main
+        frame navigations and a new one is launched.
+
+        :return: None
+        :raises AssertionError: If the browser is not recycled.
+        """
+        pool, driver = self.pool_of(1, max_navigations=2)
+        main_frame = SimpleNamespace(parent_frame=None)
+        child_frame = SimpleNamespace(parent_frame=main_frame)
+        for frames, recycled in (((main_frame, child_frame), False), ((main_frame,), True)):
+            async with pool.context(self.new_context):  # type: ignore[arg-type]
+                page = FakeBrowser()
+                driver.browsers[0].contexts[-1].handlers['page'](page)
+                for frame in frames:
+                    page.handlers['framenavigated'](frame)
+            assert driver.browsers[0].closed is recycled
+        async with pool.context(self.new_context):  # type: ignore[arg-type]
+            pass
+        assert len(driver.browsers) == 2 and not driver.browsers[1].closed
+
+    async def test_replaces_disconnected(self) -> None:
+        """
+        Tests that a disconnected browser is closed and replaced on
+        checkout.
+
+        :return: None
+        :raises AssertionError: If the disconnected browser is lent.
+        """
+        pool, driver = self.pool_of(1)
+        async with pool.context(self.new_context):  # type: ignore[arg-type]
+            pass
+        driver.browsers[0].connected = False
+        async with pool.context(self.new_context):  # type: ignore[arg-type]
+            pass
+        assert len(driver.browsers) == 2 and driver.browsers[1].contexts
+        assert driver.browsers[0].closed
+        await pool.stop()
+        assert driver.browsers[1].closed
+
+
+class TestBaseSoupTree:
+    """Class grouping tests of the parse tree caching in soups."""
+
+    content = '<div class="a"><p>first</p><span>second</span></div>'
+
+    def test_tree_is_parsed_once(self) -> None:
+        """
+        Tests that repeated lookups reuse the same parse tree.
+
+        :return: None
+        :raises AssertionError: If the tree is built again.
+        """
+        soup_instance = HHSoup(self.content, 'html.parser')
+        assert soup_instance.get_tag('p').text == 'first'  # type: ignore
+        tree = soup_instance.soup
+        assert soup_instance.get_tag('span').text == 'second'  # type: ignore
+        assert soup_instance.soup is tree
+
+    def test_tree_follows_content(self) -> None:
+        """
+        Tests that replacing the content invalidates the cached tree.
+
+        :return: None
+        :raises AssertionError: If the old tree is used for new content.
+        """
+        soup_instance = BaseSoup(self.content, 'html.parser')
+        tree = soup_instance.soup
+        soup_instance.content = '<p>replaced</p>'
+        assert soup_instance.soup is not tree
+        assert soup_instance.get_tag('p').text == 'replaced'  # type: ignore
+
+    def test_extra_content_is_not_cached(self) -> None:
+        """
+        Tests that lookups in extra content keep the instance tree.
+
+        :return: None
+        :raises AssertionError: If the instance tree is replaced.
+        """
+        soup_instance = HHSoup(self.content, 'html.parser')
+        tree = soup_instance.soup
+        description = soup_instance.parse_descriptions(
+            '<div class="vacancy-description"> Some   text\n here </div>'
+        )
+        assert description == 'Some text here'
+        assert soup_instance.soup is tree
+
+
+class TestParserTypes:
+    """
+    Class grouping equivalence tests of the supported tree builders
+    on saved HH pages.
+    """
+
+    available_types = [
+        pytest.param(parser_type, marks=pytest.mark.skipif(
+            not is_parser_installed(parser_type),
+            reason=f'{parser_type} is not installed'
+        ))
+        for parser_type in PARSER_LIBRARIES
+    ]
+    strainable_types = [param for param in available_types
+                        if param.values[0] != 'html5lib']
+
+    def test_default_parser_result(self) -> None:
+        """
+        Tests the offers parsed by the default builder.
+
+        :return: None
+        :raises AssertionError: If parsed offers differ from the page.
+        """
+        soup_instance = parse_serp(DEFAULT_PARSER_TYPE)
+        assert soup_instance.parsed_offers is not None
+        assert len(soup_instance.parsed_offers) == 4
+        assert soup_instance.parsed_offers[0].as_row() == [
+            'Python-разработчик (Middle)',
+            'от 150 000 до 250 000 ₽ за месяц, на руки',
+            'Опыт 1–3 года',
+            'Можно удалённо',
+            'ООО Ромашка Софт',
+            'https://hh.ru/vacancy/100000001?query=Python&hhtmFrom=vacancy_search_list',
+            None
+        ]
+        assert soup_instance.parsed_offers[1].salary is None
+        assert soup_instance.parsed_offers[1].company == 'ИП Иванов'
+        assert soup_instance.parsed_offers[2].remote is None
+
+    @pytest.mark.parametrize('parser_type', available_types)
+    def test_offers_equivalence(self, parser_type: str) -> None:
+        """
+        Tests that the builder parses the same offers as the default one.
+
+        :param parser_type: str: The tested tree builder.
+        :return: None
+        :raises AssertionError: If parsed offers or links differ.
+        """
+        expected = parse_serp(DEFAULT_PARSER_TYPE)
+        soup_instance = parse_serp(parser_type)
+        assert soup_instance.parsed_offers == expected.parsed_offers
+        assert soup_instance.offers_links == expected.offers_links
+
+    @pytest.mark.parametrize('parser_type', available_types)
+    def test_description_equivalence(self, parser_type: str) -> None:
+        """
+        Tests that the builder parses the same description as
+        the default one.
+
+        :param parser_type: str: The tested tree builder.
+        :return: None
+        :raises AssertionError: If parsed descriptions differ.
+        """
+        content = read_fixture('hh_vacancy.html')
+        expected = HHSoup('', DEFAULT_PARSER_TYPE).parse_descriptions(content)
+        description = HHSoup('', parser_type).parse_descriptions(content)
+        assert description.startswith('Мы ищем Python-разработчика')
+        assert 'Задайте' not in description
+        assert description == expected
+
+    @pytest.mark.parametrize('parser_type', available_types)
+    def test_strained_offers_equivalence(self, parser_type: str) -> None:
+        """
+        Tests that parsing only the results block gives the same offers
+        as parsing the whole page.
+
+        :param parser_type: str: The tested tree builder.
+        :return: None
+        :raises AssertionError: If parsed offers differ.
+        """
+        expected = parse_serp(DEFAULT_PARSER_TYPE)
+        soup_instance = parse_serp(parser_type, SoupStrainer('div', attrs=SERP_RESULTS_ATTRS))
+        assert soup_instance.parsed_offers == expected.parsed_offers
+
+    @pytest.mark.parametrize('parser_type', strainable_types)
+    def test_strained_tree_is_partial(self, parser_type: str) -> None:
+        """
+        Tests that the strained tree contains only the results block.
+
+        :param parser_type: str: The tested tree builder.
+        :return: None
+        :raises AssertionError: If tags outside the block are built.
+        """
+        soup_instance = parse_serp(parser_type, SoupStrainer('div', attrs=SERP_RESULTS_ATTRS))
+        assert soup_instance.soup.find('footer') is None
+        assert soup_instance.soup.find('title') is None
+
+    def test_unsupported_parser_type(self) -> None:
+        """
+        Tests that an unknown builder name is rejected.
+
+        :return: None
+        :raises ValueError: If the builder is not supported.
+        """
+        with pytest.raises(ValueError):
+            resolve_parser_type('selectolax')
+
+
+class TestOffer:
+    """Class grouping tests of the parsed offer record."""
+
+    def test_dump_and_load(self) -> None:
+        """
+        Tests that offers survive the JSON round trip.
+
+        :return: None
+        :raises AssertionError: If loaded offers differ.
+        """
+        offers = parse_serp(DEFAULT_PARSER_TYPE).parsed_offers
+        assert offers is not None
+        offers[0].description = 'Описание'
+        assert Offer.load_many(Offer.dump_many(offers)) == offers
+
+    def test_rows_have_fixed_shape(self) -> None:
+        """
+        Tests that every serialized offer has all the fields.
+
+        :return: None
+        :raises AssertionError: If a row is ragged.
+        """
+        offer = Offer('Python developer', None, 'Без опыта', None, 'Company', 'link')
+        rows = json.loads(Offer.dump_many([offer]))
+        assert rows == [['Python developer', None, 'Без опыта', None,
+                         'Company', 'link', None]]
+        assert len(rows[0]) == len(Offer.fields)
+
+    def test_vacancy_id(self) -> None:
+        """
+        Tests that the vacancy id is taken from the offer link.
+
+        :return: None
+        :raises AssertionError: If the id is wrong.
+        """
+        offers = parse_serp(DEFAULT_PARSER_TYPE).parsed_offers
+        assert offers is not None
+        assert [offer.vacancy_id for offer in offers] == [100000001, 100000002,
+                                                          100000003, 100000004]
+        assert Offer('name', None, None, None, 'Company', 'link').vacancy_id is None
+
+    @pytest.mark.parametrize('salary, bounds', [
+        ('от 150 000 до 250 000 ₽ за месяц, на руки', (150000, 250000)),
+        ('от 60 000 ₽ за месяц, на руки', (60000, None)),
+        ('до 3 000 $ за месяц, до вычета налогов', (None, 3000)),
+        ('100 000 – 120 000 ₽', (100000, 120000)),
+        ('90 000 ₽', (90000, 90000)),
+        (None, (None, None)),
+    ])
+    def test_salary_bounds(self, salary: str | None,
+                           bounds: tuple[int | None, int | None]) -> None:
+        """
+        Tests that salary bounds are parsed from the salary text.
+
+        :param salary: str | None: The salary text.
+        :param bounds: tuple[int | None, int | None]: The expected
+         bounds.
+        :return: None
+        :raises AssertionError: If the bounds are wrong.
+        """
+        assert Offer('name', salary, None, None, 'Company', 'link').salary_bounds == bounds
+
+    @pytest.mark.parametrize('salary, currency', [
+        ('от 150 000 до 250 000 ₽ за месяц, на руки', 'RUR'),
+        ('до 3 000 $ за месяц, до вычета налогов', 'USD'),
+        ('от 2 500 € за месяц', 'EUR'),
+        ('от 400 000 ₸ за месяц', 'KZT'),
+        ('по договорённости', None),
+        (None, None),
+    ])
+    def test_salary_currency(self, salary: str | None, currency: str | None) -> None:
+        """
+        Tests that the salary currency is taken from its sign.
+
+        :param salary: str | None: The salary text.
+        :param currency: str | None: The expected currency code.
+        :return: None
+        :raises AssertionError: If the currency is wrong.
+        """
+        assert Offer('name', salary, None, None, 'Company', 'link').salary_currency == currency
+
+    def test_content_hash_ignores_description(self) -> None:
+        """
+        Tests that only the card fields change the content hash.
+
+        :return: None
+        :raises AssertionError: If the hash is wrong.
+        """
+        offer = Offer('name', None, None, None, 'Company', 'link')
+        content_hash = offer.content_hash
+        offer.description = 'Описание'
+        assert offer.content_hash == content_hash
+        offer.salary = 'от 60 000 ₽'
+        assert offer.content_hash != content_hash
+
+
+class TestPayloadCodec:
+    """Class grouping tests of the cached payloads codec."""
+
+    body = Offer.dump_many([Offer('Python developer', None, 'Без опыта', None,
+                                  'Company', 'link', 'Описание ' * 50)])
+
+    @pytest.mark.parametrize('compression', list(PayloadCodec.compressions))
+    def test_round_trip(self, compression: str) -> None:
+        """
+        Tests that a body is restored from its payload.
+
+        :param compression: str: The tested compression.
+        :return: None
+        :raises AssertionError: If the body is changed.
+        """
+        codec = PayloadCodec(compression, level=3)
+        payload = codec.encode(self.body)
+        assert payload.startswith(PayloadCodec.magic)
+        assert codec.decode(payload) == self.body
+        assert codec.unpack(payload)[0] == compression
+
+    def test_other_compression_is_readable(self) -> None:
+        """
+        Tests that payloads stay readable after compression is changed.
+
+        :return: None
+        :raises AssertionError: If the body is changed.
+        """
+        payload = PayloadCodec('zstd', level=3).encode(self.body)
+        assert PayloadCodec('zlib', level=6).decode(payload) == self.body
+
+    def test_headerless_payload(self) -> None:
+        """
+        Tests that JSON stored without the header is read as is.
+
+        :return: None
+        :raises AssertionError: If the body is changed.
+        """
+        assert PayloadCodec().unpack(self.body) == ('none', self.body)
+
+    def test_unknown_version(self) -> None:
+        """
+        Tests that payloads of unknown format are rejected.
+
+        :return: None
+        :raises ValueError: If the payload version is unknown.
+        """
+        with pytest.raises(ValueError):
+            PayloadCodec().decode(PayloadCodec.magic + bytes((99, 0)) + self.body)
+
+    def test_unsupported_compression(self) -> None:
+        """
+        Tests that an unknown compression name is rejected.
+
+        :return: None
+        :raises ValueError: If the compression is not supported.
+        """
+        with pytest.raises(ValueError):
+            PayloadCodec('brotli')
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures('get_db')
+class TestOfferStore(TestAuthSetup):
+    """Class grouping tests of the database store of offers."""
+
+    async def test_upsert(self) -> None:
+        """
+        Tests that known offers are updated in place, keeping the first
+        seen time and the fetched description.
+
+        :return: None
+        :raises AssertionError: If stored rows are wrong.
+        """
+        offers = parse_serp(DEFAULT_PARSER_TYPE).parsed_offers
+        assert offers is not None
+        offers[0].description = 'Описание'
+        store = OfferStore(batch_size=3)
+        first_run = datetime(2024, 8, 1, tzinfo=timezone.utc)
+        assert await store.upsert(offers, first_run) == 4
+
+        offers[0].description = None
+        offers[1].salary = 'от 90 000 ₽'
+        second_run = first_run + timedelta(days=1)
+        assert await store.upsert(offers[:2], second_run) == 2
+
+        async with session_manager.async_session_local() as session:
+            stored = {offer.id: offer for offer in await session.scalars(select(StoredOffer))}
+        assert len(stored) == 4
+        first, second, third = stored[100000001], stored[100000002], stored[100000003]
+        assert first.description == 'Описание'
+        assert first.first_seen.replace(tzinfo=timezone.utc) == first_run
+        assert first.last_seen.replace(tzinfo=timezone.utc) == second_run
+        assert (second.salary_from, second.salary_to) == (90000, None)
+        assert second.salary_currency == 'RUR'
+        assert second.content_hash == offers[1].content_hash
+        assert third.last_seen.replace(tzinfo=timezone.utc) == first_run
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures('get_db')
+class TestIncrementalParsing(TestAuthSetup):
+    """Class grouping tests of skipping pages of known offers."""
+
+    async def test_select_stale(self) -> None:
+        """
+        Tests that only new, changed or long ago described offers are
+        selected for parsing, while the rest get stored descriptions.
+
+        :return: None
+        :raises AssertionError: If wrong offers are selected.
+        """
+        store = OfferStore()
+        offers = parse_serp(DEFAULT_PARSER_TYPE).parsed_offers
+        assert offers is not None
+        for offer in offers[:3]:
+            offer.description = f'Описание {offer.vacancy_id}'
+        now = datetime.now(timezone.utc)
+        await store.upsert(offers[:2], now)
+        await store.upsert(offers[2:3], now - timedelta(days=30))
+
+        soup = parse_serp(DEFAULT_PARSER_TYPE)
+        assert soup.parsed_offers is not None
+        soup.parsed_offers[1].salary = 'от 90 000 ₽'
+        parser = HHParser(HH_URL, store=store)
+        assert await parser.select_stale(soup) == [1, 2, 3]
+        assert soup.parsed_offers[0].description == 'Описание 100000001'
+        assert soup.parsed_offers[1].description is None
+
+        await store.upsert(soup.parsed_offers, now)
+        assert await store.known_descriptions(soup.parsed_offers) == {
+            100000001: 'Описание 100000001'
+        }
+
+    async def test_reused_description_ages(self) -> None:
+        """
+        Tests that storing a reused description keeps the time it was
+        fetched.
+
+        :return: None
+        :raises AssertionError: If `described_at` is renewed.
+        """
+        store = OfferStore()
+        soup = parse_serp(DEFAULT_PARSER_TYPE)
+        assert soup.parsed_offers is not None
+        offer = soup.parsed_offers[3]
+        offer.description = 'Описание 100000004'
+        described_at = datetime.now(timezone.utc) - timedelta(days=2)
+        await store.upsert([offer], described_at)
+
+        parser = HHParser(HH_URL, store=store)
+        offer.description = None
+        await parser.select_stale(soup)
+        assert offer.description == 'Описание 100000004'
+        assert offer.vacancy_id in parser.reused
+        await store.upsert([offer], datetime.now(timezone.utc), reused=parser.reused)
+        await store.upsert([offer], datetime.now(timezone.utc), reused=parser.reused)
+
+        async with session_manager.async_session_local() as session:
+            stored = await session.get(StoredOffer, offer.vacancy_id)
+        assert stored is not None and stored.described_at is not None
+        assert stored.description == 'Описание 100000004'
+        assert stored.described_at.replace(tzinfo=timezone.utc) == described_at
+
+    async def test_select_all_without_store(self) -> None:
+        """
+        Tests that all offers are parsed when no store is set.
+
+        :return: None
+        :raises AssertionError: If some offers are skipped.
+        """
+        soup = parse_serp(DEFAULT_PARSER_TYPE)
+        assert await HHParser(HH_URL, store=None).select_stale(soup) == [0, 1, 2, 3]
+
+
+class FixtureSearchParser(HHSearchParser):
+    """ Search page parser reading the saved page instead of HH. """
+
+    urls: list[str] = []
+    failing: str | None = None
+    loading: list[int] = [0, 0]
+
+    async def start_browser(self, context: BrowserContext | None = None) -> HHSoup:
+        assert context is not None
+        self.urls.append(self.url)
+        self.loading[0] += 1
+        self.loading[1] = max(self.loading)
+        await asyncio.sleep(0.01)
+        self.loading[0] -= 1
+        if self.url == self.failing:
+            raise PlaywrightError('net::ERR_CONNECTION_RESET')
+        return HHSoup(read_fixture('hh_serp.html'), self.parser_type, self.strainer)
+
+
+class TestCrawling:
+    """Class grouping tests of crawling several searches."""
+
+    def test_spec_url(self) -> None:
+        """
+        Tests that the URL of a result page has the search parameters.
+
+        :return: None
+        :raises AssertionError: If the URL is wrong.
+        """
+        spec = CrawlSpec(text='Python Django', excluded_text='junior',
+                         filters={'area': '1'})
+        assert spec.url() == ('https://hh.ru/search/vacancy?text=Python+Django'
+                              '&ored_clusters=true&search_field=name&schedule=remote'
+                              '&search_period=1&excluded_text=junior&area=1')
+        assert spec.url(2).endswith('&area=1&page=2')
+
+    @pytest.mark.parametrize('parser_type', TestParserTypes.available_types)
+    def test_page_count(self, parser_type: str) -> None:
+        """
+        Tests that the pager is kept in the strained tree of a search
+        page and read.
+
+        :param parser_type: str: The tested tree builder.
+        :return: None
+        :raises AssertionError: If the amount of pages is wrong.
+        """
+        strainer = HHSearchParser(HH_URL).strainer
+        soup = parse_serp(parser_type, strainer)
+        assert soup.page_count() == 3
+        assert soup.parsed_offers is not None and len(soup.parsed_offers) == 4
+        assert HHSoup('<div></div>', parser_type).page_count() == 1
+
+    @pytest.mark.asyncio
+    async def test_crawl(self) -> None:
+        """
+        Tests that all pages of all searches are parsed in one context
+        `concurrency` at a time, a failed page is skipped and repeated
+        vacancies are dropped.
+
+        :return: None
+        :raises AssertionError: If wrong pages or offers are returned.
+        """
+        FixtureSearchParser.urls = []
+        FixtureSearchParser.loading = [0, 0]
+        specs = [CrawlSpec(text='Python'), CrawlSpec(text='Django', max_pages=2)]
+        FixtureSearchParser.failing = specs[0].url(2)
+        driver = FakeChromium()
+        pool = BrowserPool(size=1)
+        pool._playwright = driver  # type: ignore[assignment]
+        pool._slots = asyncio.Semaphore(1)
+        crawler = HHCrawler(specs, concurrency=3, parser_class=FixtureSearchParser,
+                            store=None, pool=pool)
+        offers = await crawler.crawl()
+        assert [offer.vacancy_id for offer in offers] == [100000001, 100000002,
+                                                          100000003, 100000004]
+        assert crawler.progress.pages_parsed == 4
+        assert crawler.progress.errors == 1
+        assert crawler.progress.offers_found == 4
+        assert sorted(FixtureSearchParser.urls) == sorted(
+            [specs[0].url(page) for page in range(3)] + [specs[1].url(page) for page in range(2)]
+        )
+        assert FixtureSearchParser.loading[1] == 3
+        assert len(driver.browsers) == 1 and len(driver.browsers[0].contexts) == 1
+
+
+class TestJobs:
+    """Class grouping tests of scraping jobs."""
+
+    def test_job_request(self) -> None:
+        """
+        Tests that a crawl job requires searches to crawl.
+
+        :return: None
+        :raises AssertionError: If a wrong request is accepted.
+        """
+        assert JobRequest().kind == 'parse'
+        assert not JobRequest(kind='search').specs
+        assert JobRequest(kind='crawl', specs=[CrawlSpec(text='Python')]).specs
+        with pytest.raises(ValueError):
+            JobRequest(kind='crawl')
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize('error, status_code', [
+        (JobFailedError('abc', 'the job expired'), 502),
+        (TimeoutError(), 504),
+    ])
+    async def test_job_errors(self, error: Exception, status_code: int) -> None:
+        """
+        Tests that errors of awaited jobs become HTTP errors.
+
+        :param error: Exception: The error of the job.
+        :param status_code: int: The expected status code.
+        :return: None
+        :raises AssertionError: If the error is not converted.
+        """
+        with pytest.raises(HTTPException) as exc_info:
+            async with job_errors():
+                raise error
+        assert exc_info.value.status_code == status_code
+
+    def test_job_status(self) -> None:
+        """
+        Tests that the state of a job is read from its Redis fields.
+
+        :return: None
+        :raises AssertionError: If the state is read wrong.
+        """
+        progress = ScrapeProgress()
+        progress.pages_parsed = 2
+        progress.errors = 1
+        fields = {'kind': 'crawl', 'status': 'running', 'created_at': '1.5',
+                  'updated_at': '2.5', **{key: str(value)
+                                          for key, value in progress.as_dict().items()}}
+        status = JobStatus.model_validate({**fields, 'job_id': 'abc'})
+        assert status.pages_parsed == 2
+        assert status.errors == 1
+        assert status.error is None
+        assert status.updated_at == 2.5
+
+
+@pytest.mark.asyncio
+class TestExtractor:
+    """Class grouping tests of the extraction of loaded pages."""
+
+    async def test_inline_and_pooled(self) -> None:
+        """
+        Tests that descriptions extracted in the process pool are
+        the same as the inline ones.
+
+        :return: None
+        :raises AssertionError: If the descriptions differ.
+        """
+        content = read_fixture('hh_vacancy.html')
+        inline = Extractor(processes=0)
+        inline.start()
+        assert not inline.is_started
+        expected = await inline.description(HHSoup, DEFAULT_PARSER_TYPE, content)
+        pooled = Extractor(processes=1)
+        pooled.start()
+        try:
+            assert pooled.is_started
+            description = await pooled.description(HHSoup, DEFAULT_PARSER_TYPE, content)
+        finally:
+            pooled.stop()
+        assert not pooled.is_started
+        assert description == expected
+        assert description.startswith('Мы ищем Python-разработчика')
+
+
+class TestStreaming:
+    """Class grouping tests of streamed responses."""
+
+    def test_negotiate_stream(self) -> None:
+        """
+        Tests that the streaming format is chosen by the query
+        parameter first, then by the `Accept` header.
+
+        :return: None
+        :raises AssertionError: If a wrong format is chosen.
+        """
+        assert negotiate_stream('application/json') is None
+        assert negotiate_stream('text/event-stream, */*;q=0.1') == 'sse'
+        assert negotiate_stream('application/x-ndjson') == 'ndjson'
+        assert negotiate_stream('text/event-stream', 'ndjson') == 'ndjson'
+
+    def test_format_event(self) -> None:
+        """
+        Tests that events are formatted as NDJSON lines and
+        Server-Sent Events.
+
+        :return: None
+        :raises AssertionError: If an event is formatted wrong.
+        """
+        data = json.dumps({'link': 'https://hh.ru/vacancy/1', 'description': 'Text'}).encode()
+        line = format_event('ndjson', 'description', data)
+        assert line.endswith('\n') and line.count('\n') == 1
+        assert json.loads(line) == {'event': 'description', 'data': json.loads(data)}
+        assert format_event('sse', 'done', b'{}') == 'event: done\ndata: {}\n\n'
+
+
+class TestOfferIndex:
+    """Class grouping tests of queries of cached offers."""
+
+    offers = [
+        Offer('Python developer', 'от 150 000 ₽', '1–3 года', None, 'Alpha',
+              'https://hh.ru/vacancy/1', 'Django and PostgreSQL'),
+        Offer('Backend engineer', 'до 100 000 ₽', '3–6 лет', None, 'Beta',
+              'https://hh.ru/vacancy/2', 'FastAPI, Redis'),
+        Offer('Python lead', None, '3–6 лет', None, 'alpha',
+              'https://hh.ru/vacancy/3', 'Django'),
+        Offer('Data engineer', '200 000 – 300 000 ₽', None, None, 'Gamma',
+              'https://hh.ru/vacancy/4'),
+    ]
+
+    def links(self, query: OfferQuery) -> list[str | None]:
+        """
+        Returns the links of the offers found by a query.
+
+        :param query: OfferQuery: The query.
+        :return: list[str | None]: The links of the found offers.
+        """
+        page = OfferIndex(self.offers, 'v1').search(query)
+        return [row[5] for row in page.offers]
+
+    def test_filters(self) -> None:
+        """
+        Tests that filters are combined and case insensitive.
+
+        :return: None
+        :raises AssertionError: If wrong offers are found.
+        """
+        assert self.links(OfferQuery(company='ALPHA')) == ['https://hh.ru/vacancy/1',
+                                                           'https://hh.ru/vacancy/3']
+        assert self.links(OfferQuery(q='django', exp='3–6 лет')) == ['https://hh.ru/vacancy/3']
+        assert self.links(OfferQuery(q='python django')) == ['https://hh.ru/vacancy/1',
+                                                             'https://hh.ru/vacancy/3']
+        assert self.links(OfferQuery(salary_min=120000)) == ['https://hh.ru/vacancy/1',
+                                                            'https://hh.ru/vacancy/4']
+        assert self.links(OfferQuery(salary_max=120000)) == ['https://hh.ru/vacancy/2']
+        assert not self.links(OfferQuery(company='Delta'))
+
+    def test_sort(self) -> None:
+        """
+        Tests that offers without a salary are sorted last.
+
+        :return: None
+        :raises AssertionError: If the order is wrong.
+        """
+        assert self.links(OfferQuery(sort='-salary')) == [
+            'https://hh.ru/vacancy/4', 'https://hh.ru/vacancy/1',
+            'https://hh.ru/vacancy/2', 'https://hh.ru/vacancy/3'
+        ]
+        assert self.links(OfferQuery(sort='salary'))[-1] == 'https://hh.ru/vacancy/3'
+
+    def test_salary_currency(self) -> None:
+        """
+        Tests that salaries are filtered and sorted within a currency.
+
+        :return: None
+        :raises AssertionError: If salaries of other currencies are
+         compared.
+        """
+        offers = self.offers + [Offer('Go developer', 'до 3 000 $', None, None, 'Delta',
+                                      'https://hh.ru/vacancy/5')]
+        index = OfferIndex(offers, 'v1')
+
+        def links(query: OfferQuery) -> list[str | None]:
+            return [row[5] for row in index.search(query).offers]
+
+        assert links(OfferQuery(salary_max=120000)) == ['https://hh.ru/vacancy/2']
+        assert links(OfferQuery(salary_min=1000, currency='usd')) == ['https://hh.ru/vacancy/5']
+        assert links(OfferQuery(sort='salary')) == [
+            'https://hh.ru/vacancy/2', 'https://hh.ru/vacancy/1', 'https://hh.ru/vacancy/4',
+            'https://hh.ru/vacancy/5', 'https://hh.ru/vacancy/3'
+        ]
+
+    def test_relevance(self) -> None:
+        """
+        Tests that offers having more searched words in their names go
+        first, others keep the order of the search results.
+
+        :return: None
+        :raises AssertionError: If the order is wrong.
+        """
+        offers = self.offers + [Offer('Lead', None, None, None, 'Delta',
+                                      'https://hh.ru/vacancy/5', 'Python, Django')]
+        page = OfferIndex(offers, 'v1').search(OfferQuery(q='python lead'))
+        assert [row[5] for row in page.offers] == ['https://hh.ru/vacancy/3',
+                                                   'https://hh.ru/vacancy/5']
+        assert self.links(OfferQuery(q='django')) == ['https://hh.ru/vacancy/1',
+                                                      'https://hh.ru/vacancy/3']
+
+    def test_cursor_pagination(self) -> None:
+        """
+        Tests that cursors walk all matched offers and expire with
+        the version of the index.
+
+        :return: None
+        :raises AssertionError: If pages are wrong.
+        """
+        index = OfferIndex(self.offers, 'v1')
+        first = index.search(OfferQuery(sort='name', limit=3))
+        assert first.total == 4 and first.next_cursor is not None
+        second = index.search(OfferQuery(sort='name', limit=3, cursor=first.next_cursor))
+        assert second.next_cursor is None
+        names = [row[0] for row in first.offers + second.offers]
+        assert names == sorted(offer.name for offer in self.offers)
+        for query in (OfferQuery(q='django', limit=1), OfferQuery(salary_min=120000, limit=1)):
+            page = index.search(query)
+            assert page.total == 2 and page.next_cursor is not None
+            last = index.search(query.model_copy(update={'cursor': page.next_cursor}))
+            assert last.total == 2 and last.next_cursor is None
+            assert last.offers and last.offers != page.offers
+        with pytest.raises(ValueError):
+            OfferIndex(self.offers, 'v2').search(OfferQuery(cursor=first.next_cursor))
+        with pytest.raises(ValueError):
+            index.search(OfferQuery(cursor='not a cursor'))
+
+
+@pytest.mark.asyncio
+class TestOfferCache(TestRedisSetup):
+    """Class grouping tests of caching the scraped offers."""
+
+    offer = Offer('Python developer', None, None, None, 'Company', 'link')
+
+    @pytest.fixture
+    def scrapes(self, fake_redis: FakeAsyncRedis,
+                monkeypatch: pytest.MonkeyPatch) -> list[str]:
+        """
+        Replaces scraping jobs with ones returning `offer` at once.
+
+        :param fake_redis: FakeAsyncRedis: The in-memory Redis of
+         the cache.
+        :param monkeypatch: MonkeyPatch: The patcher of the job manager.
+        :return: list[str]: The kinds of submitted jobs.
+        """
+        submitted: list[str] = []
+
+        async def submit(job_request: JobRequest) -> str:
+            submitted.append(job_request.kind)
+            return str(len(submitted))
+
+        async def wait(*_: object) -> bytes:
+            await asyncio.sleep(0.01)
+            return PayloadCodec().encode(Offer.dump_many([self.offer]))
+
+        monkeypatch.setattr(job_manager, 'submit', submit)
+        monkeypatch.setattr(job_manager, 'wait', wait)
+        monkeypatch.setattr(settings, 'cache_poll_interval', 0.01)
+        return submitted
+
+    async def test_store_ttls(self, fake_redis: FakeAsyncRedis) -> None:
+        """
+        Tests that offers are kept for the hard TTL and stay fresh for
+        the soft one.
+
+        :param fake_redis: FakeAsyncRedis: The in-memory Redis.
+        :return: None
+        :raises AssertionError: If the TTLs are wrong.
+        """
+        cache_manager = CacheManager(soft_ttl=10, hard_ttl=100)
+        await cache_manager.store(cache_manager.codec.encode(Offer.dump_many([self.offer])))
+        assert 90 < await fake_redis.ttl(CacheManager.key) <= 100
+        assert 0 < await fake_redis.ttl(CacheManager.fresh_key) <= 10
+        assert 90 < await fake_redis.ttl(CacheManager.version_key) <= 100
+
+    async def test_stale_refreshed_once(self, fake_redis: FakeAsyncRedis,
+                                        scrapes: list[str]) -> None:
+        """
+        Tests that stale offers are returned at once and refreshed by
+        one background job.
+
+        :param fake_redis: FakeAsyncRedis: The in-memory Redis.
+        :param scrapes: list[str]: The kinds of submitted jobs.
+        :return: None
+        :raises AssertionError: If the refresh is missing or repeated.
+        """
+        cache_manager = CacheManager()
+        await cache_manager.store(cache_manager.codec.encode(Offer.dump_many([])))
+        await fake_redis.delete(CacheManager.fresh_key)
+        responses = await asyncio.gather(*(CacheManager().get_or_create() for _ in range(3)))
+        assert [(response.status_code, json.loads(response.body)) for response in responses
+                ] == [(200, [])] * 3
+        assert CacheManager._refresh_task is not None
+        await CacheManager._refresh_task
+        assert scrapes == ['search']
+        assert await fake_redis.exists(CacheManager.fresh_key)
+        response = await CacheManager().get_or_create()
+        assert json.loads(response.body) == [self.offer.as_row()]
+
+    async def test_misses_share_scrape(self, scrapes: list[str]) -> None:
+        """
+        Tests that concurrent cache misses wait for one scraping job.
+
+        :param scrapes: list[str]: The kinds of submitted jobs.
+        :return: None
+        :raises AssertionError: If several jobs are submitted.
+        """
+        responses = await asyncio.gather(*(CacheManager().get_or_create() for _ in range(3)))
+        assert [response.status_code for response in responses] == [201] * 3
+        assert scrapes == ['search']
+
+    async def test_miss_waits_for_other_worker(self, scrapes: list[str]) -> None:
+        """
+        Tests that a cache miss doesn't scrape while another worker
+        holds the lock, and gets the offers it stores.
+
+        :param scrapes: list[str]: The kinds of submitted jobs.
+        :return: None
+        :raises AssertionError: If the offers are scraped twice.
+        """
+        cache_manager = CacheManager()
+        lock = cache_manager._lock()
+        assert await lock.acquire(blocking=False)
+        created = asyncio.create_task(CacheManager().get_or_create())
+        await asyncio.sleep(0.05)
+        assert not created.done()
+        await cache_manager.store(cache_manager.codec.encode(Offer.dump_many([self.offer])))
+        response = await created
+        assert json.loads(response.body) == [self.offer.as_row()]
+        assert not scrapes
+
+
+@pytest.mark.asyncio
+class TestJobQueue(TestRedisSetup):
+    """Class grouping tests of queued scraping jobs."""
+
+    async def test_stalled_job_fails(self, fake_redis: FakeAsyncRedis) -> None:
+        """
+        Tests that a running job without a heartbeat is failed, so its
+        waiters stop waiting.
+
+        :param fake_redis: FakeAsyncRedis: The in-memory Redis.
+        :return: None
+        :raises AssertionError: If the job is still running.
+        """
+        manager = JobManager(heartbeat_timeout=5)
+        manager.client = fake_redis
+        job_id = await manager.create(JobRequest())
+        await fake_redis.hset(manager.key(job_id),  # type: ignore[misc]
+                              mapping={'status': 'running', 'updated_at': time.time() - 10})
+        with pytest.raises(JobFailedError):
+            await manager.wait(job_id, poll_interval=0.01, timeout=1)
+        job_status = await manager.status(job_id)
+        assert job_status is not None and job_status.status == 'failed'
+        assert [event async for event, _ in manager.events(job_id).read(0.01)] == ['failed']
+
+    async def test_wait(self, fake_redis: FakeAsyncRedis,
+                        monkeypatch: pytest.MonkeyPatch) -> None:
+        """
+        Tests that waiting returns the result of a done job and fails
+        for failed, expired and unfinished jobs.
+
+        :param fake_redis: FakeAsyncRedis: The in-memory Redis.
+        :param monkeypatch: MonkeyPatch: The patcher of scraping.
+        :return: None
+        :raises AssertionError: If a wait ends wrong.
+        """
+        async def scrape(*_: object) -> list[Offer]:
+            return [Offer('name', None, None, None, 'Company', 'link')]
+
+        manager = JobManager()
+        manager.client = fake_redis
+        monkeypatch.setattr(manager, 'scrape', scrape)
+        job_id = await manager.create(JobRequest())
+        await manager.run(job_id, JobRequest())
+        payload = await manager.wait(job_id, poll_interval=0.01, timeout=1)
+        assert Offer.load_many(manager.codec.decode(payload))[0].name == 'name'
+        failed_id = await manager.create(JobRequest())
+        await manager._update(failed_id, status='failed', error='page not loaded')
+        with pytest.raises(JobFailedError, match='page not loaded'):
+            await manager.wait(failed_id, poll_interval=0.01, timeout=1)
+        with pytest.raises(JobFailedError, match='expired'):
+            await manager.wait('unknown', poll_interval=0.01, timeout=1)
+        with pytest.raises(TimeoutError):
+            await manager.wait(await manager.create(JobRequest()), poll_interval=0.01,
+                               timeout=0.05)
+
+    async def test_worker_runs_queued_jobs(self, fake_redis: FakeAsyncRedis,
+                                           monkeypatch: pytest.MonkeyPatch) -> None:
+        """
+        Tests that a worker runs the queued jobs in order, stops after
+        its current job and releases its resources.
+
+        :param fake_redis: FakeAsyncRedis: The in-memory Redis.
+        :param monkeypatch: MonkeyPatch: The patcher of the resources of
+         the worker.
+        :return: None
+        :raises AssertionError: If jobs are not run or resources are
+         not released.
+        """
+        calls: list[str] = []
+
+        async def scrape(job_request: JobRequest, *_: object) -> list[Offer]:
+            calls.append(job_request.kind)
+            if job_request.kind == 'parse':
+                scrape_worker.stop()
+            return []
+
+        async def pool_start() -> None:
+            calls.append('started')
+
+        async def pool_stop() -> None:
+            calls.append('stopped')
+
+        monkeypatch.setattr(worker, 'redis', fake_redis)
+        monkeypatch.setattr(browser_pool, 'start', pool_start)
+        monkeypatch.setattr(browser_pool, 'stop', pool_stop)
+        monkeypatch.setattr(extractor, 'processes', 0)
+        monkeypatch.setattr(job_manager, 'scrape', scrape)
+        job_ids = [await job_manager.submit(job_request) for job_request in (
+            JobRequest(kind='search'), JobRequest(kind='parse'), JobRequest(kind='search')
+        )]
+        scrape_worker = worker.ScrapeWorker(job_manager, queue_timeout=1)
+        await asyncio.wait_for(scrape_worker.serve(), timeout=5)
+        assert calls == ['started', 'search', 'parse', 'stopped']
+        statuses = [await job_manager.status(job_id) for job_id in job_ids]
+        assert [job_status.status for job_status in statuses if job_status] == [
+            'done', 'done', 'queued'
+        ]
+
+    async def test_reporter_stops_before_result(self, fake_redis: FakeAsyncRedis,
+                                                monkeypatch: pytest.MonkeyPatch) -> None:
+        """
+        Tests that the progress reporter of a job is stopped before
+        the job is finished, so it doesn't touch the final state.
+
+        :param fake_redis: FakeAsyncRedis: The in-memory Redis.
+        :param monkeypatch: MonkeyPatch: The patcher of scraping.
+        :return: None
+        :raises AssertionError: If the state changes after the job.
+        """
+        async def scrape(*_: object) -> list[Offer]:
+            await asyncio.sleep(0.05)
+            return []
+
+        manager = JobManager(progress_interval=0.001)
+        manager.client = fake_redis
+        monkeypatch.setattr(manager, 'scrape', scrape)
+        job_id = await manager.create(JobRequest())
+        await manager.run(job_id, JobRequest())
+        finished = await manager.status(job_id)
+        await asyncio.sleep(0.01)
+        assert finished is not None and finished.status == 'done'
+        assert await manager.status(job_id) == finished
+
+    async def test_jobs_of_owner(self, fake_redis: FakeAsyncRedis) -> None:
+        """
+        Tests that only the submitter of a job can read it.
+
+        :param fake_redis: FakeAsyncRedis: The in-memory Redis.
+        :return: None
+        :raises AssertionError: If a job of another user or of the
+         cache is found.
+        """
+        def request_of(name: str) -> Request:
+            token = AuthHandler.create_access_token({'sub': name})
+            return Request({'type': 'http', 'headers': [
+                (b'cookie', f'auth_token={token}'.encode())
+            ]})
+
+        job_id = await job_manager.submit(JobRequest(), 'alice')
+        cache_job_id = await job_manager.submit(JobRequest())
+        assert (await owned_job(job_id, request_of('alice'))).owner == 'alice'
+        for owned_id, name in ((job_id, 'bob'), (cache_job_id, 'alice'), ('unknown', 'alice')):
+            with pytest.raises(HTTPException) as exc_info:
+                await owned_job(owned_id, request_of(name))
+            assert exc_info.value.status_code == 404
+        assert await fake_redis.llen(job_manager.queue_key) == 2  # type: ignore[misc]
+
+
+@pytest.mark.asyncio
+class TestJobEvents(TestRedisSetup):
+    """Class grouping tests of streamed job events."""
+
+    async def test_read_until_final(self, fake_redis: FakeAsyncRedis) -> None:
+        """
+        Tests that reading stops on the final event and skips nothing
+        published before the reader came.
+
+        :param fake_redis: FakeAsyncRedis: The in-memory Redis.
+        :return: None
+        :raises AssertionError: If the events are not read in order.
+        """
+        job_events = JobEvents('events')
+        await job_events.publish_many('offer', [{'name': 'a'}, {'name': 'b'}])
+        await job_events.publish('done', {})
+        await job_events.publish('offer', {'name': 'late'})
+        read = [(event, json.loads(data)) async for event, data in job_events.read(0.01)]
+        assert read == [('offer', {'name': 'a'}), ('offer', {'name': 'b'}), ('done', {})]
+        assert await fake_redis.ttl('events') > 0
+
+    async def test_read_stops_when_over(self, fake_redis: FakeAsyncRedis) -> None:
+        """
+        Tests that reading without the final event stops once the
+        callback says so, after the events left are read.
+
+        :param fake_redis: FakeAsyncRedis: The in-memory Redis.
+        :return: None
+        :raises AssertionError: If the reading doesn't stop.
+        """
+        job_events = JobEvents('events')
+        await job_events.publish('offer', {})
+        checks: list[int] = []
+
+        async def is_over() -> bool:
+            checks.append(1)
+            return len(checks) == 2
+
+        assert [event async for event, _ in job_events.read(0.01, is_over)] == ['offer']
+        assert len(checks) == 2
+        assert await fake_redis.exists('events')
+
+    async def test_expired_job_events_fail(self, fake_redis: FakeAsyncRedis) -> None:
+        """
+        Tests that the events of an expired job end with `failed`.
+
+        :param fake_redis: FakeAsyncRedis: The in-memory Redis.
+        :return: None
+        :raises AssertionError: If the events don't end with `failed`.
+        """
+        job_id = await job_manager.create(JobRequest())
+        await job_manager.events(job_id).publish('offer', {})
+        await fake_redis.delete(job_manager.key(job_id))
+        read = [(event, json.loads(data))
+                async for event, data in job_manager.read_events(job_id, 0.01)]
+        assert read == [('offer', {}), ('failed', {'error': 'the job expired'})]
+
+
+@pytest.mark.asyncio
+class TestCacheStreaming(TestRedisSetup):
+    """Class grouping tests of streaming the cached offers."""
+
+    async def test_cached_offers(self, fake_redis: FakeAsyncRedis,
+                                 monkeypatch: pytest.MonkeyPatch) -> None:
+        """
+        Tests that fresh cached offers are streamed without a job.
+
+        :param fake_redis: FakeAsyncRedis: The in-memory Redis.
+        :param monkeypatch: MonkeyPatch: The patcher of job submitting.
+        :return: None
+        :raises AssertionError: If a job is queued or the offers differ.
+        """
+        async def submit(_: JobRequest) -> str:
+            raise AssertionError('No job is expected')
+
+        monkeypatch.setattr(job_manager, 'submit', submit)
+        offer = Offer('Python developer', None, None, None, 'Company', 'link')
+        cache_manager = CacheManager()
+        await cache_manager.store(cache_manager.codec.encode(Offer.dump_many([offer])))
+        chunks = [chunk async for chunk in CacheManager().stream('ndjson')]
+        assert [json.loads(chunk)['event'] for chunk in chunks] == ['offer', 'done']
+        assert json.loads(chunks[0])['data'] == offer.as_row()
+        assert await fake_redis.exists(CacheManager.key)
+
+    async def test_streams_share_job(self, fake_redis: FakeAsyncRedis,
+                                     monkeypatch: pytest.MonkeyPatch) -> None:
+        """
+        Tests that concurrent streams on a cache miss read the events
+        of one queued job.
+
+        :param fake_redis: FakeAsyncRedis: The in-memory Redis.
+        :param monkeypatch: MonkeyPatch: The patcher counting submitted
+         jobs.
+        :return: None
+        :raises AssertionError: If several jobs are queued or a stream
+         misses events.
+        """
+        submitted: list[str] = []
+
+        async def submit(job_request: JobRequest) -> str:
+            submitted.append(await job_manager.create(job_request))
+            return submitted[-1]
+
+        async def collect() -> list[str]:
+            return [json.loads(chunk)['event']
+                    async for chunk in CacheManager().stream('ndjson')]
+
+        monkeypatch.setattr(job_manager, 'submit', submit)
+        streams = [asyncio.create_task(collect()) for _ in range(3)]
+        while not await fake_redis.exists(CacheManager.stream_job_key):
+            await asyncio.sleep(0.01)
+        job_events = job_manager.events(submitted[0])
+        await job_events.publish('offer', {})
+        await job_events.publish('done', {})
+        assert await asyncio.gather(*streams) == [['offer', 'done']] * 3
+        assert len(submitted) == 1
+
+    @staticmethod
+    async def finish(job_id: str, offers: list[Offer]) -> None:
+        """
+        Finishes a job the way a worker does.
+
+        :param job_id: str: The id of the job.
+        :param offers: list[Offer]: The scraped offers.
+        :return: None
+        """
+        payload = job_manager.codec.encode(Offer.dump_many(offers))
+        await job_manager.client.set(job_manager.result_key(job_id), payload)
+        await job_manager._update(job_id, status='done')
+        await job_manager.events(job_id).publish('done', {})
+
+    async def test_miss_waits_for_streamed_job(self, fake_redis: FakeAsyncRedis,
+                                               monkeypatch: pytest.MonkeyPatch) -> None:
+        """
+        Tests that a cache miss while a `parse` job is streamed gets
+        the result of that job instead of scraping again.
+
+        :param fake_redis: FakeAsyncRedis: The in-memory Redis.
+        :param monkeypatch: MonkeyPatch: The patcher counting submitted
+         jobs.
+        :return: None
+        :raises AssertionError: If another job is submitted.
+        """
+        submitted: list[tuple[str, str]] = []
+
+        async def submit(job_request: JobRequest) -> str:
+            submitted.append((job_request.kind, await job_manager.create(job_request)))
+            return submitted[-1][1]
+
+        async def collect() -> list[str]:
+            return [json.loads(chunk)['event']
+                    async for chunk in CacheManager().stream('ndjson')]
+
+        monkeypatch.setattr(job_manager, 'submit', submit)
+        monkeypatch.setattr(settings, 'cache_poll_interval', 0.01)
+        stream = asyncio.create_task(collect())
+        while not await fake_redis.exists(CacheManager.stream_job_key):
+            await asyncio.sleep(0.01)
+        created = asyncio.create_task(CacheManager().get_or_create())
+        await asyncio.sleep(0.05)
+        offer = Offer('Python developer', None, None, None, 'Company', 'link')
+        await self.finish(submitted[0][1], [offer])
+        response = await created
+        assert response.status_code == 201
+        assert json.loads(response.body) == [offer.as_row()]
+        assert await stream == ['done']
+        assert [kind for kind, _ in submitted] == ['parse']
+
+    async def test_dropped_stream_is_cached(self, fake_redis: FakeAsyncRedis,
+                                            monkeypatch: pytest.MonkeyPatch) -> None:
+        """
+        Tests that the result of a streamed job is cached by the next
+        request even if its stream was dropped.
+
+        :param fake_redis: FakeAsyncRedis: The in-memory Redis.
+        :param monkeypatch: MonkeyPatch: The patcher counting submitted
+         jobs.
+        :return: None
+        :raises AssertionError: If the offers are scraped again.
+        """
+        submitted: list[str] = []
+
+        async def submit(job_request: JobRequest) -> str:
+            submitted.append(await job_manager.create(job_request))
+            return submitted[-1]
+
+        async def drop() -> None:
+            async for _ in CacheManager().stream('ndjson'):
+                pass
+
+        monkeypatch.setattr(job_manager, 'submit', submit)
+        dropped = asyncio.create_task(drop())
+        while not await fake_redis.exists(CacheManager.stream_job_key):
+            await asyncio.sleep(0.01)
+        dropped.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await dropped
+        offer = Offer('Python developer', None, None, None, 'Company', 'link')
+        await self.finish(submitted[0], [offer])
+        assert not await fake_redis.exists(CacheManager.key)
+        chunks = [json.loads(chunk) async for chunk in CacheManager().stream('ndjson')]
+        assert chunks == [{'event': 'offer', 'data': offer.as_row()},
+                          {'event': 'done', 'data': {}}]
+        assert len(submitted) == 1
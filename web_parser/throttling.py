@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Contains rate limiting of requests made by parsers."""
+import time
+from urllib.parse import urlsplit
+
+import asyncio
+
+from settings import settings
+
+
+# pylint: disable=R0903
+class HostRateLimiter:
+    """
+    Spaces out navigations to the same host.
+
+    Every call reserves the next free time slot of the URL's host, so
+    concurrent callers are released one by one at most `rate` times
+    per second. Different hosts are limited independently.
+    """
+
+    def __init__(self, rate: float) -> None:
+        """
+        Initializes the HostRateLimiter with allowed rate.
+
+        :param rate: float: The maximum amount of requests per second
+         to a single host. Zero or negative value disables limiting.
+        """
+        self.interval: float = 1 / rate if rate > 0 else 0.0
+        self._next_slots: dict[str, float] = {}
+
+    async def wait(self, url: str) -> None:
+        """
+        Waits until a request to the host of the URL is allowed.
+
+        :param url: str: The URL going to be requested.
+        :return: None
+        """
+        if not self.interval:
+            return
+        host = urlsplit(url).netloc
+        now = time.monotonic()
+        slot = max(now, self._next_slots.get(host, now))
+        self._next_slots[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+host_rate_limiter = HostRateLimiter(settings.parser_host_rate)
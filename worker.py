@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""The entrypoint of scraper workers running queued scraping jobs."""
+import argparse
+import logging
+import multiprocessing
+import signal
+
+import asyncio
+
+from db_utils import session_manager
+from redis_client import redis
+from settings import settings
+from web_parser import browser_pool, extractor
+from web_parser.jobs import JobManager, job_manager
+
+logger = logging.getLogger(__name__)
+
+
+class ScrapeWorker:
+    """
+    Runs the queued scraping jobs one by one in this process.
+
+    The browser pool and the extractor processes of the worker are
+    started once and stay warm between jobs. The worker checks whether
+    it is stopped every `queue_timeout` seconds while the queue is
+    empty, a running job is finished before it stops.
+    """
+
+    def __init__(self, manager: JobManager = job_manager,
+                 queue_timeout: int = settings.job_queue_timeout) -> None:
+        """
+        Initializes the ScrapeWorker with the job manager.
+
+        :param manager: JobManager: The manager of the job queue.
+        :param queue_timeout: int: Seconds to wait for a job before
+         checking whether the worker is stopped.
+        """
+        self.manager: JobManager = manager
+        self.queue_timeout: int = queue_timeout
+        self.stopped: asyncio.Event = asyncio.Event()
+
+    async def serve(self) -> None:
+        """
+        Runs queued jobs until the worker is stopped, then releases
+        the shared resources of the process. The extractor processes
+        are joined in a thread, so the loop keeps running meanwhile.
+
+        :return: None
+        """
+        await browser_pool.start()
+        extractor.start()
+        try:
+            while not self.stopped.is_set():
+                job = await self.manager.next_job(self.queue_timeout)
+                if job is not None:
+                    await self.manager.run(*job)
+        finally:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, extractor.stop)
+            await browser_pool.stop()
+            await session_manager.async_engine.dispose()
+            await redis.aclose()
+
+    def stop(self) -> None:
+        """
+        Stops the worker after its current job.
+
+        :return: None
+        """
+        self.stopped.set()
+
+
+async def serve() -> None:
+    """
+    Runs a worker in this process until SIGINT or SIGTERM.
+
+    :return: None
+    """
+    worker = ScrapeWorker()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, worker.stop)
+    await worker.serve()
+
+
+def run_process() -> None:
+    """
+    Runs a worker in a new event loop.
+
+    :return: None
+    """
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(serve())
+
+
+def main(processes: int = settings.scrape_workers) -> None:
+    """
+    Starts the worker processes and waits for them.
+
+    Processes are spawned, so each of them gets its own Redis client,
+    database engine and Playwright driver.
+
+    :param processes: int: The amount of worker processes.
+    :return: None
+    """
+    context = multiprocessing.get_context('spawn')
+    workers = [context.Process(target=run_process, name=f'scrape-worker-{index}')
+               for index in range(processes)]
+    for process in workers:
+        process.start()
+    logger.info('Started %s scraper workers', processes)
+    for process in workers:
+        process.join()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run scraper workers of queued jobs.')
+    parser.add_argument('--processes', type=int, default=settings.scrape_workers)
+    args = parser.parse_args()
+    main(args.processes)